@@ -1,8 +1,13 @@
 #this part of the project needs to look at a user message and return as score for each intent dimension so that the rest of the system knows what context to inject and whether to use a tool.
 
 #imports
+import asyncio
 import json
 from agent.llm import get_llm_response
+from agent.intent_model import local_score_intent
+from agent.matcher import match_message
+from utils.tracing import span
+import config
 import re
 
 CASUAL_EXACT = {
@@ -40,14 +45,15 @@ def quick_triage(message: str) -> dict | None:
         return {"casual": 1.0, "tool": 0.0, "personal": 0.0, "knowledge": 0.0}
     if len(msg.split()) <= 2 and "?" not in msg:
         return {"casual": 0.9, "tool": 0.0, "personal": 0.0, "knowledge": 0.1}
-    if any(phrase in msg for phrase in PERSONAL_PHRASES):
+    hits = match_message(message)
+    if hits.has("personal"):
         return {"casual": 0.0, "tool": 0.0, "personal": 0.8, "knowledge": 0.5} #hybrid handling
-    if any(phrase in msg for phrase in TOOL_EXACT_PHRASES):
+    if hits.has("tool"):
         return {"casual": 0.0, "tool": 1.0, "personal": 0.0, "knowledge": 0.0}
     
     return None
 
-def llm_score_intent(message: str) -> dict:
+async def llm_score_intent(message: str) -> dict:
     scorer_prompt = [
         {
             "role": "system",
@@ -69,7 +75,7 @@ Example: {"casual": 0.1, "tool": 0.8, "personal": 0.2, "knowledge": 0.3}"""
     ]
 
     try:
-        response = get_llm_response(scorer_prompt, use_classifier_model=True)
+        response = await get_llm_response(scorer_prompt, use_classifier_model=True)
         raw = response.get("content", "").strip()
         raw = re.sub(r"```json|```", "", raw).strip()
 
@@ -80,8 +86,29 @@ Example: {"casual": 0.1, "tool": 0.8, "personal": 0.2, "knowledge": 0.3}"""
     except Exception:
         return {"casual": 0.0, "tool":0.0, "personal":0.0, "knowledge": 1.0}
     
-def classify_message(message:str) -> dict:
+async def classify_with_source(message: str) -> tuple:
+    """
+    Returns (scores, source) where source is "triage", "local" or "llm".
+    Order: exact phrases, then the local embedding scorer, and the LLM only
+    when the local scorer isn't confident.
+    """
+    with span("classify") as s:
+        scores, source = await _classify(message)
+        s.set(source=source)
+    return scores, source
+
+async def _classify(message: str) -> tuple:
     scores = quick_triage(message)
     if scores is not None:
-        return scores
-    return llm_score_intent(message)
\ No newline at end of file
+        return scores, "triage"
+
+    if config.LOCAL_INTENT_ENABLED:
+        local_scores, confidence = await asyncio.to_thread(local_score_intent, message)
+        if local_scores is not None and confidence >= config.LOCAL_INTENT_MIN_CONFIDENCE:
+            return local_scores, "local"
+
+    return await llm_score_intent(message), "llm"
+
+async def classify_message(message:str) -> dict:
+    scores, _ = await classify_with_source(message)
+    return scores
\ No newline at end of file
@@ -1,14 +1,21 @@
 # builds the system message with right context
 
 #imports
+import asyncio
+from functools import lru_cache
 import tiktoken
 from config import CONTEXT_BUDGETS, MAX_CONTEXT_TOKENS
 from memory import store
 from rag.retriever import retrieve_context
+from agent.classifier import quick_triage
+from utils.tracing import span
 
 encoder = tiktoken.get_encoding("cl100k_base")
 
 
+# SOUL/USER sections come back from the store cache as the same str object until
+# the file changes, so this is a dict hit (str hashes are cached) instead of a re-tokenize
+@lru_cache(maxsize=256)
 def count_tokens(text: str) -> int:
     return len(encoder.encode(text))
 
@@ -33,64 +40,109 @@ def should_use_tools(scores: dict) -> bool:
     is_meaningful = tool_score > 0.4  # floor to avoid accidental triggers
     return is_dominant and is_meaningful
 
-def build_context(user_message:str, scores:dict)->str:
+def needs_rag(scores: dict) -> bool:
+    return (scores["knowledge"] > 0.5 or scores["personal"] > 0.6) and scores["tool"] < 0.7
+
+def start_speculative_rag(user_message: str):
+    """
+    Kicks off RAG retrieval before classification finishes, so the MiniLM
+    encode + Chroma query overlap with intent scoring instead of following it.
+    Skipped when quick_triage already rules RAG out. Returns a task or None.
+    """
+    triage = quick_triage(user_message)
+    if triage is not None and not needs_rag(triage):
+        return None
+    return asyncio.create_task(asyncio.to_thread(retrieve_context, user_message, 3))
+
+def _discard(task) -> None:
+    """Drops a speculative task whose result isn't wanted, without leaking 'never retrieved' warnings."""
+    if task is None:
+        return
+    task.cancel()
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+async def _none():
+    return None
+
+async def build_context(user_message:str, scores:dict, rag_task=None)->str:
+    """
+    Fetches every context source the scores call for concurrently, then
+    assembles them in priority order within the token budget.
+    """
+    with span("build_context") as s:
+        context = await _build_context(user_message, scores, rag_task)
+        s.set(chars=len(context))
+    return context
+
+async def _build_context(user_message: str, scores: dict, rag_task=None) -> str:
     budget_tokens = compute_budget(scores)
+
+    if scores["casual"] > 0.8:
+        _discard(rag_task)
+        soul = await asyncio.to_thread(store.read_soul_core)
+        return soul or ""
+
+    want_user = scores["personal"] > 0.4 or scores["knowledge"] > 0.5
+    want_memory = scores["personal"] > 0.4
+    want_rag = needs_rag(scores)
+    want_logs = scores["personal"] > 0.5
+
+    if want_rag and rag_task is None:
+        rag_task = asyncio.create_task(asyncio.to_thread(retrieve_context, user_message, 3))
+    elif not want_rag:
+        _discard(rag_task)
+        rag_task = None
+
+    soul, user_md, memory, rag, logs = await asyncio.gather(
+        asyncio.to_thread(store.read_soul_core),
+        asyncio.to_thread(store.read_user_md) if want_user else _none(),
+        asyncio.to_thread(store.read_memory_chunks, user_message, 3) if want_memory else _none(),
+        rag_task if rag_task is not None else _none(),
+        # logs go last in priority, so fetch the most the budget could ever allow
+        asyncio.to_thread(store.read_recent_logs, 1, budget_tokens * 4) if want_logs else _none(),
+        return_exceptions=True,
+    )
+
     pieces = []
     used_tokens = 0
 
-    soul = store.read_soul_core()
-    if soul:
-        soul_tokens = count_tokens(soul)
-        pieces.append(soul)
-        used_tokens += soul_tokens
-    
-    if scores["casual"] > 0.8:
-        return "\n\n".join(pieces)
-    
-    if scores["personal"] > 0.4 or scores["knowledge"] > 0.5:
-        user_md = store.read_user_md()
-        if user_md:
-            user_tokens = count_tokens(user_md)
-            if used_tokens + user_tokens < budget_tokens:
-                pieces.append(user_md)
-                used_tokens += user_tokens
-    
-    if scores["personal"] > 0.4:
-        memory = store.read_memory_chunks(query=user_message, top_k=3)
-        if memory:
-            memory_tokens = count_tokens(memory)
-            if used_tokens + memory_tokens < budget_tokens:
-                pieces.append(memory)
-                used_tokens += memory_tokens
-    if (scores["knowledge"] > 0.5 or scores["personal"] > 0.6) and scores["tool"] < 0.7:
-        try:
-            rag = retrieve_context(user_message, top_k=3)
-            if rag:
-                rag_tokens = count_tokens(rag)
-                if used_tokens + rag_tokens < budget_tokens:
-                    pieces.append(f"## Relevant Past Context\n{rag}")
-                    used_tokens += rag_tokens
-        except Exception as e:
-            print(f"[CONTEXT ERROR] RAG injection failed: {e}")    
-            pass  # RAG failure should never break context building
-    
-    if scores["personal"] > 0.5:
+    def add(text: str) -> None:
+        nonlocal used_tokens
+        pieces.append(text)
+        used_tokens += count_tokens(text)
+
+    for name, result in (("soul", soul), ("user", user_md), ("memory", memory), ("rag", rag), ("logs", logs)):
+        if isinstance(result, BaseException):
+            # a failed source should never break context building
+            print(f"[CONTEXT ERROR] {name} fetch failed: {result}")
+
+    if isinstance(soul, str) and soul:
+        add(soul)
+
+    for piece in (user_md, memory):
+        if isinstance(piece, str) and piece and used_tokens + count_tokens(piece) < budget_tokens:
+            add(piece)
+
+    if isinstance(rag, str) and rag:
+        rag_section = f"## Relevant Past Context\n{rag}"
+        if used_tokens + count_tokens(rag) < budget_tokens:
+            add(rag_section)
+
+    if isinstance(logs, str) and logs:
         remaining_tokens = budget_tokens - used_tokens
         if remaining_tokens > 100:  # only worth adding if meaningful space left
-            logs = store.read_recent_logs(days=1, max_chars=remaining_tokens * 4)
-            if logs:
-                # Trim precisely to remaining budget
-                logs = trim_to_budget(logs, remaining_tokens)
-                pieces.append(f"## Recent Conversation Logs\n{logs}")
+            # Trim precisely to remaining budget
+            logs = trim_to_budget(logs, remaining_tokens)
+            pieces.append(f"## Recent Conversation Logs\n{logs}")
     return "\n\n".join(pieces)
 
-def build_system_message(user_message: str, scores: dict) -> str:
+async def build_system_message(user_message: str, scores: dict, rag_task=None) -> str:
     """
     Wraps build_context() output in the full system prompt.
     Response rules are always appended — they're cheap (few tokens)
     and critical for Krish's behavior.
     """
-    context = build_context(user_message, scores)
+    context = await build_context(user_message, scores, rag_task=rag_task)
 
     return f"""You are Krish, a personal AI assistant.
 {context}
@@ -1,18 +1,17 @@
 import json
+import time
 from datetime import datetime
-from agent.classifier import classify_message
-from agent.context import build_system_message, should_use_tools
-from agent.llm import get_llm_response
-from agent.tools import filter_tools, execute_tool
-from agent.memory_ops import should_extract_memory, check_for_memory
+from agent.classifier import classify_with_source
+from agent.context import build_system_message, should_use_tools, start_speculative_rag
+from agent.llm import get_llm_response, stream_llm_response
+from agent.tools import filter_tools, execute_tool_calls, tool_failed
+from agent.memory_ops import should_extract_memory, queue_memory_extraction
+from agent.session import sessions
 from memory import store
+from utils.tracing import span, start_trace, current_trace, end_trace
 import config
 import re
 
-conversation_history = []
-
-ERROR_WORDS = ["failed", "error", "exception", "invalid", "unknown tool"]
-
 def _parse_xml_fallback(content: str) -> tuple | None:
     if not content:
         return None
@@ -27,33 +26,70 @@ def _parse_xml_fallback(content: str) -> tuple | None:
             return None
     return None
 
-def _safe_llm_call(messages: list, tools: list = None) -> dict:
-    """Single wrapper for all LLM calls. Logs errors, never crashes."""
+async def _safe_llm_call(messages: list, tools: list = None, on_token=None) -> dict:
+    """
+    Single wrapper for all LLM calls. Logs errors, never crashes.
+    With on_token, the call is streamed and on_token(text_so_far) is awaited
+    as text arrives; the return value is the same either way.
+    """
     try:
-        return get_llm_response(messages, tools=tools)
+        if on_token is None:
+            return await get_llm_response(messages, tools=tools)
+        text = ""
+        async for event in stream_llm_response(messages, tools=tools):
+            if event["type"] != "token":
+                return event
+            text += event["content"]
+            await on_token(text)
+        return {"type": "text", "content": text}
     except Exception as e:
         print(f"[LLM ERROR] {e}")
         return {"type": "text", "content": None}
 
-async def run_agent(user_message: str, bot=None, chat_id: str = None) -> str:
-    global conversation_history
-    
+async def run_agent(user_message: str, bot=None, chat_id: str = None, on_token=None) -> str:
+    """
+    on_token: optional async callback; when given, model output is streamed
+    to it as it's generated (see bot/streaming.py).
+    Each turn is traced (utils/tracing.py); the spans land in its metrics row.
+    """
+    token = start_trace()
+    session = sessions.get(chat_id)
+    try:
+        with span("session_wait"):
+            await session.lock.acquire()
+        try:
+            return await _run_turn(session, user_message, bot=bot, chat_id=chat_id, on_token=on_token)
+        finally:
+            session.lock.release()
+    finally:
+        end_trace(token)
+
+async def _run_turn(session, user_message: str, bot=None, chat_id: str = None, on_token=None) -> str:
     print(f"[AGENT] Received: {user_message[:80]}")
+    started = time.perf_counter()
+    first_token_ms = None
 
-    store.write_daily_log("user", user_message)
-    conversation_history.append({"role": "user", "content": user_message})
+    stream_to = None
+    if on_token is not None:
+        async def stream_to(text: str) -> None:
+            nonlocal first_token_ms
+            if first_token_ms is None:
+                first_token_ms = round((time.perf_counter() - started) * 1000)
+            await on_token(text)
 
-    if len(conversation_history) > config.MAX_HISTORY:
-        conversation_history = conversation_history[-config.MAX_HISTORY:]
+    store.write_daily_log("user", user_message)
+    session.append("user", user_message)
 
     final_response = "I'm having trouble right now. Please try again."
     tools_used = []
 
-    scores = classify_message(user_message)
-    print(f"[CLASSIFIER] scores={scores}")
+    # retrieval runs alongside classification; dropped if the scores don't need it
+    rag_task = start_speculative_rag(user_message)
+    scores, intent_source = await classify_with_source(user_message)
+    print(f"[CLASSIFIER] scores={scores} source={intent_source}")
 
-    system_msg = build_system_message(user_message, scores)
-    messages = [{"role": "system", "content": system_msg}] + conversation_history
+    system_msg = await build_system_message(user_message, scores, rag_task=rag_task)
+    messages = [{"role": "system", "content": system_msg}] + session.messages()
 
     if should_use_tools(scores):
         relevant_tools = filter_tools(user_message, scores)
@@ -61,9 +97,9 @@ async def run_agent(user_message: str, bot=None, chat_id: str = None) -> str:
         tool_names = [t["function"]["name"] for t in relevant_tools]
         print(f"[TOOLS] Using tools: {tool_names}")
 
-        response = _safe_llm_call(messages, tools=relevant_tools)
+        response = await _safe_llm_call(messages, tools=relevant_tools, on_token=stream_to)
 
-        print(f"[LLM] Initial response type: {response['type']}, name: {response.get('name')}, content: {str(response.get('content', ''))[:80]}")
+        print(f"[LLM] Initial response type: {response['type']}, calls: {[c['name'] for c in response.get('calls', [])]}, content: {str(response.get('content', ''))[:80]}")
 
         iterations = 0
 
@@ -75,8 +111,7 @@ async def run_agent(user_message: str, bot=None, chat_id: str = None) -> str:
                 if fallback:
                     response = {
                         "type": "tool_call",
-                        "name": fallback[0],
-                        "arguments": fallback[1]
+                        "calls": [{"name": fallback[0], "arguments": fallback[1]}],
                     }
 
             # LLM has a final answer — done
@@ -84,42 +119,34 @@ async def run_agent(user_message: str, bot=None, chat_id: str = None) -> str:
                 print(f"[AGENT] No tool call, breaking loop")
                 break
 
-            tool_name = response["name"]
-            tool_args = response["arguments"]
-            tools_used.append(tool_name)
-            print(f"[TOOL EXEC] Calling {tool_name} with args: {tool_args}")
-
-
-            # Execute tool
-            try:
-                tool_result = await execute_tool(tool_name, tool_args, bot=bot, chat_id=chat_id)
-                print(f"[TOOL RESULT] {tool_name}: {str(tool_result)[:200]}")
-
-            except Exception as e:
-                print(f"[TOOL ERROR] {tool_name} failed: {e}")
-                tool_result = f"Tool {tool_name} failed: {e}"
-
-            conversation_history.append({
-                "role": "assistant",
-                "content": f"I used the {tool_name} tool."
-            })
-            conversation_history.append({
-                "role": "user",
-                "content": f"Tool result for {tool_name}: {tool_result}"
-            })
-
-            messages = [{"role": "system", "content": system_msg}] + conversation_history
-
-            # Tool succeeded — get final response without tools
-            # Tool failed — retry with tools so LLM can try differently
-            tool_succeeded = not any(word in tool_result.lower() for word in ERROR_WORDS)
+            for call in response["calls"]:
+                print(f"[TOOL EXEC] Calling {call['name']} with args: {call['arguments']}")
+
+            # Execute every call from this step at once — results come back in call order
+            executed = await execute_tool_calls(response["calls"], bot=bot, chat_id=chat_id)
+            tool_names = [e["name"] for e in executed]
+            tools_used.extend(tool_names)
+
+            # all results go back to the model in one step
+            tool_turns = [
+                {"role": "assistant", "content": f"I used the {' and '.join(tool_names)} tool{'s' if len(tool_names) > 1 else ''}."},
+                {"role": "user", "content": "\n\n".join(f"Tool result for {e['name']}: {e['result']}" for e in executed)},
+            ]
+            for turn in tool_turns:
+                session.append(turn["role"], turn["content"])
+            # extend in place — no need to rebuild the prompt from history
+            messages.extend(tool_turns)
+
+            # Every tool succeeded — get final response without tools
+            # Any tool failed — retry with tools so LLM can try differently
+            tool_succeeded = not any(tool_failed(e["result"]) for e in executed)
             print(f"[TOOL] succeeded={tool_succeeded}")
             if tool_succeeded:
-                response = _safe_llm_call(messages)
+                response = await _safe_llm_call(messages, on_token=stream_to)
                 print(f"[LLM] Post-tool response: {str(response.get('content', ''))[:80]}")
                 break
             else:
-                response = _safe_llm_call(messages, tools=relevant_tools)
+                response = await _safe_llm_call(messages, tools=relevant_tools, on_token=stream_to)
 
             iterations += 1
 
@@ -127,23 +154,31 @@ async def run_agent(user_message: str, bot=None, chat_id: str = None) -> str:
 
     else:
         print(f"[AGENT] No tools needed, direct LLM call")
-        response = _safe_llm_call(messages)
+        response = await _safe_llm_call(messages, on_token=stream_to)
         final_response = response.get("content") or "I wasn't able to complete that."
 
     print(f"[AGENT] Final response: {final_response[:80]}")
     
-    conversation_history.append({"role": "assistant", "content": final_response})
+    session.append("assistant", final_response)
     store.write_daily_log("assistant", final_response)
 
     if should_extract_memory(user_message, scores):
-        check_for_memory(user_message, final_response)
+        # background job — the reply never waits on extraction
+        queue_memory_extraction(user_message, final_response)
 
-    store.write_metrics_log({
+    entry = {
         "ts": datetime.now().isoformat(),
         "msg": user_message[:60],
         "scores": scores,
+        "intent_source": intent_source,
         "tools_used": tools_used,
         "ctx_chars": len(system_msg),
-    })
+        "total_ms": round((time.perf_counter() - started) * 1000),
+        "ttft_ms": first_token_ms,
+    }
+    trace = current_trace()
+    if trace is not None:
+        entry["trace"] = trace.export()
+    store.write_metrics_log(entry)
 
     return final_response
\ No newline at end of file
@@ -0,0 +1,127 @@
+# local intent scorer over the MiniLM embeddings we already load for RAG.
+# nearest-centroid: one centroid per dominant intent, each carrying the mean
+# score profile of its examples, so the output keeps the same overlapping
+# four-key shape the LLM scorer returns.
+
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+LABELS = ["casual", "tool", "personal", "knowledge"]
+MODEL_PATH = Path(__file__).parent.parent / "memory" / "intent_model.npz"
+
+# softmax sharpness over cosine similarities; MiniLM sims sit in a narrow band
+TEMPERATURE = 20.0
+# below this best-centroid similarity the message looks like nothing we've seen
+MIN_SIMILARITY = 0.25
+
+# bootstrap set used until scripts/train_intent_classifier.py has produced MODEL_PATH
+SEED_EXAMPLES = [
+    ("how's your day going", {"casual": 0.9, "tool": 0.0, "personal": 0.1, "knowledge": 0.0}),
+    ("haha that's funny", {"casual": 1.0, "tool": 0.0, "personal": 0.0, "knowledge": 0.0}),
+    ("thanks a lot for the help", {"casual": 1.0, "tool": 0.0, "personal": 0.0, "knowledge": 0.0}),
+    ("good morning krish", {"casual": 1.0, "tool": 0.0, "personal": 0.0, "knowledge": 0.0}),
+    ("what's up with you today", {"casual": 0.9, "tool": 0.0, "personal": 0.0, "knowledge": 0.1}),
+    ("that sounds great, talk later", {"casual": 1.0, "tool": 0.0, "personal": 0.0, "knowledge": 0.0}),
+
+    ("remind me to call mom at 6pm", {"casual": 0.0, "tool": 1.0, "personal": 0.1, "knowledge": 0.0}),
+    ("create an issue in my portfolio repo about the broken link", {"casual": 0.0, "tool": 1.0, "personal": 0.0, "knowledge": 0.0}),
+    ("list my github repositories", {"casual": 0.0, "tool": 1.0, "personal": 0.0, "knowledge": 0.0}),
+    ("save this to notion: buy groceries", {"casual": 0.0, "tool": 1.0, "personal": 0.0, "knowledge": 0.0}),
+    ("send a message to the group that the meeting is moved", {"casual": 0.0, "tool": 1.0, "personal": 0.0, "knowledge": 0.0}),
+    ("what's the weather in bangalore", {"casual": 0.0, "tool": 1.0, "personal": 0.0, "knowledge": 0.1}),
+    ("who won the match last night", {"casual": 0.0, "tool": 0.9, "personal": 0.0, "knowledge": 0.3}),
+
+    ("what did i tell you about my startup", {"casual": 0.0, "tool": 0.0, "personal": 1.0, "knowledge": 0.3}),
+    ("do you remember my exam dates", {"casual": 0.0, "tool": 0.0, "personal": 1.0, "knowledge": 0.2}),
+    ("what are my goals for this month", {"casual": 0.0, "tool": 0.0, "personal": 0.9, "knowledge": 0.3}),
+    ("how is my project going based on what we discussed", {"casual": 0.0, "tool": 0.0, "personal": 0.9, "knowledge": 0.5}),
+    ("what was the name of the app i was building", {"casual": 0.0, "tool": 0.0, "personal": 1.0, "knowledge": 0.2}),
+
+    ("explain how transformers use attention", {"casual": 0.0, "tool": 0.0, "personal": 0.0, "knowledge": 1.0}),
+    ("what is the difference between a process and a thread", {"casual": 0.0, "tool": 0.0, "personal": 0.0, "knowledge": 1.0}),
+    ("how do i reverse a linked list in python", {"casual": 0.0, "tool": 0.0, "personal": 0.0, "knowledge": 1.0}),
+    ("why is the sky blue", {"casual": 0.0, "tool": 0.0, "personal": 0.0, "knowledge": 1.0}),
+    ("should i use postgres or mongodb for a chat app", {"casual": 0.0, "tool": 0.0, "personal": 0.2, "knowledge": 0.9}),
+    ("summarize the causes of the first world war", {"casual": 0.0, "tool": 0.0, "personal": 0.0, "knowledge": 1.0}),
+]
+
+
+class IntentModel:
+    def __init__(self, centroids: np.ndarray, profiles: np.ndarray):
+        self.centroids = centroids  # (k, dim), unit length
+        self.profiles = profiles    # (k, 4) mean scores in LABELS order
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray, score_dicts: list) -> "IntentModel":
+        """vectors must be L2-normalised; examples are grouped by their dominant intent."""
+        targets = np.array([[float(s.get(k, 0.0)) for k in LABELS] for s in score_dicts], dtype=np.float32)
+        dominant = targets.argmax(axis=1)
+        centroids, profiles = [], []
+        for label in range(len(LABELS)):
+            members = dominant == label
+            if not members.any():
+                continue
+            centroid = vectors[members].mean(axis=0)
+            centroids.append(centroid / (np.linalg.norm(centroid) or 1.0))
+            profiles.append(targets[members].mean(axis=0))
+        return cls(np.array(centroids, dtype=np.float32), np.array(profiles, dtype=np.float32))
+
+    def predict(self, vector: np.ndarray) -> tuple:
+        """Returns (scores, confidence). confidence is the winning centroid's softmax weight."""
+        sims = self.centroids @ vector
+        weights = np.exp((sims - sims.max()) * TEMPERATURE)
+        weights /= weights.sum()
+        blended = weights @ self.profiles
+        scores = {k: round(float(min(1.0, max(0.0, v))), 3) for k, v in zip(LABELS, blended)}
+        confidence = float(weights.max()) if sims.max() >= MIN_SIMILARITY else 0.0
+        return scores, confidence
+
+    def save(self, path: Path = MODEL_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, centroids=self.centroids, profiles=self.profiles)
+
+    @classmethod
+    def load(cls, path: Path = MODEL_PATH) -> "IntentModel":
+        data = np.load(path)
+        return cls(data["centroids"], data["profiles"])
+
+
+_lock = threading.Lock()
+_model = None
+
+
+def get_intent_model() -> IntentModel:
+    """Trained centroids if present, otherwise fitted on SEED_EXAMPLES (one batch encode)."""
+    global _model
+    if _model is None:
+        with _lock:
+            if _model is None:
+                if MODEL_PATH.exists():
+                    _model = IntentModel.load()
+                    print(f"[INTENT] Loaded trained centroids from {MODEL_PATH.name}")
+                else:
+                    from rag.vectorstore import encode
+                    texts = [text for text, _ in SEED_EXAMPLES]
+                    _model = IntentModel.fit(encode(texts, normalize=True), [s for _, s in SEED_EXAMPLES])
+                    print(f"[INTENT] No trained model, using {len(texts)} seed examples")
+    return _model
+
+
+def local_score_intent(message: str) -> tuple:
+    """
+    Scores a message in-process. Returns (scores, confidence), or (None, 0.0)
+    if the embedding model isn't available. Blocking — run via asyncio.to_thread.
+    """
+    try:
+        from rag.vectorstore import encode
+        model = get_intent_model()
+        start = time.perf_counter()
+        scores, confidence = model.predict(encode(message, normalize=True))
+        print(f"[INTENT] local scores={scores} confidence={confidence:.2f} in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return scores, confidence
+    except Exception as e:
+        print(f"[INTENT ERROR] local scoring failed: {e}")
+        return None, 0.0
@@ -1,18 +1,62 @@
-from groq import Groq
+import asyncio
+import time
+import httpx
+from groq import AsyncGroq
 import config
 import re
 import json
 from config import MODEL_MAIN, MODEL_CLASSIFIER
+from utils.tracing import span
 
-client = Groq(api_key=config.GROQ_API_KEY)
+_client = None
 
 
-def get_llm_response(messages: list, tools: list = None, force_tool: bool = False, use_classifier_model: bool = False) -> dict:
+def get_client() -> AsyncGroq:
+    """
+    Returns the shared AsyncGroq client, created on first use.
+    One httpx pool is reused by every chat so keep-alive connections to Groq
+    survive across messages instead of a fresh TLS handshake per call.
+    """
+    global _client
+    if _client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=config.LLM_MAX_CONNECTIONS,
+            ),
+            timeout=config.LLM_TIMEOUT_SECONDS,
+        )
+        _client = AsyncGroq(
+            api_key=config.GROQ_API_KEY,
+            base_url=config.GROQ_BASE_URL,
+            max_retries=config.LLM_MAX_RETRIES,
+            http_client=http_client,
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """Closes the pooled connections. Called from post_shutdown."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+async def get_llm_response(messages: list, tools: list = None, force_tool: bool = False, use_classifier_model: bool = False, timeout: float = None) -> dict:
+    """
+    Awaitable model call — never blocks the event loop.
+    timeout caps the whole call (retries included); cancelling the awaiting
+    task aborts the in-flight request.
+    """
     if tools:
         model = MODEL_MAIN
     else:
         model = MODEL_CLASSIFIER if use_classifier_model else MODEL_MAIN
 
+    if timeout is None:
+        timeout = config.LLM_TIMEOUT_SECONDS
+
     print(f"[LLM CALL] model={model}, tools={[t['function']['name'] for t in tools] if tools else None}")
 
     kwargs = {
@@ -23,46 +67,154 @@ def get_llm_response(messages: list, tools: list = None, force_tool: bool = Fals
     if tools:
         kwargs["tools"] = tools
         kwargs["tool_choice"] = "auto"
-        kwargs["parallel_tool_calls"] = False
+        kwargs["parallel_tool_calls"] = True
 
-    try:
-        response = client.chat.completions.create(**kwargs)
-        message = response.choices[0].message
+    with span("llm", model=model, tools=len(tools) if tools else 0) as s:
+        try:
+            async with asyncio.timeout(timeout):
+                response = await get_client().chat.completions.create(**kwargs)
+            _record_usage(s, response.usage)
+            message = response.choices[0].message
+
+            if message.tool_calls:
+                calls = [
+                    {"name": tool_call.function.name, "arguments": _parse_arguments(tool_call.function.arguments)}
+                    for tool_call in message.tool_calls
+                ]
+                print(f"[LLM] Tool call(s) returned: {[c['name'] for c in calls]}")
+                return {"type": "tool_call", "calls": calls}
+
+            print(f"[LLM] Text returned: {str(message.content or '')[:80]}")
 
-        if message.tool_calls:
-            tool_call = message.tool_calls[0]
-            try:
-                arguments = json.loads(tool_call.function.arguments)
-            except Exception:
-                arguments = {}
-            print(f"[LLM] Tool call returned: {tool_call.function.name}")
             return {
-                "type": "tool_call",
-                "name": tool_call.function.name,
-                "arguments": arguments
+                "type": "text",
+                "content": message.content or "",
             }
-        
-        print(f"[LLM] Text returned: {str(message.content or '')[:80]}")
-
-        return {
-            "type": "text",
-            "content": message.content or "",
-        }
-
-    except Exception as e:
-        print(f"[LLM EXCEPTION] {str(e)}")
-        error_str = str(e)
-        if "failed_generation" in error_str:
-            xml_match = re.search(r'<function=(\w+).*?(\{.*?\})', error_str, re.DOTALL)
-            if xml_match:
-                tool_name = xml_match.group(1)
-                try:
-                    arguments = json.loads(xml_match.group(2))
-                    print(f"[LLM] XML fallback recovered: {tool_name} with {arguments}")
-                    return {"type": "tool_call", "name": tool_name, "arguments": arguments}
-                except json.JSONDecodeError as je:
-                    print(f"[LLM] XML fallback JSON parse failed: {je}")
-        return {"type": "text", "content": "Something went wrong."}
+
+        except TimeoutError:
+            print(f"[LLM TIMEOUT] model={model} after {timeout}s")
+            s.set(error="TimeoutError")
+            return {"type": "text", "content": "Something went wrong."}
+        except Exception as e:
+            print(f"[LLM EXCEPTION] {str(e)}")
+            s.set(error=type(e).__name__)
+            return _recover_from_error(e)
+
+
+def _record_usage(s, usage) -> None:
+    if usage is not None:
+        s.set(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+
+
+def _parse_arguments(raw: str) -> dict:
+    try:
+        return json.loads(raw or "{}")
+    except Exception:
+        return {}
+
+
+def _recover_from_error(e: Exception) -> dict:
+    """Groq rejects some tool calls as failed_generation with the XML-style call inside; salvage it."""
+    error_str = str(e)
+    if "failed_generation" in error_str:
+        xml_match = re.search(r'<function=(\w+).*?(\{.*?\})', error_str, re.DOTALL)
+        if xml_match:
+            tool_name = xml_match.group(1)
+            try:
+                arguments = json.loads(xml_match.group(2))
+                print(f"[LLM] XML fallback recovered: {tool_name} with {arguments}")
+                return {"type": "tool_call", "calls": [{"name": tool_name, "arguments": arguments}]}
+            except json.JSONDecodeError as je:
+                print(f"[LLM] XML fallback JSON parse failed: {je}")
+    return {"type": "text", "content": "Something went wrong."}
+
+
+async def stream_llm_response(messages: list, tools: list = None, use_classifier_model: bool = False, timeout: float = None):
+    """
+    Streaming variant of get_llm_response. Async generator of events:
+      {"type": "token", "content": "<delta>"}   as text arrives
+      then exactly one final event shaped like get_llm_response's return value.
+
+    Tool calls are detected mid-stream: once a tool_call delta (or an
+    XML-style "<function=" reply) shows up, no more tokens are emitted and the
+    calls are assembled from the remaining deltas. timeout bounds the wait for
+    each chunk, not the whole generation.
+    """
+    if tools:
+        model = MODEL_MAIN
+    else:
+        model = MODEL_CLASSIFIER if use_classifier_model else MODEL_MAIN
+
+    if timeout is None:
+        timeout = config.LLM_TIMEOUT_SECONDS
+
+    print(f"[LLM STREAM] model={model}, tools={[t['function']['name'] for t in tools] if tools else None}")
+
+    kwargs = {
+        "model": model,
+        "messages": messages,
+        "max_tokens": 1024,
+        "stream": True,
+        "timeout": timeout,
+    }
+    if tools:
+        kwargs["tools"] = tools
+        kwargs["tool_choice"] = "auto"
+        kwargs["parallel_tool_calls"] = True
+
+    content = ""
+    emitted = 0  # chars of content already yielded as tokens
+    tool_calls = {}  # index -> {"name": str, "arguments": str}
+    started = time.perf_counter()
+
+    with span("llm_stream", model=model, tools=len(tools) if tools else 0) as s:
+        try:
+            stream = await get_client().chat.completions.create(**kwargs)
+            async for chunk in stream:
+                # Groq reports usage on the last chunk under x_groq
+                x_groq = getattr(chunk, "x_groq", None)
+                _record_usage(s, getattr(x_groq, "usage", None) or getattr(chunk, "usage", None))
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+
+                if delta.tool_calls:
+                    for call in delta.tool_calls:
+                        slot = tool_calls.setdefault(call.index, {"name": "", "arguments": ""})
+                        if call.function and call.function.name:
+                            slot["name"] += call.function.name
+                        if call.function and call.function.arguments:
+                            slot["arguments"] += call.function.arguments
+
+                if delta.content:
+                    content += delta.content
+                    # an XML-style tool call leaks in as text — hold text back until it can't be one
+                    stripped = content.lstrip()
+                    holding_back = stripped.startswith("<function") or "<function".startswith(stripped)
+                    if not tool_calls and not holding_back:
+                        if not emitted:
+                            s.set(ttft_ms=round((time.perf_counter() - started) * 1000, 1))
+                        yield {"type": "token", "content": content[emitted:]}
+                        emitted = len(content)
+
+        except Exception as e:
+            print(f"[LLM STREAM EXCEPTION] {str(e)}")
+            s.set(error=type(e).__name__)
+            final = _recover_from_error(e)
+        else:
+            if tool_calls:
+                calls = [
+                    {"name": tool_calls[i]["name"], "arguments": _parse_arguments(tool_calls[i]["arguments"])}
+                    for i in sorted(tool_calls)
+                ]
+                print(f"[LLM] Streamed tool call(s): {[c['name'] for c in calls]}")
+                final = {"type": "tool_call", "calls": calls}
+            else:
+                print(f"[LLM] Streamed text: {content[:80]}")
+                final = {"type": "text", "content": content}
+
+    # the span closes before the last event: callers stop iterating once they have it
+    yield final
     
 # def get_llm_response(messages:list, tools: list = None, force_tool:bool= False, use_classifier_model: bool = False) ->dict:
 #     """
@@ -0,0 +1,128 @@
+# one precompiled scan per message for every phrase/keyword list the router uses.
+# quick_triage, filter_tools and contains_durable_info all read the same result
+# instead of each doing their own `any(p in msg ...)` loops.
+
+import re
+from functools import lru_cache
+
+
+class Matches:
+    """Hits from one scan, grouped by list name."""
+
+    __slots__ = ("groups",)
+
+    def __init__(self, groups: dict):
+        self.groups = groups
+
+    def has(self, group: str) -> bool:
+        return group in self.groups
+
+    def get(self, group: str) -> set:
+        return self.groups.get(group, set())
+
+    @property
+    def hits(self) -> set:
+        return set().union(*self.groups.values()) if self.groups else set()
+
+    def __repr__(self):
+        return f"Matches({self.groups})"
+
+
+_TOKEN_RE = re.compile(r"\w+(?:['’]\w+)*")
+_END = "\0end"      # trie key: entries ending at this node
+_STEMS = "\0stems"  # trie key: {prefix_len: {prefix: entries}} for stems ending here
+
+
+class PhraseMatcher:
+    """
+    Word-level trie over every phrase and keyword, walked once per message.
+
+    phrases  — whole words/phrases ("now" won't hit "know")
+    stems    — keywords whose last word may carry any suffix ("repo" hits "repos")
+    patterns — raw regexes, run case-insensitively as one merged alternation
+
+    The message is tokenised once and the trie is walked from each token, so
+    cost depends on message length and phrase depth, not on how many phrases
+    are registered. Overlapping and nested hits are all reported.
+    """
+
+    def __init__(self, phrases: dict = None, stems: dict = None, patterns: dict = None):
+        self._root = {}
+        for is_stem, source in ((False, phrases or {}), (True, stems or {})):
+            for group, items in source.items():
+                for item in items:
+                    self._add(item, group, is_stem)
+
+        self._pattern_res = [
+            (group, re.compile("|".join(f"(?:{p})" for p in items), re.IGNORECASE))
+            for group, items in (patterns or {}).items() if items
+        ]
+
+    def _add(self, item: str, group: str, is_stem: bool) -> None:
+        tokens = _TOKEN_RE.findall(item.lower())
+        if not tokens:
+            return
+        text = " ".join(tokens)
+        node = self._root
+        path = tokens[:-1] if is_stem else tokens
+        for token in path:
+            node = node.setdefault(token, {})
+        if is_stem:
+            last = tokens[-1]
+            node = node.setdefault(_STEMS, {}).setdefault(len(last), {}).setdefault(last, {})
+        node.setdefault(_END, set()).add((text, group))
+
+    def match(self, message: str) -> Matches:
+        groups = {}
+
+        def collect(entries):
+            for hit, group in entries:
+                groups.setdefault(group, set()).add(hit)
+
+        tokens = _TOKEN_RE.findall(message.lower())
+        root = self._root
+        for start in range(len(tokens)):
+            node = root
+            for token in tokens[start:]:
+                stems = node.get(_STEMS)
+                if stems:
+                    for length, by_prefix in stems.items():
+                        entry = by_prefix.get(token[:length])
+                        if entry:
+                            collect(entry[_END])
+                node = node.get(token)
+                if node is None:
+                    break
+                if _END in node:
+                    collect(node[_END])
+
+        for group, regex in self._pattern_res:
+            found = regex.search(message)
+            if found:
+                groups.setdefault(group, set()).add(found.group(0))
+        return Matches(groups)
+
+
+_matcher = None
+
+
+def get_matcher() -> PhraseMatcher:
+    """Builds the shared matcher from the lists owned by the classifier, tools and memory modules."""
+    global _matcher
+    if _matcher is None:
+        from agent.classifier import PERSONAL_PHRASES, TOOL_EXACT_PHRASES
+        from agent.tools import TOOL_KEYWORD_PHRASES, TOOL_KEYWORD_STEMS
+        from agent.memory_ops import DURABLE_INFO_PATTERNS
+
+        _matcher = PhraseMatcher(
+            phrases={"personal": PERSONAL_PHRASES, "tool": TOOL_EXACT_PHRASES, **TOOL_KEYWORD_PHRASES},
+            stems=TOOL_KEYWORD_STEMS,
+            patterns={"durable": DURABLE_INFO_PATTERNS},
+        )
+    return _matcher
+
+
+@lru_cache(maxsize=256)
+def match_message(message: str) -> Matches:
+    """Scans a message once; later call sites for the same message hit the cache."""
+    return get_matcher().match(message)
@@ -1,8 +1,14 @@
 #Decide whether to extract memory, and if yes then extract it and write it.
 
-import re
+import asyncio
 from agent.llm import get_llm_response
+from agent.matcher import match_message
 from memory import store
+from utils.background import BatchWorker
+import config
+
+# long answers add tokens without adding facts about the user
+MAX_RESPONSE_CHARS = 1500
 
 DURABLE_INFO_PATTERNS = [
     r'\b[A-Z][a-zA-Z]*[A-Z]\w*\b',  
@@ -13,10 +19,7 @@ DURABLE_INFO_PATTERNS = [
 ]
 
 def contains_durable_info(message: str) -> bool:
-    for pattern in DURABLE_INFO_PATTERNS:
-        if re.search(pattern, message, re.IGNORECASE):
-            return True
-    return False
+    return match_message(message).has("durable")
 
 def should_extract_memory(message:str, scores: dict) -> bool:
     if scores["casual"] > 0.8:
@@ -29,8 +32,20 @@ def should_extract_memory(message:str, scores: dict) -> bool:
         return True
     return False
 
-def check_for_memory(user_message: str, assistant_response: str) -> None:
+async def check_for_memory(user_message: str, assistant_response: str) -> None:
+    """Extracts memory from a single turn, inline. The bot queues turns on memory_worker instead."""
+    await extract_memories([(user_message, assistant_response)])
+
+async def extract_memories(turns: list) -> None:
+    """
+    One extraction prompt for one or more (user_message, assistant_response)
+    turns. Every bullet in the reply is appended to MEMORY.md.
+    """
     try:
+        conversation = "\n\n".join(
+            f"User said: {user_message}\nAssistant responded: {assistant_response[:MAX_RESPONSE_CHARS]}"
+            for user_message, assistant_response in turns
+        )
         prompt = [
             {
                 "role": "system",
@@ -38,7 +53,7 @@ def check_for_memory(user_message: str, assistant_response: str) -> None:
 Worth remembering means: decisions made, preferences stated, commitments given, important personal facts.
 NOT worth remembering means: casual chat, questions, greetings, generic responses,  things already known from user profile like name or preferred name.
 
-If something is worth remembering, respond with ONLY the fact to remember in one short sentence starting with a bullet point like:
+If something is worth remembering, respond with ONLY the facts to remember, one short sentence per line, each starting with a bullet point like:
 - Hash decided to build portfolio project using Python and FastAPI
 
 If nothing is worth remembering respond with exactly:
@@ -46,16 +61,37 @@ NOTHING"""
             },
             {
                 "role": "user",
-                "content": f"User said: {user_message}\nAssistant responded: {assistant_response}"
+                "content": conversation
             }
         ]
         
-        result_dict = get_llm_response(prompt, use_classifier_model=True)
+        result_dict = await get_llm_response(prompt, use_classifier_model=True)
         result = result_dict.get("content", "NOTHING")
         
-        
-        if result.strip() != "NOTHING":
-            store.write_to_memory(result.strip())
+        bullets = [line.strip() for line in result.split("\n") if line.strip().startswith("-")]
+        if bullets:
+            # writing also embeds the new bullets — keep that off the event loop
+            await asyncio.to_thread(store.write_to_memory, "\n".join(bullets))
+        print(f"[MEMORY] {len(turns)} turn(s) -> {len(bullets)} new fact(s)")
         
     except Exception as e:
-        print(f"Memory extraction failed: {e}")
\ No newline at end of file
+        print(f"Memory extraction failed: {e}")
+
+# Turns that qualify for extraction are queued here instead of being awaited
+# before the reply. Turns arriving close together share one extraction call.
+memory_worker = BatchWorker(
+    "memory-extract",
+    extract_memories,
+    max_batch=config.MEMORY_EXTRACT_MAX_BATCH,
+    max_delay=config.MEMORY_EXTRACT_MAX_DELAY,
+)
+
+# the loop only holds weak references to tasks; keep detached ones alive until they finish
+_detached_tasks = set()
+
+def queue_memory_extraction(user_message: str, assistant_response: str) -> None:
+    """Never waits on the LLM. Without a running worker, extraction runs as a detached task."""
+    if not memory_worker.submit((user_message, assistant_response)):
+        task = asyncio.create_task(check_for_memory(user_message, assistant_response))
+        _detached_tasks.add(task)
+        task.add_done_callback(_detached_tasks.discard)
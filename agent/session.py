@@ -0,0 +1,95 @@
+# per-chat conversation state. replaces the single module-level history list
+# so chats don't see each other's turns and /clear only clears one chat.
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+
+import config
+
+
+class ChatSession:
+    """
+    Bounded history for one chat.
+    `lock` serialises turns within the chat — two messages from the same chat
+    run one after another, different chats still run concurrently.
+    """
+
+    def __init__(self, chat_id: str, max_history: int):
+        self.chat_id = chat_id
+        self.history = deque(maxlen=max_history)
+        self.lock = asyncio.Lock()
+        self.last_active = time.monotonic()
+        self.chars = 0
+
+    def append(self, role: str, content: str) -> None:
+        if len(self.history) == self.history.maxlen:
+            self.chars -= len(self.history[0]["content"])
+        self.history.append({"role": role, "content": content})
+        self.chars += len(content)
+        self.last_active = time.monotonic()
+
+    def messages(self) -> list:
+        return list(self.history)
+
+    def clear(self) -> None:
+        self.history.clear()
+        self.chars = 0
+
+
+class SessionStore:
+    """
+    chat_id -> ChatSession, least recently used first.
+    Idle sessions are evicted once there are more than max_sessions or the
+    total history size passes max_chars. The session currently being used
+    is never evicted.
+    """
+
+    def __init__(self, max_history: int, max_sessions: int, max_chars: int):
+        self.max_history = max_history
+        self.max_sessions = max_sessions
+        self.max_chars = max_chars
+        self._sessions = OrderedDict()
+        self.evictions = 0
+
+    def get(self, chat_id: str) -> ChatSession:
+        key = str(chat_id)
+        session = self._sessions.get(key)
+        if session is None:
+            session = ChatSession(key, self.max_history)
+            self._sessions[key] = session
+        else:
+            self._sessions.move_to_end(key)
+        self._evict(keep=key)
+        return session
+
+    def clear(self, chat_id: str) -> None:
+        session = self._sessions.pop(str(chat_id), None)
+        if session is not None:
+            session.clear()
+
+    def total_chars(self) -> int:
+        return sum(s.chars for s in self._sessions.values())
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict(self, keep: str) -> None:
+        total = self.total_chars()
+        for key in list(self._sessions):
+            if len(self._sessions) <= self.max_sessions and total <= self.max_chars:
+                break
+            session = self._sessions[key]
+            # skip the caller's session and any chat mid-turn
+            if key == keep or session.lock.locked():
+                continue
+            total -= session.chars
+            del self._sessions[key]
+            self.evictions += 1
+
+
+sessions = SessionStore(
+    max_history=config.MAX_HISTORY,
+    max_sessions=config.MAX_SESSIONS,
+    max_chars=config.SESSION_MAX_CHARS,
+)
@@ -0,0 +1,153 @@
+# result cache for the read-only tools (web_search, github_list_repos).
+# repeat questions inside a tool's TTL are answered from memory instead of
+# spending seconds and paid quota on the same API call. entries are kept in
+# an LRU and mirrored to a small JSON file so they survive restarts.
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+CACHE_PATH = Path(__file__).parent.parent / ".cache" / "tool_results.json"
+
+_SPACES = re.compile(r"\s+")
+_WORD = re.compile(r"\w+")
+_EDGE_PUNCTUATION = " ?!.,;:'\""
+
+
+def normalize_query(text: str) -> str:
+    """'  Weather in Delhi?? ' and 'weather in delhi' share one entry."""
+    return _SPACES.sub(" ", text.lower()).strip(_EDGE_PUNCTUATION)
+
+
+def _mentions(words: frozenset, arguments: dict) -> bool:
+    """True if any string argument contains one of `words` as a whole word."""
+    if not words or not arguments:
+        return False
+    return any(
+        isinstance(value, str) and not words.isdisjoint(_WORD.findall(value.lower()))
+        for value in arguments.values()
+    )
+
+
+def cache_key(tool_name: str, arguments: dict) -> str:
+    normalized = {
+        k: normalize_query(v) if isinstance(v, str) else v
+        for k, v in (arguments or {}).items()
+    }
+    return f"{tool_name}:{json.dumps(normalized, sort_keys=True)}"
+
+
+class ToolCache:
+    """
+    LRU of tool results with a per-tool TTL. Expiry uses wall-clock time so
+    entries loaded from disk after a restart age correctly.
+    Only tools listed in `ttls` are cached; everything else passes through.
+    `fresh_words` maps a tool to words that mark a call as time-sensitive
+    ("weather today", "btc price"): those entries live for `fresh_ttl` only.
+    `live_words` ("live score") make a call uncacheable.
+    """
+
+    def __init__(self, ttls: dict, max_entries: int = 512, path: Path = None,
+                 fresh_words: dict = None, fresh_ttl: float = 0, live_words: dict = None):
+        self.ttls = ttls
+        self.fresh_words = {tool: frozenset(words) for tool, words in (fresh_words or {}).items()}
+        self.fresh_ttl = fresh_ttl
+        self.live_words = {tool: frozenset(words) for tool, words in (live_words or {}).items()}
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+        self._entries = OrderedDict()  # key -> (tool_name, expires_at, result)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._loaded = False
+        self.hits = {}
+        self.misses = {}
+
+    def cacheable(self, tool_name: str, arguments: dict = None) -> bool:
+        return tool_name in self.ttls and not _mentions(self.live_words.get(tool_name), arguments)
+
+    def ttl(self, tool_name: str, arguments: dict) -> float:
+        if self.fresh_ttl and _mentions(self.fresh_words.get(tool_name), arguments):
+            return min(self.fresh_ttl, self.ttls[tool_name])
+        return self.ttls[tool_name]
+
+    def get(self, tool_name: str, arguments: dict):
+        """Returns the cached result, or None on a miss. Counts both."""
+        key = cache_key(tool_name, arguments)
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses[tool_name] = self.misses.get(tool_name, 0) + 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits[tool_name] = self.hits.get(tool_name, 0) + 1
+            return entry[2]
+
+    def put(self, tool_name: str, arguments: dict, result: str) -> None:
+        key = cache_key(tool_name, arguments)
+        with self._lock:
+            self._ensure_loaded()
+            self._entries[key] = (tool_name, time.time() + self.ttl(tool_name, arguments), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *tool_names) -> int:
+        """Drops every entry for the given tools. Returns how many were dropped."""
+        with self._lock:
+            self._ensure_loaded()
+            stale = [k for k, entry in self._entries.items() if entry[0] in tool_names]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                rows = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[TOOL CACHE] Ignoring unreadable cache file: {e}")
+            return
+        now = time.time()
+        for key, tool_name, expires_at, result in rows:
+            if expires_at > now and tool_name in self.ttls:
+                self._entries[key] = (tool_name, expires_at, result)
+
+    def save(self) -> None:
+        """Writes live entries to disk (temp file + rename, so a crash never leaves half a file)."""
+        if not self.path:
+            return
+        with self._lock:
+            now = time.time()
+            rows = [[key, *entry] for key, entry in self._entries.items() if entry[1] > now]
+        with self._save_lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(rows, f)
+            os.replace(tmp, self.path)
+
+    def stats(self) -> dict:
+        hits, misses = sum(self.hits.values()), sum(self.misses.values())
+        return {
+            "entries": len(self._entries),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "by_tool": {
+                name: {"hits": self.hits.get(name, 0), "misses": self.misses.get(name, 0)}
+                for name in sorted(set(self.hits) | set(self.misses))
+            },
+        }
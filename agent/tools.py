@@ -1,7 +1,11 @@
 #openai defined this type of schema
+import asyncio
 import json
 import config
-import requests
+from agent.tool_cache import ToolCache, CACHE_PATH
+from utils import http
+from utils.tracing import span
+from agent.matcher import match_message
 
 WEB_SEARCH_TOOL = {
         "type":"function",
@@ -154,29 +158,70 @@ SEND_MESSAGE_TOOL = {
 }
 
 
+ERROR_WORDS = ["failed", "error", "exception", "invalid", "unknown tool"]
+
+def tool_failed(result: str) -> bool:
+    return any(word in str(result).lower() for word in ERROR_WORDS)
+
+tool_cache = ToolCache(
+    config.TOOL_CACHE_TTLS,
+    max_entries=config.TOOL_CACHE_MAX_ENTRIES,
+    path=CACHE_PATH if config.TOOL_CACHE_PERSIST else None,
+    fresh_words=config.TOOL_CACHE_FRESH_WORDS,
+    fresh_ttl=config.TOOL_CACHE_FRESH_TTL,
+    live_words=config.TOOL_CACHE_LIVE_WORDS,
+)
+
 async def execute_tool(tool_name: str, arguments: dict,  bot=None, chat_id: str = None) -> str:
-    
-    """Execute a tool and return as a string."""
+    """
+    Execute a tool and return as a string. Read-only tools are answered from
+    tool_cache inside their TTL (shorter for time-sensitive queries); write
+    tools drop the entries they make stale.
+    """
+    with span("tool", tool=tool_name) as s:
+        if tool_cache.cacheable(tool_name, arguments):
+            cached = tool_cache.get(tool_name, arguments)
+            if cached is not None:
+                print(f"[TOOL CACHE] hit for {tool_name}")
+                s.set(cached=True, ok=True)
+                return cached
 
+        result = await _dispatch_tool(tool_name, arguments, bot=bot, chat_id=chat_id)
+        s.set(ok=not tool_failed(result))
+
+    changed = False
+    if not tool_failed(result):
+        if tool_cache.cacheable(tool_name, arguments):
+            tool_cache.put(tool_name, arguments, result)
+            changed = True
+        stale = config.TOOL_CACHE_INVALIDATES.get(tool_name)
+        if stale and tool_cache.invalidate(*stale):
+            print(f"[TOOL CACHE] {tool_name} invalidated {stale}")
+            changed = True
+    if changed and config.TOOL_CACHE_PERSIST:
+        await asyncio.to_thread(tool_cache.save)
+    return result
+
+async def _dispatch_tool(tool_name: str, arguments: dict, bot=None, chat_id: str = None) -> str:
     if tool_name == "web_search":
-        return web_search(arguments.get("query", ""))
+        return await web_search(arguments.get("query", ""))
     if tool_name == "github_list_repos":
-        return github_list_repos()
+        return await github_list_repos()
     if tool_name == "github_create_issue":
-        return github_create_issue(
+        return await github_create_issue(
             arguments.get("repo", ""),
             arguments.get("title", ""),
             arguments.get("body", ""),
         )    
     if tool_name == "notion_append":
-        return append_to_notion_page(arguments.get("content", ""))
+        return await append_to_notion_page(arguments.get("content", ""))
     if tool_name == "notion_create_page":
-        return create_notion_page(
+        return await create_notion_page(
             arguments.get("title", ""),
             arguments.get("content", "")
         )
     if tool_name == "set_reminder":
-        return set_reminder(bot, chat_id, arguments.get("reminder_text", ""))
+        return await set_reminder(bot, chat_id, arguments.get("reminder_text", ""))
     
     if tool_name == "send_telegram_message":
         return await send_telegram_message(
@@ -187,21 +232,60 @@ async def execute_tool(tool_name: str, arguments: dict,  bot=None, chat_id: str
     
     return  f"Unknown tool: {tool_name}"
 
-def web_search(query:str) ->str:
+# one semaphore per tool name, shared by every chat — writes to the same
+# Notion page or repo go one at a time, read-only lookups can overlap
+_tool_semaphores = {}
+
+def _semaphore(tool_name: str) -> asyncio.Semaphore:
+    if tool_name not in _tool_semaphores:
+        limit = config.TOOL_CONCURRENCY.get(tool_name, config.TOOL_CONCURRENCY_DEFAULT)
+        _tool_semaphores[tool_name] = asyncio.Semaphore(limit)
+    return _tool_semaphores[tool_name]
+
+async def _run_tool_call(call: dict, bot=None, chat_id: str = None) -> str:
+    tool_name = call["name"]
+    timeout = config.TOOL_TIMEOUTS.get(tool_name, config.TOOL_TIMEOUT_SECONDS)
+    try:
+        async with _semaphore(tool_name):
+            async with asyncio.timeout(timeout):
+                result = await execute_tool(tool_name, call.get("arguments") or {}, bot=bot, chat_id=chat_id)
+    except TimeoutError:
+        result = f"Tool {tool_name} failed: timed out after {timeout}s"
+    except Exception as e:
+        result = f"Tool {tool_name} failed: {e}"
+    print(f"[TOOL RESULT] {tool_name}: {str(result)[:200]}")
+    return str(result)
+
+async def execute_tool_calls(calls: list, bot=None, chat_id: str = None) -> list:
+    """
+    Runs every tool call from one model step concurrently and returns their
+    results in the same order. Each call has its own timeout and a failure in
+    one never cancels the others. Identical calls in one step run once.
+    """
+    unique = {}
+    for call in calls[:config.MAX_PARALLEL_TOOL_CALLS]:
+        key = (call["name"], json.dumps(call.get("arguments") or {}, sort_keys=True))
+        unique.setdefault(key, call)
+    results = await asyncio.gather(*(_run_tool_call(call, bot=bot, chat_id=chat_id) for call in unique.values()))
+    return [{"name": call["name"], "arguments": call.get("arguments") or {}, "result": result}
+            for call, result in zip(unique.values(), results)]
+
+async def web_search(query:str) ->str:
     """
     Perform a web search and return the results.
     """
     try:
-        from serpapi import GoogleSearch
-        import config
-
-        search = GoogleSearch({
+        # SerpAPI's JSON endpoint directly — the GoogleSearch wrapper is blocking requests underneath
+        response = await http.request("GET", config.SERPAPI_URL, params={
+            "engine": "google",
             "q": query,
             "api_key": config.SERPAPI_KEY,
             "num": 3
         })
-        
-        results = search.get_dict()
+
+        results = response.json()
+        if "error" in results:
+            return f"Search failed: {results['error']}"
 
         original_results = results.get("organic_results", [])
         if not original_results:
@@ -220,15 +304,15 @@ def web_search(query:str) ->str:
     except Exception as e:
         return f"Search failed: {str(e)}"
 
-def github_list_repos() -> str:
+async def github_list_repos() -> str:
     headers = {
     "Authorization": f"Bearer {config.GITHUB_TOKEN}",
     "Accept": "application/vnd.github+json"
     }
-    url = f"https://api.github.com/users/{config.GITHUB_USERNAME}/repos"
+    url = f"{config.GITHUB_API_URL}/users/{config.GITHUB_USERNAME}/repos"
     
     try:
-        response = requests.get(url,headers=headers)
+        response = await http.request("GET", url, headers=headers)
         repos = response.json()
 
         formatted = []
@@ -242,29 +326,29 @@ def github_list_repos() -> str:
     except Exception as e:
         return f"Failed to fetch repos: {str(e)}"
 
-def github_create_issue(repo:str, title:str, body:str) -> str:
+async def github_create_issue(repo:str, title:str, body:str) -> str:
     headers = {
     "Authorization": f"Bearer {config.GITHUB_TOKEN}",
     "Accept": "application/vnd.github+json"
     }
     
-    url = f"https://api.github.com/repos/{config.GITHUB_USERNAME}/{repo}/issues"
+    url = f"{config.GITHUB_API_URL}/repos/{config.GITHUB_USERNAME}/{repo}/issues"
     
     try:
-        response = requests.post(url, headers=headers, json = {"title": title, "body": body})
+        response = await http.request("POST", url, headers=headers, json = {"title": title, "body": body})
         
         return f"Issue created: {response.json()['html_url']}"
     except Exception as e:
         return f"Failed to create issue: {str(e)}"
    
-def append_to_notion_page(content:str)->str:
+async def append_to_notion_page(content:str)->str:
     headers = {
         "Authorization": f"Bearer {config.NOTION_TOKEN}",
         "Content-Type": "application/json",
         "Notion-Version": config.NOTION_VERSION 
     }
 
-    url = f"https://api.notion.com/v1/blocks/{config.NOTION_PAGE_ID}/children"
+    url = f"{config.NOTION_API_URL}/blocks/{config.NOTION_PAGE_ID}/children"
 
     body = {
         "children": [
@@ -282,7 +366,7 @@ def append_to_notion_page(content:str)->str:
     }
     
     try:
-        response = requests.patch(url, headers=headers, json=body)
+        response = await http.request("PATCH", url, headers=headers, json=body)
         if response.status_code == 200:
             return f"Saved to your Krish Notes page. You can find it at notion.so/{config.NOTION_PAGE_ID}"
         else:
@@ -290,14 +374,14 @@ def append_to_notion_page(content:str)->str:
     except Exception as e:
         return f"Failed to append to Notion: {str(e)}"
     
-def create_notion_page(title: str, content: str) -> str:
+async def create_notion_page(title: str, content: str) -> str:
     headers = {
         "Authorization": f"Bearer {config.NOTION_TOKEN}",
         "Content-Type": "application/json",
         "Notion-Version": config.NOTION_VERSION
     }
     
-    url = "https://api.notion.com/v1/pages"
+    url = f"{config.NOTION_API_URL}/pages"
     
     body = {
         "parent": {"page_id": config.NOTION_PAGE_ID},
@@ -324,7 +408,7 @@ def create_notion_page(title: str, content: str) -> str:
     }
     
     try:
-        response = requests.post(url, headers=headers, json=body)
+        response = await http.request("POST", url, headers=headers, json=body)
         if response.status_code == 200:
             return f"Notion page created: {response.json()['url']}"
         else:
@@ -332,26 +416,26 @@ def create_notion_page(title: str, content: str) -> str:
     except Exception as e:
         return f"Failed to create Notion page: {str(e)}"
     
-def set_reminder(bot, chat_id: str, reminder_text: str) -> str:
+async def set_reminder(bot, chat_id: str, reminder_text: str) -> str:
     """Parse natural language reminder and schedule it."""
     from scheduler.jobs import parse_reminder_datetime, add_reminder
     from datetime import datetime
     from zoneinfo import ZoneInfo
     
-    parsed = parse_reminder_datetime(reminder_text)
+    parsed = await parse_reminder_datetime(reminder_text)
     
     if not parsed or not parsed.get("datetime"):
         return "I couldn't understand the reminder time. Please be more specific like 'tomorrow at 10am'."
     
     try:
         run_date = datetime.strptime(parsed["datetime"], "%Y-%m-%d %H:%M:%S")
-        # Prevent past reminders
-        now = datetime.now()
+        # Prevent past reminders — parsed times are IST wall-clock
+        now = datetime.now(ZoneInfo("Asia/Kolkata")).replace(tzinfo=None)
         if run_date <= now:
             return "You can't set a reminder in the past."
         
         message = parsed.get("message", reminder_text)
-        result = add_reminder(bot, chat_id, message, run_date)
+        result = add_reminder(chat_id, message, run_date)
         return result
         
     except Exception as e:
@@ -380,25 +464,37 @@ TOOLS = [
     SEND_MESSAGE_TOOL,
 ]
 
+# keywords that pull a tool family into the prompt. stems match any word
+# starting with them ("repo" -> "repos"), phrases must match whole words.
+TOOL_KEYWORD_STEMS = {
+    "github": ["github", "repo", "issue"],
+    "notion": ["notion", "note", "save", "page"],
+    "reminder": ["remind", "forget"],
+    "send": ["send", "announce"],
+}
+TOOL_KEYWORD_PHRASES = {
+    "send": ["tell the group", "message to"],
+}
+
 def filter_tools(message: str, scores: dict) -> list:
-    msg = message.lower()
+    hits = match_message(message)
     tools = []
     
     if scores["tool"] > 0.4:
         tools.append(WEB_SEARCH_TOOL)
     
-    if "github" in msg or "repo" in msg or "issue" in msg:
+    if hits.has("github"):
         tools.append(GITHUB_LIST_TOOL)
         tools.append(GITHUB_CREATE_TOOL)
     
-    if "notion" in msg or "note" in msg or "save" in msg or "page" in msg:
+    if hits.has("notion"):
         tools.append(NOTION_APPEND_TOOL)
         tools.append(NOTION_CREATE_TOOL)
     
-    if "remind" in msg or "reminder" in msg or "forget" in msg:
+    if hits.has("reminder"):
         tools.append(SET_REMINDER_TOOL)
 
-    if "send" in msg or "announce" in msg or "tell the group" in msg or "message to" in msg:
+    if hits.has("send"):
         tools.append(SEND_MESSAGE_TOOL)
     
     return tools if tools else [WEB_SEARCH_TOOL]
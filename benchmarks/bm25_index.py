@@ -0,0 +1,91 @@
+"""
+BM25 index cost as the message history grows: live adds, query latency, reload.
+
+    python -m benchmarks.bm25_index --messages 20000 100000
+
+Builds the index the way the live indexer feeds it (batches of
+LIVE_INDEX_MAX_BATCH), then times searches for rare exact tokens (repo
+names, error strings, dates) and for common-word queries, and a cold reload
+from the jsonl file. No model or Chroma needed — this is the part of hybrid
+retrieval that runs before the embedding call is even considered.
+"""
+
+import argparse
+import random
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.harness import percentile
+from rag.sparse import MessageIndex
+
+WORDS = (
+    "meeting project deploy review weather lunch gym call build release notes plan idea book movie "
+    "travel flight hotel budget invoice design bug fix test python api database cache latency model "
+    "prompt agent reminder notion github search news score price market weekend morning evening"
+).split()
+RARE = ["Krish-personal-ai-agent", "ModuleNotFoundError", "2026-03-14", "v1.2.3", "ECONNRESET", "INV-20417"]
+
+
+def _messages(n: int, rng: random.Random) -> list:
+    messages = []
+    for i in range(n):
+        words = rng.choices(WORDS, k=rng.randint(5, 30))
+        if i % 500 == 0:
+            words.insert(rng.randint(0, len(words)), rng.choice(RARE))
+        messages.append({
+            "date": f"2026-03-{i % 28 + 1:02d}", "timestamp": f"{i % 24:02d}:00:00",
+            "role": "user" if i % 2 else "assistant", "content": " ".join(words), "id": f"m{i}",
+        })
+    return messages
+
+
+def _rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(args):
+    rng = random.Random(0)
+    print(f"{'messages':>8} {'add_us/msg':>10} {'rare_p50_ms':>11} {'rare_p99_ms':>11} "
+          f"{'common_p50_ms':>13} {'common_p99_ms':>13} {'reload_s':>8} {'terms':>6} {'rss_mb':>7}")
+    for n in args.messages:
+        messages = _messages(n, rng)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "bm25.jsonl"
+            index = MessageIndex(path)
+            start = time.perf_counter()
+            for i in range(0, n, args.batch):
+                index.add(messages[i:i + args.batch])
+            add_s = time.perf_counter() - start
+
+            timings = {}
+            for kind, queries in (
+                ("rare", [f"what was that {token} thing" for token in RARE]),
+                ("common", [" ".join(rng.choices(WORDS, k=4)) for _ in range(20)]),
+            ):
+                latencies = []
+                for _ in range(args.repeat):
+                    for query in queries:
+                        start = time.perf_counter()
+                        index.search(query, 20)
+                        latencies.append(time.perf_counter() - start)
+                timings[kind] = latencies
+
+            start = time.perf_counter()
+            reloaded = MessageIndex(path)
+            reloaded.load()
+            reload_s = time.perf_counter() - start
+
+            print(f"{n:>8} {add_s / n * 1e6:>10.1f} "
+                  f"{percentile(timings['rare'], 50) * 1000:>11.2f} {percentile(timings['rare'], 99) * 1000:>11.2f} "
+                  f"{percentile(timings['common'], 50) * 1000:>13.2f} {percentile(timings['common'], 99) * 1000:>13.2f} "
+                  f"{reload_s:>8.2f} {len(index.bm25._postings):>6} {_rss_mb():>7.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--batch", type=int, default=64, help="messages per add(), like the live indexer")
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
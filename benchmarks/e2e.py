@@ -0,0 +1,379 @@
+"""
+End-to-end throughput and latency of handle_message, with every external service stubbed.
+
+    python -m benchmarks.e2e --chats 1 8 32 --messages 10
+    python -m benchmarks.e2e --llm-latency 0.6 --llm-failure-rate 0.05 --tool-failure-rate 0.1 --telegram-failure-rate 0.02
+
+Drives bot.handlers.handle_message the way python-telegram-bot would, for N
+concurrent chats each sending --messages messages from a replayable corpus
+(benchmarks/e2e_corpus.jsonl by default: casual, tool, knowledge and
+personal traffic). Stand-ins:
+
+  Groq      local HTTP stub: intent scores, tool calls and (streamed) answers
+            picked from the corpus entry, with per-token delay
+  tools     local HTTP stub for SerpAPI, GitHub and Notion
+  Telegram  in-process Update/Message/Bot objects with their own latency
+
+Each backend takes its own latency and failure rate (503s for HTTP stubs,
+TimedOut for Telegram). The stubs run on their own threads, so the loop lag
+reported is the bot's own. Logs, metrics, MEMORY.md, Chroma, the memory
+index and the embedding cache are pointed at a temp directory and the tool
+cache stays in memory; the bot's real data is never touched. The
+per-stage breakdown comes from the traces written to the temp metrics.jsonl
+(see scripts/analyze_metrics.py).
+
+Same --seed and corpus give the same message sequence per chat.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import resource
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.harness import LoopLagMonitor, StubServer, chat_completion_body, set_dummy_env, summarize
+from benchmarks.tools_load import ROUTES as TOOL_ROUTES
+
+CORPUS_PATH = Path(__file__).parent / "e2e_corpus.jsonl"
+
+# what the stub classifier answers for each corpus category
+CATEGORY_SCORES = {
+    "casual": {"casual": 0.9, "tool": 0.0, "personal": 0.0, "knowledge": 0.1},
+    "tool": {"casual": 0.0, "tool": 0.9, "personal": 0.0, "knowledge": 0.2},
+    "knowledge": {"casual": 0.0, "tool": 0.1, "personal": 0.1, "knowledge": 0.9},
+    "personal": {"casual": 0.0, "tool": 0.0, "personal": 0.8, "knowledge": 0.4},
+}
+FILLER = ("Here is what I found and what I would suggest doing next based on that. " * 8).split()
+
+
+def load_corpus(path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class StubGroq:
+    """Routes for the Groq stub. Answers are looked up by the user message text."""
+
+    def __init__(self, corpus: list, reply_words: int, token_delay: float):
+        self.by_text = {entry["text"]: entry for entry in corpus}
+        self.reply_words = reply_words
+        self.token_delay = token_delay
+        self.calls = {"classify": 0, "memory": 0, "tool_call": 0, "answer": 0}
+
+    def routes(self) -> dict:
+        return {("POST", "/chat/completions"): self.completions}
+
+    async def completions(self, request):
+        body = request.json()
+        messages = body["messages"]
+        system = messages[0]["content"] if messages and messages[0]["role"] == "system" else ""
+
+        if system.startswith("You are an intent scorer"):
+            self.calls["classify"] += 1
+            text = messages[-1]["content"].split("\n", 1)[-1]
+            entry = self.by_text.get(text, {"category": "knowledge"})
+            return 200, chat_completion_body(json.dumps(CATEGORY_SCORES[entry["category"]]), model=body["model"])
+        if system.startswith("You are a memory extraction assistant"):
+            self.calls["memory"] += 1
+            return 200, chat_completion_body("NOTHING", model=body["model"])
+
+        entry = self._entry(messages)
+        after_tools = messages[-1]["role"] == "user" and messages[-1]["content"].startswith("Tool result for")
+        if body.get("tools") and entry and entry.get("tools") and not after_tools:
+            self.calls["tool_call"] += 1
+            tool_calls = [
+                {"id": f"call_{i}", "type": "function",
+                 "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])}}
+                for i, call in enumerate(entry["tools"])
+            ]
+            if body.get("stream"):
+                return 200, self._stream(body["model"], tool_calls=tool_calls)
+            return 200, chat_completion_body(model=body["model"], tool_calls=tool_calls)
+
+        self.calls["answer"] += 1
+        words = FILLER[:self.reply_words]
+        if body.get("stream"):
+            return 200, self._stream(body["model"], words=words)
+        return 200, chat_completion_body(" ".join(words), model=body["model"])
+
+    def _entry(self, messages: list):
+        for message in reversed(messages):
+            if message["role"] == "user" and message["content"] in self.by_text:
+                return self.by_text[message["content"]]
+        return None
+
+    async def _stream(self, model: str, words: list = (), tool_calls: list = None):
+        def event(delta: dict, finish: str = None, **extra) -> bytes:
+            chunk = {
+                "id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}], **extra,
+            }
+            return f"data: {json.dumps(chunk)}\n\n".encode()
+
+        if tool_calls:
+            yield event({"role": "assistant", "tool_calls": [{"index": i, **c} for i, c in enumerate(tool_calls)]})
+        for i, word in enumerate(words):
+            if i and self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield event({"content": word if i == 0 else " " + word})
+        usage = {"prompt_tokens": 500, "completion_tokens": len(words) or 20, "total_tokens": 500 + (len(words) or 20)}
+        yield event({}, "tool_calls" if tool_calls else "stop", x_groq={"id": "req-stub", "usage": usage})
+        yield b"data: [DONE]\n\n"
+
+
+class StubTelegram:
+    """Shared latency / failure injection and call counts for the fake Telegram objects."""
+
+    def __init__(self, latency: float, failure_rate: float, seed: int):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = {"sendMessage": 0, "editMessageText": 0, "failed": 0}
+        self._random = random.Random(seed)
+
+    async def call(self, method: str) -> None:
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            from telegram.error import TimedOut
+            self.calls["failed"] += 1
+            raise TimedOut("injected failure")
+
+
+class StubChat:
+    def __init__(self, chat_id: int, type: str = "private"):
+        self.id = chat_id
+        self.type = type
+
+
+class StubMessage:
+    """Just enough of telegram.Message for handle_message and StreamingReply."""
+
+    def __init__(self, telegram: StubTelegram, chat: StubChat, text: str, inbound: "StubMessage" = None):
+        self.telegram = telegram
+        self.chat = chat
+        self.chat_id = chat.id
+        self.text = text
+        self.inbound = inbound or self
+        self.received_at = time.perf_counter()
+        self.first_visible_at = None  # first reply text the user could read (inbound messages only)
+
+    def _shown(self, text: str) -> None:
+        from bot.streaming import PLACEHOLDER
+        if text != PLACEHOLDER and self.inbound.first_visible_at is None:
+            self.inbound.first_visible_at = time.perf_counter()
+
+    async def reply_text(self, text: str, **kwargs) -> "StubMessage":
+        await self.telegram.call("sendMessage")
+        self._shown(text)
+        return StubMessage(self.telegram, self.chat, text, inbound=self.inbound)
+
+    async def edit_text(self, text: str, **kwargs) -> "StubMessage":
+        await self.telegram.call("editMessageText")
+        self.text = text
+        self._shown(text)
+        return self
+
+
+class StubBot:
+    def __init__(self, telegram: StubTelegram):
+        self.telegram = telegram
+
+    async def send_message(self, chat_id, text: str, **kwargs) -> None:
+        await self.telegram.call("sendMessage")
+
+
+class StubUpdate:
+    def __init__(self, message: StubMessage):
+        self.message = message
+
+
+class StubContext:
+    def __init__(self, bot: StubBot):
+        self.bot = bot
+
+
+def _isolate(tmp: Path) -> None:
+    """Points every file the bot writes at tmp, after config is importable."""
+    from memory import store
+    from rag import vectorstore
+    from rag.memory_index import memory_index
+
+    root = Path(store.ROOT_DIR)
+    for name in ("SOUL.md", "USER.md", "MEMORY.md"):
+        if (root / name).exists():
+            shutil.copy(root / name, tmp / name)
+    (tmp / "logs").mkdir()
+    store.ROOT_DIR = tmp
+    store.LOGS_DIR = tmp / "logs"
+    store.METRICS_FILE = store.LOGS_DIR / "metrics.jsonl"
+    vectorstore.CHROMA_DIR = tmp / ".chroma"
+    # embeddings start cold every run, so RAG and memory writes pay the full model cost
+    vectorstore.EMBEDDING_CACHE_DIR = tmp / ".cache" / "embeddings"
+    memory_index.directory = tmp / ".cache" / "memory_index"
+
+
+async def _run_chats(handle_message, corpus: list, telegram: StubTelegram, chats: int, args, run: int) -> tuple:
+    latencies, visible, by_category, errors = [], [], {}, 0
+    bot = StubBot(telegram)
+
+    async def chat(i):
+        nonlocal errors
+        rng = random.Random(f"{args.seed}-{i}")
+        chat = StubChat(1_000_000 * run + i)
+        for _ in range(args.messages):
+            entry = rng.choice(corpus)
+            message = StubMessage(telegram, chat, entry["text"])
+            try:
+                await handle_message(StubUpdate(message), StubContext(bot))
+            except Exception as e:
+                errors += 1
+                print(f"[E2E] chat {i}: {type(e).__name__}: {e}")
+                continue
+            elapsed = time.perf_counter() - message.received_at
+            latencies.append(elapsed)
+            by_category.setdefault(entry["category"], []).append(elapsed)
+            if message.first_visible_at is not None:
+                visible.append(message.first_visible_at - message.received_at)
+            if args.think:
+                await asyncio.sleep(rng.uniform(0, args.think))
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(chat(i) for i in range(chats)))
+    wall = time.perf_counter() - start
+    lag = await monitor.stop()
+    return wall, latencies, visible, by_category, errors, lag
+
+
+async def main(args):
+    corpus = load_corpus(args.corpus)
+    groq = StubGroq(corpus, args.reply_words, args.token_delay)
+    llm_server = StubServer(
+        groq.routes(), latency=args.llm_latency, jitter=args.jitter, failure_rate=args.llm_failure_rate, seed=args.seed,
+    ).start_in_thread()
+    tool_server = StubServer(
+        TOOL_ROUTES, latency=args.tool_latency, jitter=args.jitter, failure_rate=args.tool_failure_rate, seed=args.seed,
+    ).start_in_thread()
+    set_dummy_env(
+        GROQ_BASE_URL=llm_server.url,
+        SERPAPI_URL=f"{tool_server.url}/search.json",
+        GITHUB_API_URL=tool_server.url,
+        NOTION_API_URL=tool_server.url,
+    )
+
+    import config
+    config.STREAM_REPLIES = not args.no_stream
+    config.TOOL_CACHE_PERSIST = False
+    config.TRACING_ENABLED = True
+
+    tmp = Path(tempfile.mkdtemp(prefix="krish-e2e-"))
+    try:
+        _isolate(tmp)
+        await _bench(args, corpus, groq, llm_server, tool_server)
+    finally:
+        # a failed setup or run must not leave stub threads, open clients or the temp dir behind
+        await _shutdown(llm_server, tool_server)
+        if args.keep:
+            print(f"logs and metrics kept in {tmp}")
+        else:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+async def _bench(args, corpus: list, groq: StubGroq, llm_server: StubServer, tool_server: StubServer) -> None:
+    from agent import tools
+    from agent.memory_ops import memory_worker
+    from bot.handlers import handle_message
+    from memory import store
+    from scripts.analyze_metrics import scan
+    if not args.cache:
+        tools.tool_cache.ttls = {}
+
+    telegram = StubTelegram(args.telegram_latency, args.telegram_failure_rate, args.seed)
+    memory_worker.start()
+
+    if args.warmup:
+        # first-use costs (tokenizer, MiniLM, Chroma) stay out of the numbers
+        seen = {}
+        for entry in corpus:
+            seen.setdefault(entry["category"], entry)
+        warm = StubTelegram(0.0, 0.0, args.seed)
+        for i, entry in enumerate(seen.values()):
+            message = StubMessage(warm, StubChat(-1 - i), entry["text"])
+            await handle_message(StubUpdate(message), StubContext(StubBot(warm)))
+    rss_start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"corpus: {len(corpus)} messages from {args.corpus}, {args.messages} per chat, "
+          f"stream={'off' if args.no_stream else 'on'}")
+    print(f"latency: llm={args.llm_latency * 1000:.0f}ms (+{args.token_delay * 1000:.0f}ms/token) "
+          f"tools={args.tool_latency * 1000:.0f}ms telegram={args.telegram_latency * 1000:.0f}ms; "
+          f"failures: llm={args.llm_failure_rate:.0%} tools={args.tool_failure_rate:.0%} "
+          f"telegram={args.telegram_failure_rate:.0%}")
+    print(f"{'chats':>5} {'msgs':>5} {'wall_s':>7} {'msg/s':>7} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} "
+          f"{'visible_p50':>11} {'errors':>6} {'rss_mb':>7} {'lag_p99_ms':>10} {'lag_max_ms':>10}")
+    for run, chats in enumerate(args.chats, 1):
+        wall, latencies, visible, by_category, errors, lag = await _run_chats(
+            handle_message, corpus, telegram, chats, args, run,
+        )
+        stats = summarize(latencies)
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{chats:>5} {stats['n']:>5} {wall:>7.2f} {stats['n'] / wall:>7.1f} {stats['p50_ms']:>8} "
+              f"{stats['p95_ms']:>8} {stats['p99_ms']:>8} {summarize(visible)['p50_ms']:>11} {errors:>6} "
+              f"{rss:>7.0f} {lag['lag_p99_ms']:>10} {lag['lag_max_ms']:>10}")
+        if args.verbose:
+            for category, values in sorted(by_category.items()):
+                s = summarize(values)
+                print(f"      {category:<10} n={s['n']:<4} p50={s['p50_ms']}ms p95={s['p95_ms']}ms")
+
+    await memory_worker.stop()
+    store.flush_logs()
+    stages = scan(store.METRICS_FILE).summary()["stages"]
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\nper stage over all runs (from traces), peak RSS {rss_peak:.0f} MB ({rss_start:.0f} MB after warm-up)")
+    for name, s in stages.items():
+        print(f"  {name:<14} n={s['count']:<6} p50={s['p50']}ms p95={s['p95']}ms p99={s['p99']}ms")
+    print(f"llm stub: {groq.calls}, {llm_server.requests_served} requests; "
+          f"tool stub: {tool_server.requests_served} requests; telegram: {telegram.calls}")
+
+
+async def _shutdown(llm_server: StubServer, tool_server: StubServer) -> None:
+    from agent import llm
+    from agent.memory_ops import memory_worker
+    from memory import store
+    from utils import http
+    try:
+        await memory_worker.stop()
+        await llm.close_client()
+        await http.close_client()
+        store.close_logs()
+    finally:
+        llm_server.stop_thread()
+        tool_server.stop_thread()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chats", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--messages", type=int, default=10, help="messages per chat, sent one after another")
+    parser.add_argument("--think", type=float, default=0.0, help="max random pause between a chat's messages (s)")
+    parser.add_argument("--corpus", default=str(CORPUS_PATH), help="jsonl of {category, text, tools?}")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Groq stub delay before the first byte (s)")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="delay between streamed words (s)")
+    parser.add_argument("--reply-words", type=int, default=60)
+    parser.add_argument("--tool-latency", type=float, default=0.3)
+    parser.add_argument("--telegram-latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.05, help="uniform extra delay on the HTTP stubs (s)")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0, help="fraction of Groq requests answered with 503")
+    parser.add_argument("--tool-failure-rate", type=float, default=0.0)
+    parser.add_argument("--telegram-failure-rate", type=float, default=0.0, help="fraction of Telegram calls raising TimedOut")
+    parser.add_argument("--no-stream", action="store_true", help="reply in one message instead of streaming edits")
+    parser.add_argument("--cache", action="store_true", help="keep the tool result cache on (in memory only)")
+    parser.add_argument("--no-warmup", dest="warmup", action="store_false")
+    parser.add_argument("--keep", action="store_true", help="keep the temp logs/metrics directory")
+    parser.add_argument("--verbose", action="store_true", help="latency per corpus category")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,239 @@
+# shared pieces for the offline benchmarks: a tiny asyncio HTTP stub server,
+# an event-loop lag probe and percentile helpers. stdlib only, so the stubs
+# start instantly and never touch the network.
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+
+
+def set_dummy_env(**overrides) -> None:
+    """
+    config.py refuses to import without real tokens — benchmarks run offline,
+    so fill in placeholders before anything imports config.
+    """
+    defaults = {
+        "TELEGRAM_BOT_TOKEN": "bench-telegram-token",
+        "GROQ_API_KEY": "bench-groq-key",
+        "SERPAPI_KEY": "bench-serpapi-key",
+        "GITHUB_TOKEN": "bench-github-token",
+        "NOTION_TOKEN": "bench-notion-token",
+        "NOTION_PAGE_ID": "bench-page",
+        "TELEGRAM_CHAT_ID": "1",
+        "TELEGRAM_GROUP_ID": "2",
+    }
+    defaults.update(overrides)
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def summarize(latencies: list) -> dict:
+    return {
+        "n": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1) if latencies else 0.0,
+    }
+
+
+class LoopLagMonitor:
+    """
+    Schedules a tick every `interval` seconds and records how late it fires.
+    A blocking call anywhere on the loop shows up directly as lag.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lags = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - expected))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> dict:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        return {
+            "lag_p99_ms": round(percentile(self.lags, 99) * 1000, 1),
+            "lag_max_ms": round(max(self.lags) * 1000, 1) if self.lags else 0.0,
+        }
+
+
+class StubRequest:
+    def __init__(self, method: str, path: str, headers: dict, body: bytes):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body or b"{}")
+
+
+class StubServer:
+    """
+    Minimal HTTP/1.1 server with keep-alive.
+
+    routes maps (METHOD, path_suffix) -> async handler(request) returning
+    (status, body) where body is a dict (sent as JSON), bytes, or an async
+    iterator of bytes (sent chunked, for streaming endpoints).
+    latency / jitter / failure_rate apply to every request.
+    """
+
+    def __init__(self, routes: dict, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0, seed: int = 0):
+        self.routes = routes
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.requests_served = 0
+        self._random = random.Random(seed)
+        self._server = None
+        self._loop = None
+        self._writers = set()
+        self.port = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self) -> "StubServer":
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            # wait_closed() waits for every connection; a client that never closed its
+            # keep-alive socket would otherwise hang the benchmark here
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+
+    def start_in_thread(self) -> "StubServer":
+        """
+        Runs the server on its own loop in a daemon thread. Needed whenever the
+        code under test may block its own event loop (e.g. a sync client baseline).
+        """
+        ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start())
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, name="stub-server", daemon=True).start()
+        ready.wait()
+        return self
+
+    def stop_thread(self):
+        loop = self._loop
+        asyncio.run_coroutine_threadsafe(self.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+    def _find_route(self, method: str, path: str):
+        path = path.split("?", 1)[0]
+        for (route_method, suffix), handler in self.routes.items():
+            if route_method == method and path.endswith(suffix):
+                return handler
+        return None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, value = line.decode("latin-1").split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b""
+
+                self.requests_served += 1
+                delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+                if delay:
+                    await asyncio.sleep(delay)
+
+                handler = self._find_route(method, path)
+                if handler is None:
+                    status, payload = 404, {"error": f"no stub for {method} {path}"}
+                elif self.failure_rate and self._random.random() < self.failure_rate:
+                    status, payload = 503, {"error": "injected failure"}
+                else:
+                    status, payload = await handler(StubRequest(method, path, headers, body))
+
+                await self._write_response(writer, status, payload)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionResetError, asyncio.IncompleteReadError, BrokenPipeError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _write_response(self, writer: asyncio.StreamWriter, status: int, payload):
+        if hasattr(payload, "__aiter__"):
+            writer.write(
+                f"HTTP/1.1 {status} OK\r\nContent-Type: text/event-stream\r\n"
+                f"Transfer-Encoding: chunked\r\nConnection: keep-alive\r\n\r\n".encode()
+            )
+            async for chunk in payload:
+                writer.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                await writer.drain()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+            return
+
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+
+
+def chat_completion_body(content: str = "ok", model: str = "stub", tool_calls: list = None) -> dict:
+    """OpenAI-compatible /chat/completions response, as the Groq SDK expects it."""
+    message = {"role": "assistant", "content": None if tool_calls else content}
+    if tool_calls:
+        message["tool_calls"] = tool_calls
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_calls else "stop"}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    }
@@ -0,0 +1,87 @@
+"""
+LLM client latency under concurrent chats, against a local stub Groq server.
+
+    python -m benchmarks.llm_latency --latency 0.2 --chats 1 8 32 64
+
+Each simulated chat makes --calls sequential model calls (classifier + main
+answer is the common shape). With the async client, wall time should stay
+close to calls * latency regardless of how many chats run at once; the
+--sync-baseline run shows the old blocking client serialising them.
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.harness import (
+    LoopLagMonitor, StubServer, chat_completion_body, set_dummy_env, summarize,
+)
+
+
+async def _completions(request):
+    return 200, chat_completion_body("stub answer")
+
+
+async def _run_chats(call, chats: int, calls: int) -> tuple:
+    latencies = []
+
+    async def chat():
+        for _ in range(calls):
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(chat() for _ in range(chats)))
+    wall = time.perf_counter() - start
+    lag = await monitor.stop()
+    return wall, latencies, lag
+
+
+async def main(args):
+    # own thread: the sync baseline blocks this loop, and the stub must keep answering
+    server = StubServer({("POST", "/chat/completions"): _completions}, latency=args.latency).start_in_thread()
+    set_dummy_env(GROQ_BASE_URL=server.url)
+
+    import config
+    from agent import llm
+    messages = [{"role": "user", "content": "hello"}]
+
+    async def async_call():
+        await llm.get_llm_response(messages)
+
+    sync_client = None
+    if args.sync_baseline:
+        from groq import Groq
+        sync_client = Groq(api_key=config.GROQ_API_KEY, base_url=server.url)
+
+    async def sync_call():
+        # what the bot did before: a blocking call straight on the event loop
+        sync_client.chat.completions.create(model=config.MODEL_MAIN, messages=messages, max_tokens=16)
+
+    print(f"stub latency={args.latency * 1000:.0f}ms, {args.calls} calls per chat")
+    print(f"{'client':<7} {'chats':>5} {'wall_s':>7} {'msg/s':>7} {'p50_ms':>7} {'p95_ms':>7} {'lag_max_ms':>10}")
+    for chats in args.chats:
+        runs = [("async", async_call)]
+        if sync_client:
+            runs.append(("sync", sync_call))
+        for name, call in runs:
+            wall, latencies, lag = await _run_chats(call, chats, args.calls)
+            stats = summarize(latencies)
+            print(f"{name:<7} {chats:>5} {wall:>7.2f} {chats / wall:>7.1f} {stats['p50_ms']:>7} {stats['p95_ms']:>7} {lag['lag_max_ms']:>10}")
+
+    await llm.close_client()
+    if sync_client:
+        sync_client.close()
+    server.stop_thread()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="stub response delay in seconds")
+    parser.add_argument("--chats", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--calls", type=int, default=2)
+    parser.add_argument("--sync-baseline", action="store_true", help="also run the blocking Groq client for comparison")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,94 @@
+"""
+Cost per message of phrase routing as the phrase lists grow.
+
+    python -m benchmarks.matcher_bench --sizes 30 100 300 1000
+
+"naive" is the old approach: one `any(p in msg for p in list)` pass per list,
+repeated by quick_triage, filter_tools and contains_durable_info.
+"compiled" is agent.matcher.PhraseMatcher: one walk of a word trie over the
+message's tokens, plus the durable-info regexes from agent.memory_ops.
+"""
+
+import argparse
+import random
+import re
+import time
+
+from agent.matcher import PhraseMatcher
+from benchmarks.harness import set_dummy_env
+
+WORDS = (
+    "what did we talk about remember my project weather news price score search "
+    "notion page github repo issue remind tomorrow meeting group send deadline "
+    "startup goal plan stack python train model deploy server error budget trip"
+).split()
+
+MESSAGES = [
+    "hey can you remind me tomorrow about the meeting with the design team",
+    "what did we discuss last week about my startup idea and the pricing plan",
+    "search for the latest news about the cricket world cup final score",
+    "list my github repos and create an issue for the broken deploy script",
+    "explain the difference between threads and processes in python with an example",
+    "save this to my notion page: call the bank before friday and pay rent",
+    "ok cool thanks",
+    "i prefer short answers, and my goal is to ship the MVP by the end of the month",
+]
+
+
+def make_phrases(n: int, rng: random.Random) -> list:
+    phrases = set()
+    while len(phrases) < n:
+        phrases.add(" ".join(rng.sample(WORDS, rng.randint(1, 3))))
+    return sorted(phrases)
+
+
+def naive(message: str, lists: dict, durable: list) -> dict:
+    msg = message.lower()
+    hits = {name: any(p in msg for p in phrases) for name, phrases in lists.items()}
+    hits["durable"] = any(re.search(p, message, re.IGNORECASE) for p in durable)
+    return hits
+
+
+def bench(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in MESSAGES:
+            fn(message)
+    return (time.perf_counter() - start) / (rounds * len(MESSAGES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="phrase matcher micro-benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[30, 100, 300, 1000])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    set_dummy_env()
+    # the patterns that actually ship, not a copy that can drift
+    from agent.memory_ops import DURABLE_INFO_PATTERNS as durable
+
+    rng = random.Random(0)
+    print(f"{'phrases':>8} {'naive_us':>9} {'compiled_us':>12} {'build_ms':>9} {'speedup':>8}")
+    for size in args.sizes:
+        # split across the same kind of lists the router uses
+        lists = {
+            "personal": make_phrases(size // 3, rng),
+            "tool": make_phrases(size // 3, rng),
+            "keywords": make_phrases(size - 2 * (size // 3), rng),
+        }
+        start = time.perf_counter()
+        matcher = PhraseMatcher(
+            phrases={"personal": lists["personal"], "tool": lists["tool"]},
+            stems={"keywords": lists["keywords"]},
+            patterns={"durable": durable},
+        )
+        build = time.perf_counter() - start
+
+        # the old code ran the scans from three call sites per message
+        naive_cost = bench(lambda m: naive(m, lists, durable), args.rounds) * 3
+        compiled_cost = bench(matcher.match, args.rounds)
+        print(f"{size:>8} {naive_cost * 1e6:>9.1f} {compiled_cost * 1e6:>12.1f} {build * 1000:>9.1f} {naive_cost / compiled_cost:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
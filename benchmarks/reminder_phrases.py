@@ -0,0 +1,170 @@
+"""
+Coverage, accuracy and latency of the local reminder time parser.
+
+    python -m benchmarks.reminder_phrases [--verbose]
+
+Runs a corpus of reminder phrasings through scheduler.time_parser.parse_local
+with the clock pinned to Tuesday 2026-03-10 14:00 IST, plus a smaller one at
+Sunday 2026-10-18 21:30 IST where bare hours roll over. Each phrase lists the
+datetime a person would mean, or None where the phrase should be left to the
+LLM (recurring, vague, or spelled-out times). Reports how much of the corpus
+is handled locally, how much of that is right, wrong answers (the number that
+must stay at zero) and per-call latency.
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+from benchmarks.harness import percentile
+from scheduler.time_parser import IST, parse_local
+
+NOW = datetime(2026, 3, 10, 14, 0, 0, tzinfo=IST)
+
+# (phrase, expected "YYYY-MM-DD HH:MM:SS" or None for "needs the LLM", expected message or None to skip)
+CORPUS = [
+    # relative
+    ("in 10 minutes to check the oven", "2026-03-10 14:10:00", "check the oven"),
+    ("remind me in 5 mins to call mom", "2026-03-10 14:05:00", "call mom"),
+    ("in an hour stretch", "2026-03-10 15:00:00", "stretch"),
+    ("in half an hour to take the clothes out", "2026-03-10 14:30:00", "take the clothes out"),
+    ("in 2 hours to leave for the airport", "2026-03-10 16:00:00", "leave for the airport"),
+    ("in 1h30m join the standup", "2026-03-10 15:30:00", "join the standup"),
+    ("in 1 hour and 15 minutes check deploy", "2026-03-10 15:15:00", "check deploy"),
+    ("in an hour and a half pick up the parcel", "2026-03-10 15:30:00", "pick up the parcel"),
+    ("after 20 minutes drink water", "2026-03-10 14:20:00", "drink water"),
+    ("drink water in 45 minutes", "2026-03-10 14:45:00", "drink water"),
+    ("30 minutes from now check the build", "2026-03-10 14:30:00", "check the build"),
+    ("in a minute test reminder", "2026-03-10 14:01:00", "test reminder"),
+    ("in 3 days renew the domain", "2026-03-13 14:00:00", "renew the domain"),
+    ("in a week follow up with the recruiter", "2026-03-17 14:00:00", "follow up with the recruiter"),
+    ("in two hours submit the form", "2026-03-10 16:00:00", "submit the form"),
+    ("in a couple of minutes check the rice", "2026-03-10 14:02:00", "check the rice"),
+    ("remind me to call Rahul in 15 min", "2026-03-10 14:15:00", "call Rahul"),
+    ("in 90 seconds turn off the stove", "2026-03-10 14:01:30", "turn off the stove"),
+    # time today
+    ("at 7pm call mom", "2026-03-10 19:00:00", "call mom"),
+    ("call mom at 7 pm", "2026-03-10 19:00:00", "call mom"),
+    ("at 7:30pm gym", "2026-03-10 19:30:00", "gym"),
+    ("meeting at 4:45 p.m.", "2026-03-10 16:45:00", "meeting"),
+    ("at 19:30 dinner with Priya", "2026-03-10 19:30:00", "dinner with Priya"),
+    ("standup at 10am", "2026-03-11 10:00:00", "standup"),
+    ("at 5 check the oven", "2026-03-10 17:00:00", "check the oven"),
+    ("at 3 call the bank", "2026-03-10 15:00:00", "call the bank"),
+    ("at 9 take medicine", "2026-03-10 21:00:00", "take medicine"),
+    ("at 1 check the backup job", "2026-03-11 01:00:00", "check the backup job"),  # 1am and 1pm have both passed today
+    ("today at 6pm pay rent", "2026-03-10 18:00:00", "pay rent"),
+    ("at noon lunch with the team", "2026-03-11 12:00:00", "lunch with the team"),
+    ("at midnight submit the assignment", "2026-03-11 00:00:00", "submit the assignment"),
+    ("this evening water the plants", "2026-03-10 18:00:00", "water the plants"),
+    ("tonight at 10 read a chapter", "2026-03-10 22:00:00", "read a chapter"),
+    ("tonight check the invoice", "2026-03-10 21:00:00", "check the invoice"),
+    ("at 8 o'clock call dad", "2026-03-10 20:00:00", "call dad"),
+    ("at 6.30pm yoga", "2026-03-10 18:30:00", "yoga"),
+    # tomorrow / day after
+    ("tomorrow at 7pm call mom", "2026-03-11 19:00:00", "call mom"),
+    ("call dentist at 3pm tomorrow", "2026-03-11 15:00:00", "call dentist"),
+    ("tomorrow morning go for a run", "2026-03-11 09:00:00", "go for a run"),
+    ("tomorrow at 8 in the morning send the report", "2026-03-11 08:00:00", "send the report"),
+    ("tomorrow at 3 review PR", "2026-03-11 15:00:00", "review PR"),
+    ("tomorrow at 8 catch the train", "2026-03-11 08:00:00", "catch the train"),
+    ("remind me tomorrow to renew insurance", "2026-03-11 09:00:00", "renew insurance"),
+    ("tmrw 9am standup notes", "2026-03-11 09:00:00", "standup notes"),
+    ("tomorrow evening call grandma", "2026-03-11 18:00:00", "call grandma"),
+    ("tomorrow at 6 in the evening badminton", "2026-03-11 18:00:00", "badminton"),
+    ("day after tomorrow at 11am dentist", "2026-03-12 11:00:00", "dentist"),
+    ("tomorrow afternoon book tickets", "2026-03-11 14:00:00", "book tickets"),
+    # weekdays
+    ("on friday at 5pm submit timesheet", "2026-03-13 17:00:00", "submit timesheet"),
+    ("friday evening movie night", "2026-03-13 18:00:00", "movie night"),
+    ("next monday at 10am sprint planning", "2026-03-16 10:00:00", "sprint planning"),
+    ("on sunday call parents", "2026-03-15 09:00:00", "call parents"),
+    ("this thursday at 2pm demo", "2026-03-12 14:00:00", "demo"),
+    ("next tuesday at 9am gym", "2026-03-17 09:00:00", "gym"),
+    ("tuesday at 11am team sync", "2026-03-17 11:00:00", "team sync"),
+    # dates
+    ("on 25 march at 10am pay credit card bill", "2026-03-25 10:00:00", "pay credit card bill"),
+    ("march 25 at 10:30am visa appointment", "2026-03-25 10:30:00", "visa appointment"),
+    ("on 2026-04-01 renew passport", "2026-04-01 09:00:00", "renew passport"),
+    ("on 15/04 at 6pm anniversary dinner", "2026-04-15 18:00:00", "anniversary dinner"),
+    ("on the 20th at 9am pay rent", "2026-03-20 09:00:00", "pay rent"),
+    ("on the 5th pay electricity bill", "2026-04-05 09:00:00", "pay electricity bill"),
+    ("3rd jan file taxes", "2027-01-03 09:00:00", "file taxes"),
+    ("on 1st april 2026 at 8pm april fools prank", "2026-04-01 20:00:00", "april fools prank"),
+    # leave to the LLM
+    ("every day at 9am take vitamins", None, None),
+    ("remind me daily to drink water", None, None),
+    ("next week to review goals", None, None),
+    ("at the end of the month pay rent", None, None),
+    ("this weekend clean the room", None, None),
+    ("tomorrow at seven pm call mom", None, None),
+    ("at half past six call dad", None, None),
+    ("sometime tomorrow buy milk", None, None),
+    ("before the meeting print the slides", None, None),
+    ("remind me to buy milk", None, None),
+    ("in a bit check on the build", None, None),
+    ("tomorrow in 2 hours check the logs", None, None),
+]
+
+# the same parser late in the evening, when most bare hours have already passed today
+LATE_NOW = datetime(2026, 10, 18, 21, 30, 0, tzinfo=IST)  # a Sunday
+LATE_CORPUS = [
+    ("at 5 go for a run", "2026-10-19 05:00:00", "go for a run"),
+    ("at 3 check the dryer", "2026-10-19 03:00:00", "check the dryer"),
+    ("at 9 take medicine", "2026-10-19 09:00:00", "take medicine"),
+    ("at 10 call Rahul", "2026-10-18 22:00:00", "call Rahul"),
+    ("at 11:45 submit the form", "2026-10-18 23:45:00", "submit the form"),
+    ("remind me at 12 tonight to lock the door", "2026-10-19 00:00:00", "lock the door"),
+    ("remind me tonight at 12 to lock the door", "2026-10-19 00:00:00", "lock the door"),
+    ("at 12 in the afternoon pick up lunch", "2026-10-19 12:00:00", "pick up lunch"),
+    ("tomorrow at 7pm call mom", "2026-10-19 19:00:00", "call mom"),
+    ("at 7am standup", "2026-10-19 07:00:00", "standup"),
+    ("on sunday at 5 call parents", "2026-10-25 17:00:00", "call parents"),
+]
+
+
+def main(args):
+    handled = correct = wrong = fallback_ok = missed = 0
+    latencies = []
+    cases = [(NOW, *case) for case in CORPUS] + [(LATE_NOW, *case) for case in LATE_CORPUS]
+    for now, phrase, expected, expected_message in cases:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            result = parse_local(phrase, now=now)
+        latencies.append((time.perf_counter() - start) / args.repeat)
+
+        got = result["datetime"] if result else None
+        message_ok = expected_message is None or (result and result["message"] == expected_message)
+        if result is None:
+            if expected is None:
+                fallback_ok += 1
+                status = "llm (expected)"
+            else:
+                missed += 1
+                status = "llm (could be local)"
+        else:
+            handled += 1
+            if got == expected and message_ok:
+                correct += 1
+                status = "ok"
+            else:
+                wrong += 1
+                status = f"WRONG (want {expected} / {expected_message!r})"
+        if args.verbose or status.startswith("WRONG"):
+            message = result["message"] if result else ""
+            print(f"{status:<24} {phrase!r:<55} -> {got} {message!r}")
+
+    local_expected = sum(1 for _, _, expected, _ in cases if expected is not None)
+    print(f"corpus: {len(cases)} phrases ({local_expected} locally parseable, {len(cases) - local_expected} meant for the LLM)")
+    print(f"handled locally: {handled}/{len(cases)} ({handled / len(cases):.0%}), "
+          f"coverage of parseable phrases: {correct}/{local_expected} ({correct / local_expected:.0%})")
+    print(f"wrong answers: {wrong}, left to LLM: {missed + fallback_ok} ({fallback_ok} by design)")
+    print(f"latency per parse: p50={percentile(latencies, 50) * 1e6:.0f}us "
+          f"p99={percentile(latencies, 99) * 1e6:.0f}us max={max(latencies) * 1e6:.0f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200, help="parses per phrase when timing")
+    parser.add_argument("--verbose", action="store_true", help="print every phrase, not just mismatches")
+    main(parser.parse_args())
@@ -0,0 +1,53 @@
+"""
+Reminder store startup cost with many pending reminders.
+
+    python -m benchmarks.reminder_store --pending 50000
+
+Fills a throwaway SQLite store with reminders spread over the next year,
+then times what startup does: the overdue scan and loading the next
+horizon into the scheduler. Both are (status, run_at) index range scans,
+so they should stay flat as the pending count grows.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from scheduler.reminder_store import ReminderStore
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ReminderStore(Path(tmp) / "reminders.db")
+        rng = random.Random(0)
+        now = time.time()
+
+        start = time.perf_counter()
+        for i in range(args.pending):
+            store.add(f"r{i}", str(i % 50), f"reminder {i}", now + rng.uniform(-3600, 365 * 86400))
+        insert_s = time.perf_counter() - start
+
+        store.close()
+        start = time.perf_counter()
+        store = ReminderStore(store.path)  # cold: what a restart sees
+        overdue = store.pending_between(0, now)
+        window = store.pending_between(now - 3600, now + args.horizon)
+        startup_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        count = store.pending_count()
+        count_ms = (time.perf_counter() - start) * 1000
+
+        print(f"pending={count} inserted in {insert_s:.2f}s ({insert_s / args.pending * 1e6:.0f}us each)")
+        print(f"startup scan: {len(overdue)} overdue + {len(window)} in next {args.horizon}s horizon in {startup_ms:.1f}ms")
+        print(f"pending_count: {count_ms:.1f}ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pending", type=int, default=50_000)
+    parser.add_argument("--horizon", type=int, default=900)
+    main(parser.parse_args())
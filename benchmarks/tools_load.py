@@ -0,0 +1,124 @@
+"""
+Tool latency and event-loop responsiveness under concurrent chats, against local stub APIs.
+
+    python -m benchmarks.tools_load --latency 0.3 --chats 1 8 32 --failure-rate 0.05
+
+Every simulated chat runs one model step that asks for web_search and
+github_list_repos together, then one notion_append, through
+execute_tool_calls as run_agent does, so per-tool limits, timeouts and
+dedupe are included. SerpAPI, GitHub and Notion are served by one stub
+server, so per-host limits, keep-alive reuse and retries on injected 503s
+all show up in the numbers.
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.harness import LoopLagMonitor, StubServer, set_dummy_env, summarize
+
+
+async def _search(request):
+    return 200, {"organic_results": [
+        {"title": f"Result {i}", "snippet": "stub snippet", "link": f"https://example.com/{i}"} for i in range(3)
+    ]}
+
+
+async def _repos(request):
+    return 200, [{"name": f"repo-{i}", "description": "stub repo"} for i in range(10)]
+
+
+async def _append(request):
+    return 200, {"object": "list", "results": []}
+
+
+ROUTES = {
+    ("GET", "/search.json"): _search,
+    ("GET", "/repos"): _repos,
+    ("PATCH", "/children"): _append,
+}
+
+
+async def _run_chats(tools, chats: int) -> tuple:
+    step_latencies, tool_latencies, failures = [], {}, 0
+    execute_tool = tools.execute_tool
+
+    async def timed(name, arguments, **kwargs):
+        # per-tool time inside the semaphore; waiting for a slot shows up in the step latency
+        start = time.perf_counter()
+        try:
+            return await execute_tool(name, arguments, **kwargs)
+        finally:
+            tool_latencies.setdefault(name, []).append(time.perf_counter() - start)
+
+    async def chat(i):
+        nonlocal failures
+        for step in (
+            [{"name": "web_search", "arguments": {"query": f"weather {i}"}},
+             {"name": "github_list_repos", "arguments": {}}],
+            [{"name": "notion_append", "arguments": {"content": f"note {i}"}}],
+        ):
+            start = time.perf_counter()
+            results = await tools.execute_tool_calls(step)
+            step_latencies.append(time.perf_counter() - start)
+            failures += sum("fail" in r["result"].lower() or "error" in r["result"].lower() for r in results)
+
+    # _run_tool_call looks execute_tool up at call time, so this times each tool on the real path
+    tools.execute_tool = timed
+    monitor = LoopLagMonitor()
+    monitor.start()
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(chat(i) for i in range(chats)))
+    finally:
+        tools.execute_tool = execute_tool
+    wall = time.perf_counter() - start
+    lag = await monitor.stop()
+    return wall, step_latencies, tool_latencies, failures, lag
+
+
+async def main(args):
+    server = await StubServer(
+        ROUTES, latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate,
+    ).start()
+    set_dummy_env(
+        SERPAPI_URL=f"{server.url}/search.json",
+        GITHUB_API_URL=server.url,
+        NOTION_API_URL=server.url,
+    )
+
+    import config
+    config.TOOL_HTTP_BACKOFF = args.backoff
+    config.TOOL_CACHE_PERSIST = False
+    from agent import tools
+    from utils import http
+    if not args.cache:
+        # measure the HTTP path, not the result cache
+        tools.tool_cache.ttls = {}
+
+    print(f"stub latency={args.latency * 1000:.0f}ms jitter={args.jitter * 1000:.0f}ms "
+          f"failure_rate={args.failure_rate:.0%}, per-host limit={config.TOOL_HTTP_MAX_PER_HOST}")
+    print(f"{'chats':>5} {'wall_s':>7} {'step_p50':>8} {'step_p95':>8} {'search_p95':>10} "
+          f"{'repos_p95':>9} {'notion_p95':>10} {'failed':>6} {'requests':>8} {'lag_max_ms':>10}")
+    for chats in args.chats:
+        served_before = server.requests_served
+        wall, steps, per_tool, failures, lag = await _run_chats(tools, chats)
+        step = summarize(steps)
+        p95 = {name: summarize(values)["p95_ms"] for name, values in per_tool.items()}
+        print(f"{chats:>5} {wall:>7.2f} {step['p50_ms']:>8} {step['p95_ms']:>8} {p95['web_search']:>10} "
+              f"{p95['github_list_repos']:>9} {p95['notion_append']:>10} {failures:>6} "
+              f"{server.requests_served - served_before:>8} {lag['lag_max_ms']:>10}")
+
+    await http.close_client()
+    await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.3, help="stub response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--backoff", type=float, default=0.05, help="first retry delay (config default is 0.5s)")
+    parser.add_argument("--chats", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--cache", action="store_true", help="keep the tool result cache on (in memory only)")
+    asyncio.run(main(parser.parse_args()))
@@ -3,13 +3,24 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 from agent.core import run_agent
+from bot.streaming import StreamingReply
+import config
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_message = update.message.text
     bot = context.bot
     chat_id = str(update.message.chat_id)
-    response = await run_agent(user_message, bot=bot, chat_id=chat_id)
-    await update.message.reply_text(response)
+
+    if not config.STREAM_REPLIES:
+        response = await run_agent(user_message, bot=bot, chat_id=chat_id)
+        await update.message.reply_text(response)
+        return
+
+    # placeholder first, then edit it as the answer streams in
+    reply = StreamingReply(update.message, is_group=update.message.chat.type != "private")
+    await reply.start()
+    response = await run_agent(user_message, bot=bot, chat_id=chat_id, on_token=reply.update)
+    await reply.finish(response)
 
 async def handle_start(update:Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(
@@ -29,7 +40,8 @@ async def handle_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "Commands:\n"
         "/help — show this message\n"
         "/memory — show what I remember about you\n"
-        "/clear — clear our conversation history",
+        "/clear — clear our conversation history\n"
+        "/stats — tool cache hits and misses",
         parse_mode="Markdown"
     )
 
@@ -42,6 +54,17 @@ async def handle_memory(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("I don't have anything stored in memory yet.")
         
 async def handle_clear(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    from agent.core import conversation_history
-    conversation_history.clear()
-    await update.message.reply_text("Conversation history cleared!")
\ No newline at end of file
+    from agent.session import sessions
+    sessions.clear(str(update.message.chat_id))
+    await update.message.reply_text("Conversation history cleared!")
+
+async def handle_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    from agent.tools import tool_cache
+    stats = tool_cache.stats()
+    lines = [
+        "Tool cache:",
+        f"{stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate), {stats['entries']} entries",
+    ]
+    for name, counts in stats["by_tool"].items():
+        lines.append(f"- {name}: {counts['hits']} hits, {counts['misses']} misses")
+    await update.message.reply_text("\n".join(lines))
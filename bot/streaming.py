@@ -0,0 +1,93 @@
+# progressive replies: send a placeholder, then edit it as tokens stream in.
+# edits are throttled to stay inside Telegram's limits (~1 edit/s in a private
+# chat, ~20 messages/min in groups) and never block token consumption.
+
+import asyncio
+import time
+
+from telegram.error import BadRequest, RetryAfter
+
+import config
+
+TELEGRAM_MAX_CHARS = 4096
+PLACEHOLDER = "…"
+
+
+def _seconds(retry_after) -> float:
+    # python-telegram-bot reports retry_after as int seconds or a timedelta depending on version
+    return retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else float(retry_after)
+
+
+class StreamingReply:
+    def __init__(self, message, is_group: bool = False):
+        self.message = message
+        self.interval = config.STREAM_EDIT_INTERVAL_GROUP if is_group else config.STREAM_EDIT_INTERVAL
+        self.sent = None
+        self.shown = ""
+        self._next_edit_at = 0.0
+        self._edit_task = None
+        self.started = time.perf_counter()
+        self.first_visible_ms = None
+
+    async def start(self) -> None:
+        self.sent = await self.message.reply_text(PLACEHOLDER)
+
+    async def update(self, text: str) -> None:
+        """on_token callback. Cheap: at most kicks off one background edit."""
+        if self.sent is None or (self._edit_task and not self._edit_task.done()):
+            return
+        if time.monotonic() < self._next_edit_at:
+            return
+        if len(text) - len(self.shown) < config.STREAM_MIN_NEW_CHARS:
+            return
+        self._edit_task = asyncio.create_task(self._edit(text[:TELEGRAM_MAX_CHARS]))
+
+    async def _edit(self, text: str) -> None:
+        self._next_edit_at = time.monotonic() + self.interval
+        try:
+            await self.sent.edit_text(text)
+            self.shown = text
+            if self.first_visible_ms is None:
+                self.first_visible_ms = round((time.perf_counter() - self.started) * 1000)
+        except RetryAfter as e:
+            # flood control — back off for as long as Telegram asks
+            self._next_edit_at = time.monotonic() + _seconds(e.retry_after)
+        except BadRequest as e:
+            # "message is not modified" and friends are harmless mid-stream
+            print(f"[STREAM] edit skipped: {e}")
+
+    async def finish(self, text: str) -> None:
+        """Waits for any in-flight edit, then shows the final text (split if over Telegram's limit)."""
+        if self._edit_task:
+            await asyncio.gather(self._edit_task, return_exceptions=True)
+        if self.sent is None:
+            await self.message.reply_text(text)
+            return
+
+        head, rest = text[:TELEGRAM_MAX_CHARS], text[TELEGRAM_MAX_CHARS:]
+        if head != self.shown:
+            delay = self._next_edit_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self._final_edit(head)
+        while rest:
+            chunk, rest = rest[:TELEGRAM_MAX_CHARS], rest[TELEGRAM_MAX_CHARS:]
+            await self.message.reply_text(chunk)
+
+        total_ms = round((time.perf_counter() - self.started) * 1000)
+        print(f"[STREAM] first visible text at {self.first_visible_ms}ms, complete at {total_ms}ms")
+
+    async def _final_edit(self, text: str) -> None:
+        # one retry after flood control; the answer is already computed, so never raise from here
+        for attempt in range(2):
+            try:
+                await self.sent.edit_text(text)
+                return
+            except RetryAfter as e:
+                if attempt:
+                    print(f"[STREAM] final edit dropped, still rate limited: {e}")
+                    return
+                await asyncio.sleep(_seconds(e.retry_after))
+            except BadRequest as e:
+                print(f"[STREAM] final edit skipped: {e}")
+                return
@@ -21,12 +21,30 @@ if not GROQ_API_KEY:
 if not SERPAPI_KEY:
     raise ValueError("SERPAPI_KEY is missing from .env file")
 
-MAX_HISTORY = 20
+MAX_HISTORY = 20  # per chat
+MAX_SESSIONS = 500  # idle chats beyond this are evicted, least recently used first
+SESSION_MAX_CHARS = 5_000_000  # cap on history held across all sessions
 RECENT_LOGS_DAYS = 1
 
 MODEL_MAIN = "llama-3.3-70b-versatile"
 MODEL_CLASSIFIER = "llama-3.1-8b-instant"
 
+# Local MiniLM intent scorer — the classifier LLM is only asked when this is unsure
+LOCAL_INTENT_ENABLED = True
+LOCAL_INTENT_MIN_CONFIDENCE = 0.6
+
+# Async Groq client — one pooled connection set shared by every chat
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")  # None = api.groq.com; point at a stub for benchmarks
+LLM_TIMEOUT_SECONDS = 30.0
+LLM_MAX_RETRIES = 2
+LLM_MAX_CONNECTIONS = 20
+
+# Streaming replies — placeholder message edited as tokens arrive
+STREAM_REPLIES = True
+STREAM_EDIT_INTERVAL = 1.0  # seconds between edits in a private chat
+STREAM_EDIT_INTERVAL_GROUP = 3.0  # groups share a ~20 messages/min budget
+STREAM_MIN_NEW_CHARS = 20  # don't spend an edit on a couple of characters
+
 CONTEXT_BUDGETS = {
     "casual":    400,
     "tool":      600,
@@ -36,6 +54,93 @@ CONTEXT_BUDGETS = {
 MAX_CONTEXT_TOKENS = 4000
 MAX_TOOL_ITERATIONS = 5
 
+# Parallel tool calls: per-call timeout and how many calls of one tool may run at once
+MAX_PARALLEL_TOOL_CALLS = 5
+TOOL_TIMEOUT_SECONDS = 20.0
+TOOL_TIMEOUTS = {"set_reminder": 35.0}  # parses the time with an LLM call first
+TOOL_CONCURRENCY_DEFAULT = 4
+TOOL_CONCURRENCY = {
+    "github_create_issue": 1,
+    "notion_append": 1,
+    "notion_create_page": 1,
+    "send_telegram_message": 1,
+}
+
+# Load MiniLM + open Chroma in post_init instead of on the first knowledge query
+WARM_EMBEDDINGS_ON_START = True
+
+# Hybrid RAG retrieval — BM25 and MiniLM candidates merged with reciprocal rank fusion
+RAG_LATENCY_BUDGET_MS = 300  # past this, the dense search is dropped and BM25 hits are used alone
+RAG_CANDIDATES = 20  # per retriever, before fusion
+RAG_RRF_K = 60
+RAG_SPARSE_SHORT_CIRCUIT = True  # skip the embedding call when BM25 is confident
+RAG_SPARSE_MIN_TERMS = 2  # one-word queries always get the dense search too
+RAG_SPARSE_MIN_COVERAGE = 0.8  # top hit holds this share (idf-weighted) of the query's terms...
+RAG_SPARSE_MIN_MARGIN = 1.5  # ...and outscores the runner-up by this factor
+
+# Month-sharded RAG collections — searched newest first, widening only when needed
+RAG_RECENT_MONTHS = 2  # shards the dense search starts with
+RAG_WIDEN_MONTHS = 3  # older shards added per widening step
+RAG_GOOD_DISTANCE = 1.0  # dense hits this close count as good (squared L2 on unit vectors: cosine >= 0.5)
+RAG_RECENCY_WEIGHT = 0.3  # share of the fused score that decays with a message's age
+RAG_RECENCY_HALF_LIFE_DAYS = 30
+
+# Live RAG indexing — new messages are embedded in micro-batches in the background
+LIVE_INDEX_MAX_BATCH = 64
+LIVE_INDEX_MAX_DELAY = 2.0  # seconds a message may wait before its batch is flushed
+
+# Background memory extraction — turns are coalesced into one classifier-model call
+MEMORY_EXTRACT_MAX_BATCH = 5
+MEMORY_EXTRACT_MAX_DELAY = 20.0
+
+# Log writes (daily logs, metrics.jsonl) are buffered and flushed by a background thread
+LOG_FLUSH_INTERVAL = 1.0  # seconds
+LOG_FLUSH_BYTES = 64 * 1024
+LOG_BUFFER_MAX_BYTES = 4 * 1024 * 1024  # writers wait for the flusher beyond this
+LOG_FSYNC = "interval"  # "always" | "interval" | "never"
+LOG_FSYNC_INTERVAL = 5.0
+
+# Newest daily-log records kept in memory so recent-log reads rarely hit the disk
+RECENT_LOG_RECORDS = 200
+
+# Tool result cache — only read-only tools listed here are cached (TTL in seconds)
+TOOL_CACHE_TTLS = {"web_search": 900, "github_list_repos": 300}
+# time-sensitive queries ("weather today", "btc price") are cached for TOOL_CACHE_FRESH_TTL instead
+TOOL_CACHE_FRESH_TTL = 120
+TOOL_CACHE_FRESH_WORDS = {
+    "web_search": [
+        "now", "today", "tonight", "current", "currently", "latest",
+        "weather", "forecast", "temperature", "score", "scores", "price", "prices", "stock", "stocks", "rate", "news",
+    ],
+}
+# queries with any of these words always go to the API
+TOOL_CACHE_LIVE_WORDS = {"web_search": ["live", "breaking", "time"]}
+TOOL_CACHE_MAX_ENTRIES = 512
+TOOL_CACHE_PERSIST = True  # mirror entries to .cache/ so they survive restarts
+TOOL_CACHE_INVALIDATES = {"github_create_issue": ["github_list_repos"]}
+
+# Tool HTTP client (GitHub, Notion, SerpAPI) — one keep-alive pool, capped per host
+TOOL_HTTP_TIMEOUT = 10.0
+TOOL_HTTP_CONNECT_TIMEOUT = 5.0
+TOOL_HTTP_MAX_CONNECTIONS = 50
+TOOL_HTTP_MAX_PER_HOST = 10
+TOOL_HTTP_RETRIES = 2
+TOOL_HTTP_BACKOFF = 0.5  # seconds before the first retry, doubled each attempt
+
+# API base URLs — overridable so benchmarks can point the tools at a local stub
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+NOTION_API_URL = os.getenv("NOTION_API_URL", "https://api.notion.com/v1")
+SERPAPI_URL = os.getenv("SERPAPI_URL", "https://serpapi.com/search.json")
+
+# Per-request latency spans written into each metrics.jsonl row (off: spans are no-ops)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "1") != "0"
+
+# Reminders live in SQLite; only those due within the horizon sit in the scheduler
+REMINDER_HORIZON = 15 * 60  # seconds
+REMINDER_REFILL_INTERVAL = 5 * 60  # must stay below the horizon
+REMINDER_MISFIRE_GRACE = 60 * 60  # overdue by less than this after downtime: still sent, marked late
+REMINDER_RETENTION_DAYS = 30  # sent/missed rows older than this are deleted at startup
+
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 GITHUB_USERNAME = "HarshitaJ02"
 
@@ -1,21 +1,56 @@
+import asyncio
 from telegram.ext import Application, MessageHandler, filters, CommandHandler
-from bot.handlers import handle_message, handle_start, handle_help, handle_memory, handle_clear
-from scheduler.jobs import scheduler
+from bot.handlers import handle_message, handle_start, handle_help, handle_memory, handle_clear, handle_stats
+from scheduler.jobs import scheduler, start_reminders
+from scheduler.reminder_store import reminder_store
 import config
-from rag.indexer import index_all_logs
+from rag.indexer import index_all_logs, live_indexer, enqueue_log_message
+from memory import store
+from rag import vectorstore
+from agent import llm
+from agent.intent_model import get_intent_model
+from agent.memory_ops import memory_worker
+from utils import http
 
 
 application = Application.builder().token(config.TELEGRAM_BOT_TOKEN).build()
 
 async def post_init(application):
+    if config.WARM_EMBEDDINGS_ON_START:
+        try:
+            stats = vectorstore.warm_up()
+            get_intent_model()
+            print(f"Embedding model and vector store ready: {stats}")
+        except Exception as e:
+            print(f"Warm-up failed (non-critical): {e}")
+
+    # new messages are indexed live from here on
+    store.add_log_listener(enqueue_log_message)
+    live_indexer.start()
+    memory_worker.start()
+
+    # catch up on anything logged while the bot was down, without holding up startup
+    asyncio.create_task(_catch_up_index())
+
+    scheduler.start()
+    await start_reminders(application.bot)
+    print("Scheduler started!")
+
+async def _catch_up_index():
     try:
-        print("Syncing ChromaDB with latest logs...")
-        index_all_logs()
+        print("Syncing ChromaDB with latest logs in the background...")
+        await asyncio.to_thread(index_all_logs)
     except Exception as e:
         print(f"Indexing failed (non-critical): {e}")
-    
-    scheduler.start()
-    print("Scheduler started!")
+
+async def post_shutdown(application):
+    # flush pending extractions first — they need the LLM client and write to memory
+    await memory_worker.stop()
+    await live_indexer.stop()
+    await llm.close_client()
+    await http.close_client()
+    reminder_store.close()
+    store.close_logs()
 
 async def error_handler(update,context):
     print(f"Error: {context.error}")
@@ -26,9 +61,11 @@ def main():
     application.add_handler(CommandHandler("help", handle_help))
     application.add_handler(CommandHandler("memory", handle_memory))
     application.add_handler(CommandHandler("clear", handle_clear))
+    application.add_handler(CommandHandler("stats", handle_stats))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     application.add_error_handler(error_handler)
     application.post_init = post_init
+    application.post_shutdown = post_shutdown
 
     print("Krish is running ...")
     application.run_polling()
@@ -0,0 +1,177 @@
+# write-behind appender for the append-only logs (daily .md logs, metrics.jsonl).
+# callers hand over a (path, text) record and return immediately; a background
+# thread batches records, keeps the current files open and writes them when
+# enough bytes pile up or the flush interval passes.
+
+import os
+import threading
+import time
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+
+class BufferedAppender:
+    """
+    append(path, text) never touches the disk. The destination path is
+    chosen per record, so a stream that rotates (one file per date) just
+    passes the new path; files not written in a flush are closed.
+
+    Buffering is bounded: past max_buffer_bytes, append() waits for the
+    flusher instead of growing without limit.
+    fsync policy: "always" after every flush, "interval" at most every
+    fsync_interval seconds while there are unsynced writes, "never" leaves
+    it to the OS. close() (also run at exit) drains and syncs everything.
+    """
+
+    def __init__(self, name: str, flush_interval: float = 1.0, flush_bytes: int = 64 * 1024,
+                 max_buffer_bytes: int = 4 * 1024 * 1024, fsync: str = "interval", fsync_interval: float = 5.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self.name = name
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.max_buffer_bytes = max_buffer_bytes
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.stats = {"records": 0, "flushes": 0, "bytes": 0, "fsyncs": 0, "waits": 0, "errors": 0}
+
+        self._cond = threading.Condition()
+        self._pending = []  # [(path, text)] in arrival order
+        self._pending_bytes = 0
+        self._appended = 0  # records accepted so far
+        self._written = 0  # records handed to the OS so far
+        self._flush_requested = False
+        self._closed = False
+        self._thread = None
+        self._files = {}  # path -> open file, owned by the flusher thread
+        self._unsynced = set()
+        self._last_fsync = time.monotonic()
+
+    def append(self, path, text: str) -> None:
+        size = len(text)
+        with self._cond:
+            if self._closed:
+                # late writes after shutdown (atexit ordering) go straight to disk
+                self._write_through(path, text)
+                return
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"log-{self.name}", daemon=True)
+                self._thread.start()
+            while self._pending_bytes and self._pending_bytes + size > self.max_buffer_bytes:
+                self.stats["waits"] += 1
+                self._flush_requested = True
+                self._cond.notify_all()
+                self._cond.wait()
+            self._pending.append((path, text))
+            self._pending_bytes += size
+            self._appended += 1
+            self.stats["records"] += 1
+            if self._pending_bytes >= self.flush_bytes:
+                self._cond.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Blocks until everything appended before the call is written. False on timeout."""
+        with self._cond:
+            target = self._appended
+            if self._written >= target or self._thread is None:
+                return True
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._written >= target, timeout)
+
+    def close(self) -> None:
+        """Drains the buffer, fsyncs and closes the files. Idempotent."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._closed or self._flush_requested or self._pending_bytes >= self.flush_bytes,
+                    timeout=self.flush_interval,
+                )
+                batch, self._pending, self._pending_bytes = self._pending, [], 0
+                self._flush_requested = False
+                closing = self._closed
+                self._cond.notify_all()  # appenders waiting for space can go on
+
+            if batch:
+                self._write_batch(batch)
+            self._maybe_fsync(force=closing)
+
+            with self._cond:
+                self._written += len(batch)
+                self._cond.notify_all()
+                if closing and not self._pending:
+                    break
+        self._close_files()
+
+    def _write_batch(self, batch: list) -> None:
+        touched = set()
+        for path, text in batch:
+            try:
+                f = self._files.get(path)
+                if f is None:
+                    f = self._files[path] = open(path, "a", encoding="utf-8")
+                f.write(text)
+                touched.add(path)
+                self.stats["bytes"] += len(text)
+            except OSError as e:
+                self.stats["errors"] += 1
+                print(f"[LOG WRITER] {self.name}: could not write {path}: {e}")
+        for path in touched:
+            try:
+                self._files[path].flush()
+            except OSError as e:
+                self.stats["errors"] += 1
+                print(f"[LOG WRITER] {self.name}: could not flush {path}: {e}")
+        self._unsynced |= touched
+        self.stats["flushes"] += 1
+        # rotation: yesterday's file stops receiving records, so let it go
+        for path in [p for p in self._files if p not in touched]:
+            self._sync(path)
+            self._files.pop(path).close()
+
+    def _maybe_fsync(self, force: bool = False) -> None:
+        if not self._unsynced:
+            return
+        due = self.fsync == "always" or (
+            self.fsync == "interval" and time.monotonic() - self._last_fsync >= self.fsync_interval
+        )
+        if due or force:
+            for path in list(self._unsynced):
+                self._sync(path)
+            self._last_fsync = time.monotonic()
+
+    def _sync(self, path) -> None:
+        if path not in self._unsynced:
+            return
+        self._unsynced.discard(path)
+        f = self._files.get(path)
+        if f is None:
+            return
+        try:
+            os.fsync(f.fileno())
+            self.stats["fsyncs"] += 1
+        except OSError as e:
+            self.stats["errors"] += 1
+            print(f"[LOG WRITER] {self.name}: fsync failed for {path}: {e}")
+
+    def _close_files(self) -> None:
+        for path, f in self._files.items():
+            try:
+                f.close()
+            except OSError:
+                pass
+        self._files.clear()
+
+    def _write_through(self, path, text: str) -> None:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(text)
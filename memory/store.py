@@ -1,17 +1,113 @@
+import atexit
+import json
+import threading
+from collections import deque
 from pathlib import Path
 from datetime import datetime
+from memory.log_writer import BufferedAppender
+from utils.tracing import span
+import config
 
 BASE_DIR = Path(__file__).parent
 ROOT_DIR = BASE_DIR.parent
 LOGS_DIR = BASE_DIR/ "logs"
 
 LOGS_DIR.mkdir(exist_ok=True)
+METRICS_FILE = LOGS_DIR / "metrics.jsonl"
 
-def read_file(filename:str) -> str:
+# one long-lived appender per log stream; writes return without touching the disk
+def _appender(name: str) -> BufferedAppender:
+    return BufferedAppender(
+        name,
+        flush_interval=config.LOG_FLUSH_INTERVAL,
+        flush_bytes=config.LOG_FLUSH_BYTES,
+        max_buffer_bytes=config.LOG_BUFFER_MAX_BYTES,
+        fsync=config.LOG_FSYNC,
+        fsync_interval=config.LOG_FSYNC_INTERVAL,
+    )
+
+daily_log = _appender("daily")
+metrics_log = _appender("metrics")
+
+def flush_logs(timeout: float = None) -> None:
+    """Waits until every log line written so far is on disk (for readers of the log files)."""
+    daily_log.flush(timeout)
+    metrics_log.flush(timeout)
+
+def close_logs() -> None:
+    """Drains both buffers and fsyncs. Called from post_shutdown, and at exit as a backstop."""
+    daily_log.close()
+    metrics_log.close()
+
+atexit.register(close_logs)
+
+# callables invoked as fn(date, timestamp, role, content) after each daily log write
+_log_listeners = []
+
+# (date, record) for the newest daily-log records, in write order. Ahead of the
+# files (records land here before the flusher writes them), so recent-log reads
+# can usually skip the disk.
+_recent_records = deque(maxlen=config.RECENT_LOG_RECORDS)
+# appends happen on the loop, snapshots in to_thread workers; copying a deque mid-append raises
+_recent_lock = threading.Lock()
+
+def add_log_listener(listener) -> None:
+    """Registers a callback for every message written to the daily log (e.g. live RAG indexing)."""
+    _log_listeners.append(listener)
+
+class CachedFile:
+    """
+    Decoded contents of one file plus everything derived from it.
+    Valid while the file's (mtime_ns, size) is unchanged.
+    """
+
+    __slots__ = ("mtime_ns", "size", "text", "sections", "_chunks")
+
+    def __init__(self, text: str, mtime_ns: int, size: int):
+        self.text = text
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.sections = {}  # header -> formatted section, built once per file version
+        self._chunks = None
+
+    @property
+    def chunks(self) -> list:
+        """Bullet lines with their lowercased word sets, for memory scoring."""
+        if self._chunks is None:
+            lines = (line.strip() for line in self.text.strip().split("\n"))
+            self._chunks = [(line, set(line.lower().split())) for line in lines if line.startswith("-")]
+        return self._chunks
+
+    def section(self, header: str) -> str:
+        if header not in self.sections:
+            self.sections[header] = f"{header}\n{self.text}"
+        return self.sections[header]
+
+
+# path -> CachedFile. SOUL/USER/MEMORY are read on every message but rarely change.
+_file_cache = {}
+
+def _load(filename: str) -> CachedFile | None:
+    """One stat() per call; the file is only read again when mtime or size moved."""
     filepath = ROOT_DIR/filename
-    if not filepath.exists():
-        return ""
-    return filepath.read_text(encoding="utf-8")
+    try:
+        st = filepath.stat()
+    except FileNotFoundError:
+        _file_cache.pop(filepath, None)
+        return None
+    cached = _file_cache.get(filepath)
+    if cached is not None and cached.mtime_ns == st.st_mtime_ns and cached.size == st.st_size:
+        return cached
+    cached = CachedFile(filepath.read_text(encoding="utf-8"), st.st_mtime_ns, st.st_size)
+    _file_cache[filepath] = cached
+    return cached
+
+def invalidate(filename: str) -> None:
+    _file_cache.pop(ROOT_DIR/filename, None)
+
+def read_file(filename:str) -> str:
+    cached = _load(filename)
+    return cached.text if cached else ""
 
 def read_context() -> str:
     soul = read_file("SOUL.md")
@@ -34,52 +130,53 @@ def read_soul_core() -> str:
     Always injected — defines Krish's personality and response rules.
     Kept short (~200-300 tokens). Trim SOUL.md if it grows large.
     """
-    soul = read_file("SOUL.md")
-    if not soul:
+    soul = _load("SOUL.md")
+    if not soul or not soul.text:
         return ""
-    return f"## Personality & Response Rules\n{soul}"
+    return soul.section("## Personality & Response Rules")
 
 def read_user_md() -> str:
     """
     Returns USER.md content.
     Injected only for personal/knowledge queries, not casual or tool queries.
     """
-    user = read_file("USER.md")
-    if not user:
+    user = _load("USER.md")
+    if not user or not user.text:
         return ""
-    return f"## User Profile\n{user}"
+    return user.section("## User Profile")
 
 def read_memory_chunks(query: str = "", top_k: int = 3) -> str:
     """
     Returns relevant chunks from MEMORY.md instead of the full file.
-    Splits MEMORY.md by bullet points, scores by keyword overlap with query,
-    returns top_k most relevant chunks.
+    Ranks bullets with the semantic memory index (MiniLM + BM25), falling
+    back to keyword overlap if the index is unavailable.
     Falls back to returning full MEMORY.md if query is empty.
     """
-    memory_content = read_file("MEMORY.md")
-    if not memory_content:
+    memory_file = _load("MEMORY.md")
+    if not memory_file or not memory_file.text:
         return ""
 
     # If no query provided, return full memory (fallback)
     if not query:
-        return f"## What You Remember\n{memory_content}"
-
-    # Split into chunks by bullet point lines
-    lines = memory_content.strip().split("\n")
-    chunks = [line.strip() for line in lines if line.strip().startswith("-")]
-
-    if not chunks:
-        return f"## What You Remember\n{memory_content}"
+        return memory_file.section("## What You Remember")
 
-    # Score each chunk by word overlap with query
-    query_words = set(query.lower().split())
+    # Bullet chunks and their word sets are parsed once per file version
+    scored_chunks = memory_file.chunks
 
-    def score_chunk(chunk: str) -> int:
-        chunk_words = set(chunk.lower().split())
-        return len(query_words & chunk_words)
+    if not scored_chunks:
+        return memory_file.section("## What You Remember")
 
-    scored = sorted(chunks, key=score_chunk, reverse=True)
-    top_chunks = scored[:top_k]
+    chunks = [chunk for chunk, _ in scored_chunks]
+    try:
+        from rag.memory_index import memory_index
+        memory_index.sync(chunks, (memory_file.mtime_ns, memory_file.size))
+        top_chunks = memory_index.search(query, top_k=top_k)
+    except Exception as e:
+        print(f"[MEMORY INDEX ERROR] falling back to keyword overlap: {e}")
+        # Score each chunk by word overlap with query
+        query_words = set(query.lower().split())
+        scored = sorted(scored_chunks, key=lambda chunk: len(query_words & chunk[1]), reverse=True)
+        top_chunks = [chunk for chunk, _ in scored[:top_k]]
 
     # Always include at least the most recent 2 chunks for continuity
     recent_chunks = chunks[-2:] if len(chunks) >= 2 else chunks
@@ -93,18 +190,40 @@ def write_to_memory(content: str) -> None:
     memory_file = ROOT_DIR/ "MEMORY.md"
     with open(memory_file, "a", encoding= "utf-8") as f:
         f.write(f"\n{content}")
+    invalidate("MEMORY.md")
+
+    # embed the new bullets now so the next query doesn't pay for it
+    bullets = [line.strip() for line in content.split("\n") if line.strip().startswith("-")]
+    if bullets:
+        try:
+            from rag.memory_index import memory_index
+            memory_index.add(bullets)
+        except Exception as e:
+            print(f"[MEMORY INDEX ERROR] could not index new memory: {e}")
 
 def update_user_profile(content: str) -> None:
     user_file = ROOT_DIR / "USER.md"
     with open(user_file, "w", encoding="utf-8") as f:
         f.write(content)
+    invalidate("USER.md")
 
 def write_daily_log(role:str, content:str) -> None:
-    today = datetime.now().strftime("%Y-%m-%d")
+    now = datetime.now()
+    today = now.strftime("%Y-%m-%d")
+    # the path comes from this record's own date, so midnight rotates the file
     log_file = LOGS_DIR/ f"{today}.md"
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    with open(log_file, "a", encoding="utf-8") as f:
-        f.write(f"\n[{timestamp}] {role}: {content}")
+    timestamp = now.strftime("%H:%M:%S")
+    record = f"\n[{timestamp}] {role}: {content}"
+    with span("log_write", stream="daily"):
+        daily_log.append(log_file, record)
+        with _recent_lock:
+            _recent_records.append((today, record))
+
+        for listener in _log_listeners:
+            try:
+                listener(today, timestamp, role, content)
+            except Exception as e:
+                print(f"[LOG LISTENER ERROR] {e}")
 
 
 def write_metrics_log(entry: dict) -> None:
@@ -113,10 +232,8 @@ def write_metrics_log(entry: dict) -> None:
     Used for observability — track category distribution, token usage, routing.
     Analyze later to detect misrouting patterns and memory bloat.
     """
-    import json
-    metrics_file = LOGS_DIR / "metrics.jsonl"
-    with open(metrics_file, "a", encoding="utf-8") as f:
-        f.write(json.dumps(entry) + "\n")
+    # not traced: the trace is already serialised into this entry
+    metrics_log.append(METRICS_FILE, json.dumps(entry) + "\n")
 
 # def read_recent_logs(days: int = 3) -> str:
 #     log_files = sorted(LOGS_DIR.glob("*.md"))[-days:]
@@ -131,17 +248,81 @@ def read_recent_logs(days: int = 1, max_chars: int = 2000) -> str:
     """
     Returns recent daily logs, capped at max_chars.
     Cap prevents log bloat from inflating context on every message.
-    Keeps most recent content (tail of log, not head).
+    Keeps most recent content (tail of log, not head), starting at a line.
+    Cost depends on max_chars, not on how big the log files have grown.
+    """
+    recent = _recent_from_records(days, max_chars)
+    if recent is not None:
+        return recent
+
+    daily_log.flush()
+    pieces = []
+    needed = max_chars
+    for log_file in reversed(sorted(LOGS_DIR.glob("*.md"))[-days:]):
+        body, whole_file = _read_tail(log_file, needed)
+        piece = f"\n\n--- {log_file.stem} ---\n{body}" if whole_file else body
+        pieces.append(piece)
+        needed -= len(piece)
+        if needed <= 0 or not whole_file:
+            break
+    return _trim_to_line(''.join(reversed(pieces)), max_chars)
+
+def _recent_from_records(days: int, max_chars: int) -> str | None:
+    """
+    Builds the tail from the in-memory records when they alone fill the
+    budget. None when they don't (just started, or a quiet log) — the
+    caller then reads the files.
     """
-    log_files = sorted(LOGS_DIR.glob("*.md"))[-days:]
-    combined = ""
-    for log_file in log_files:
-        combined += f"\n\n--- {log_file.stem} ---\n"
-        combined += log_file.read_text(encoding="utf-8")
+    with _recent_lock:
+        records = list(_recent_records)
+    dates = sorted({date for date, _ in records})[-days:]
+    if not dates:
+        return None
+    parts, current = [], None
+    for date, record in records:
+        if date not in dates:
+            continue
+        if date != current:
+            current = date
+            parts.append(f"\n\n--- {date} ---\n")
+        parts.append(record)
+    # the first date's header may sit mid-file here, so it can't count toward the budget
+    if sum(map(len, parts)) - len(parts[0]) < max_chars:
+        return None
+    return _trim_to_line("".join(parts), max_chars)
 
-    # Keep most recent content within budget
-    if len(combined) > max_chars:
-        combined = combined[-max_chars:]
+def _read_tail(path: Path, max_chars: int, block_size: int = 8192) -> tuple:
+    """
+    Last max_chars characters (or a bit more) of a UTF-8 file, read backwards
+    block by block from the end. Returns (text, whole_file).
+    """
+    with open(path, "rb") as f:
+        pos = f.seek(0, 2)
+        data = b""
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+            # a character is at most 4 bytes, so this many bytes always covers max_chars
+            if len(data) >= max_chars * 4 + 4:
+                break
+            # cheap early exit for mostly-ASCII logs
+            if len(data) >= max_chars and len(data.decode("utf-8", errors="ignore")) > max_chars:
+                break
+    if pos > 0:
+        # don't start in the middle of a multi-byte character
+        start = 0
+        while start < len(data) and (data[start] & 0xC0) == 0x80:
+            start += 1
+        data = data[start:]
+    return data.decode("utf-8", errors="replace"), pos == 0
 
-    return combined
+def _trim_to_line(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    tail = text[-max_chars:]
+    # records start with a newline; drop the partial one at the front
+    cut = tail.find("\n")
+    return tail[cut:] if cut != -1 else tail
 
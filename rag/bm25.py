@@ -0,0 +1,154 @@
+# in-process BM25 inverted index + reciprocal rank fusion.
+# the sparse half of hybrid retrieval: exact tokens (repo names, error strings,
+# dates) that MiniLM vectors blur together.
+
+import heapq
+import math
+import re
+import threading
+
+# dotted/dashed runs stay whole ("krish-personal-ai-agent", "2026-03-01", "v1.2.3")
+_TOKEN_RE = re.compile(r"\w+(?:[-./:@#]\w+)*")
+_PARTS_RE = re.compile(r"[-_./:@#]")
+
+STOPWORDS = frozenset("""
+a about above after again all am an and any are as at be because been before being below between both but by
+can could did do does doing don down during each few for from further had has have having he her here hers him
+his how i if in into is it its itself just me more most my myself no nor not now of off on once only or other
+our ours out over own same she should so some such than that the their theirs them then there these they this
+those through to too under until up very was we were what when where which while who whom why will with would
+you your yours yourself
+""".split())
+
+
+def tokenize(text: str) -> list:
+    """Lowercased terms; compound tokens are kept whole and also split into their parts."""
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if not _PARTS_RE.search(token):
+            # single ASCII letters are noise ("it's" -> "s"); a single CJK character is a word
+            if token not in STOPWORDS and (len(token) > 1 or token.isdigit() or not token.isascii()):
+                terms.append(token)
+            continue
+        terms.append(token)
+        terms.extend(part for part in _PARTS_RE.split(token) if len(part) > 1 and part not in STOPWORDS)
+    return terms
+
+
+class BM25Index:
+    """
+    Incremental Okapi BM25. add()/remove() touch only the postings of the
+    document's own terms; search() only walks postings of the query terms,
+    so query cost tracks how common the query words are, not corpus size.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}  # term -> {doc_id: term frequency}
+        self._doc_terms = {}  # doc_id -> tuple of distinct terms (for removal)
+        self._doc_len = {}
+        self._total_len = 0
+        self._norms = None  # doc_id -> k1 * length normalisation; dropped on every change
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def __contains__(self, doc_id) -> bool:
+        return doc_id in self._doc_len
+
+    def add(self, doc_id, text: str) -> None:
+        tokens = tokenize(text)
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        with self._lock:
+            if doc_id in self._doc_len:
+                self._remove_locked(doc_id)
+            for term, tf in counts.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+            self._doc_terms[doc_id] = tuple(counts)
+            self._doc_len[doc_id] = len(tokens)
+            self._total_len += len(tokens)
+            self._norms = None
+
+    def remove(self, doc_id) -> None:
+        with self._lock:
+            if doc_id in self._doc_len:
+                self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id) -> None:
+        for term in self._doc_terms.pop(doc_id, ()):
+            docs = self._postings.get(term)
+            if docs is not None:
+                docs.pop(doc_id, None)
+                if not docs:
+                    del self._postings[term]
+        self._total_len -= self._doc_len.pop(doc_id)
+        self._norms = None
+
+    def idf(self, term: str) -> float:
+        n = len(self._doc_len)
+        df = len(self._postings.get(term, ()))
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, top_k: int = 5, accept=None) -> list:
+        """
+        Returns [(doc_id, score)] best first. `accept(doc_id)` can filter
+        candidates (e.g. by date) before ranking.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            n = len(self._doc_len)
+            if not n or not terms:
+                return []
+            if self._norms is None:
+                avg_len = self._total_len / n or 1
+                self._norms = {
+                    doc_id: self.k1 * (1 - self.b + self.b * length / avg_len)
+                    for doc_id, length in self._doc_len.items()
+                }
+            norms = self._norms
+            scores = {}
+            for term in terms:
+                docs = self._postings.get(term)
+                if not docs:
+                    continue
+                weight = self.idf(term) * (self.k1 + 1)
+                postings = docs.items() if accept is None else [(d, tf) for d, tf in docs.items() if accept(d)]
+                get = scores.get
+                for doc_id, tf in postings:
+                    scores[doc_id] = get(doc_id, 0.0) + weight * tf / (tf + norms[doc_id])
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+    def coverage(self, query: str, doc_id) -> float:
+        """
+        idf-weighted share of the query's terms that doc_id contains: 1.0 means
+        every distinctive word of the query is in it.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            doc_terms = set(self._doc_terms.get(doc_id, ()))
+            total = sum(self.idf(term) for term in terms)
+            matched = sum(self.idf(term) for term in terms if term in doc_terms)
+        return matched / total if total else 0.0
+
+
+def reciprocal_rank_scores(*rankings, k: int = 60, weights: list = None) -> dict:
+    """RRF scores by id, for callers that reweight them before sorting."""
+    fused = {}
+    for i, ranking in enumerate(rankings):
+        weight = weights[i] if weights else 1.0
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight / (k + rank)
+    return fused
+
+
+def reciprocal_rank_fusion(*rankings, k: int = 60, weights: list = None) -> list:
+    """
+    Fuses ranked lists of ids: score(d) = sum(w / (k + rank)). Rank-based,
+    so dense cosine and BM25 scores never need to be on the same scale.
+    """
+    fused = reciprocal_rank_scores(*rankings, k=k, weights=weights)
+    return sorted(fused, key=fused.get, reverse=True)
@@ -0,0 +1,119 @@
+# persistent text -> vector cache so identical text is never run through MiniLM twice,
+# including across full reindexes (store wiped, manifest reset, ID scheme changed).
+#
+# file layout (little endian):
+#   header  b"EMBC" + uint32 dim
+#   records 20-byte sha1(text) + dim float32
+# append-only; a torn record at the tail (crash mid-write) is ignored on load.
+
+import hashlib
+import struct
+import threading
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b"EMBC"
+HEADER = struct.Struct("<4sI")
+KEY_BYTES = 20
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.sha1(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    One cache file per embedding model — vectors from different models are
+    never mixed. Thread-safe: the live indexer and the catch-up sync both
+    embed from worker threads.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.dim = None
+        self.hits = 0
+        self.misses = 0
+        self._index = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        data = self.path.read_bytes()
+        if len(data) < HEADER.size:
+            return
+        magic, dim = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            print(f"[EMBED CACHE] {self.path} is not a cache file, ignoring it")
+            return
+        self.dim = dim
+        record = np.dtype([("key", f"S{KEY_BYTES}"), ("vec", "<f4", (dim,))])
+        count = (len(data) - HEADER.size) // record.itemsize
+        valid_bytes = HEADER.size + count * record.itemsize
+        if valid_bytes != len(data):
+            # drop the torn record so later appends stay aligned
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_bytes)
+        records = np.frombuffer(data, dtype=record, count=count, offset=HEADER.size)
+        vectors = records["vec"]
+        # keys are sliced from the raw bytes — numpy's S dtype would drop trailing NULs
+        for i in range(count):
+            offset = HEADER.size + i * record.itemsize
+            self._index[data[offset:offset + KEY_BYTES]] = vectors[i]
+        print(f"[EMBED CACHE] Loaded {count} vectors from {self.path.name}")
+
+    def get_many(self, texts: list) -> tuple:
+        """Returns (vectors, missing) — vectors[i] is None for every index listed in missing."""
+        vectors, missing = [], []
+        with self._lock:
+            for i, text in enumerate(texts):
+                vec = self._index.get(text_key(text))
+                vectors.append(vec)
+                if vec is None:
+                    missing.append(i)
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        return vectors, missing
+
+    def put_many(self, texts: list, vectors) -> None:
+        vectors = np.asarray(vectors, dtype="<f4")
+        if vectors.ndim != 2 or not len(texts):
+            return
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                print(f"[EMBED CACHE] dim {vectors.shape[1]} != cached dim {self.dim}, not caching")
+                return
+
+            chunks = []
+            for text, vec in zip(texts, vectors):
+                key = text_key(text)
+                if key in self._index:
+                    continue
+                self._index[key] = vec
+                chunks.append(key + vec.tobytes())
+            if not chunks:
+                return
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            is_new = not self.path.exists() or self.path.stat().st_size == 0
+            with open(self.path, "ab") as f:
+                if is_new:
+                    f.write(HEADER.pack(MAGIC, self.dim))
+                f.write(b"".join(chunks))
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._index),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+        }
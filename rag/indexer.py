@@ -1,19 +1,23 @@
+import asyncio
+import hashlib
+import json
+import time
 from pathlib import Path
 from datetime import datetime
-from sentence_transformers import SentenceTransformer
-import chromadb
+from rag import vectorstore
+from rag.vectorstore import CHROMA_DIR, get_collection, get_embedding_cache, embed, reset_collections
+from rag.sparse import get_sparse_index
+from utils.background import BatchWorker
+import config
 
 BASE_DIR = Path(__file__).parent
 LOGS_DIR = BASE_DIR.parent/"memory"/"logs"
-CHROMA_DIR = BASE_DIR.parent/".chroma"
 
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-chroma_client = chromadb.PersistentClient(path= str(CHROMA_DIR))
-
-collection = chroma_client.get_or_create_collection(
-    name = "telegram_messages",
-    metadata={"description": "All Telegram conversation messages"}
-)
+# per-file sync checkpoints; kept inside the store dir so wiping .chroma resets it too
+MANIFEST_PATH = CHROMA_DIR/"sync_manifest.json"
+# v2: content-addressed message IDs
+# v3: one collection per month, numeric "day" metadata for range filters
+MANIFEST_VERSION = 3
 
 def parse_log_file(log_file_path:Path) -> list:
     """Parse a daily log file and return a list of messages."""
@@ -21,6 +25,21 @@ def parse_log_file(log_file_path:Path) -> list:
         return []
     
     content = log_file_path.read_text(encoding="utf-8")
+    return _parse_log_text(content, log_file_path.stem)
+
+def read_log_tail(log_file_path: Path, offset: int = 0) -> tuple:
+    """
+    Parses only the part of a log file after byte `offset`.
+    Returns (messages, end_offset). Logs are append-only and every record is
+    written in one go, so the end of the file is always a record boundary.
+    """
+    with open(log_file_path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    text = data.decode("utf-8", errors="replace")
+    return _parse_log_text(text, log_file_path.stem), offset + len(data)
+
+def _parse_log_text(content: str, date: str) -> list:
     messages = []
 
     for line in content.strip().split('\n'):
@@ -37,60 +56,161 @@ def parse_log_file(log_file_path:Path) -> list:
                 role = role.strip()
                 message = message.strip()
 
-                date = log_file_path.stem
-
-                messages.append({
-                    "date": date,
-                    "timestamp": timestamp,
-                    "role": role,
-                    "content": message,
-                    "id": f"{date}_{timestamp}_{role}"
-                })
+                messages.append(make_message(date, timestamp, role, message))
     return messages
 
-def index_all_logs():
-    """Index all messages from daily logs into ChromaDB."""
+def message_id(date: str, timestamp: str, role: str, content: str) -> str:
+    """
+    Content-addressed ID. Two different messages from the same role in the
+    same second no longer collide; re-indexing the same line is still idempotent.
+    """
+    digest = hashlib.sha1(f"{date}|{timestamp}|{role}|{content}".encode("utf-8")).hexdigest()
+    return f"{date}_{digest[:24]}"
+
+def make_message(date: str, timestamp: str, role: str, content: str) -> dict:
+    """One indexable message. Shared by the log parser and the live queue so IDs always agree."""
+    return {
+        "date": date,
+        "timestamp": timestamp,
+        "role": role,
+        "content": content,
+        "id": message_id(date, timestamp, role, content)
+    }
+
+def upsert_messages(messages: list) -> None:
+    """
+    Embeds and upserts a batch of messages into their month shards, then the
+    BM25 index. Blocking — call via asyncio.to_thread on the loop.
+    """
+    if not messages:
+        return
+    # loaded before the upsert, so its count check sees Chroma as it was
+    sparse = get_sparse_index()
+    by_month = {}
+    for msg in messages:
+        by_month.setdefault(msg["date"][:7], []).append(msg)
+
+    for month, batch in by_month.items():
+        documents = [msg["content"] for msg in batch]
+        get_collection(month, create=True).upsert(
+            ids=[msg["id"] for msg in batch],
+            embeddings=embed(documents),
+            documents=documents,
+            metadatas=[
+                {
+                    "date": msg["date"],
+                    "day": int(msg["date"].replace("-", "")),  # Chroma range filters need numbers
+                    "timestamp": msg["timestamp"],
+                    "role": msg["role"]
+                }
+                for msg in batch
+            ]
+        )
+        vectorstore.refresh_count(month)
+    sparse.add(messages)
+
+def _load_manifest() -> tuple:
+    """Returns (manifest, outdated). outdated means the store was built with an older ID scheme or layout."""
+    fresh = {"version": MANIFEST_VERSION, "files": {}}
+    if not MANIFEST_PATH.exists():
+        # stores from before the manifest existed use the old timestamp IDs too
+        return fresh, vectorstore.count() > 0 or vectorstore.has_legacy_collection()
+    try:
+        manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return fresh, False
+    if manifest.get("version") != MANIFEST_VERSION:
+        return fresh, True
+    return manifest, False
+
+def _save_manifest(manifest: dict) -> None:
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFEST_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest), encoding="utf-8")
+    tmp.replace(MANIFEST_PATH)
+
+def index_all_logs() -> dict:
+    """
+    Index new messages from daily logs into ChromaDB.
+
+    A manifest records size, mtime and the byte offset already indexed for
+    every log file. Unchanged files are skipped on a stat() alone and grown
+    files are only parsed from their last offset, so startup cost tracks new
+    messages, not total history. Returns counts of work done and skipped.
+    """
+    stats = {"files": 0, "files_skipped": 0, "bytes_read": 0, "bytes_skipped": 0, "indexed": 0}
     log_files = sorted(LOGS_DIR.glob("*.md"))
 
     if not log_files:
         print("No log files found.")
-        return
-    
-    existing = collection.get(include=[])
-    existing_ids = set(existing["ids"]) if existing["ids"] else set()
+        return stats
+
+    start = time.perf_counter()
+    manifest, outdated = _load_manifest()
+    files = manifest["files"]
+
+    if outdated:
+        # old IDs can't be matched to new ones; rebuild — the embedding cache keeps this cheap next time
+        print("[INDEXER] Index uses an older ID scheme or layout, rebuilding collections.")
+        reset_collections()
+        get_sparse_index().reset()
+
+    # manifest lives next to the store, but guard against the collection being wiped on its own
+    if files and vectorstore.count() == 0:
+        print("[INDEXER] Collection is empty, ignoring sync manifest.")
+        files.clear()
 
-    new_messages = []
     for log_file in log_files:
-        messages = parse_log_file(log_file)
-        for msg in messages:
-            if msg["id"] not in existing_ids:
-                new_messages.append(msg)
+        stats["files"] += 1
+        st = log_file.stat()
+        entry = files.get(log_file.name)
 
-    if not new_messages:
-        print(f"ChromaDB up to date ({len(existing_ids)} messages already indexed).")
-        return
-    
-    ids = [msg["id"] for msg in new_messages]
-    documents = [msg["content"] for msg in new_messages]
-    metadatas = [
-        {
-            "date": msg["date"],
-            "timestamp": msg["timestamp"],
-            "role": msg["role"]
-        }
-        for msg in new_messages
-    ]
-
-    embeddings = embedding_model.encode(documents).tolist()
-
-    collection.upsert(
-        ids= ids,
-        embeddings=embeddings,
-        documents= documents,
-        metadatas=metadatas
+        if entry and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime_ns:
+            stats["files_skipped"] += 1
+            stats["bytes_skipped"] += st.st_size
+            continue
+
+        # a file smaller than its checkpoint was rewritten, not appended — start over
+        offset = entry["offset"] if entry and entry["offset"] <= st.st_size else 0
+        messages, end_offset = read_log_tail(log_file, offset)
+        stats["bytes_skipped"] += offset
+        stats["bytes_read"] += end_offset - offset
+
+        # one file at a time keeps memory bounded by the largest day, not all history
+        upsert_messages(messages)
+        stats["indexed"] += len(messages)
+
+        files[log_file.name] = {"size": end_offset, "mtime": st.st_mtime_ns, "offset": end_offset}
+        _save_manifest(manifest)
+
+    stats["elapsed_s"] = round(time.perf_counter() - start, 3)
+    stats["embedding_cache"] = get_embedding_cache().stats()
+    print(
+        f"[INDEXER] Indexed {stats['indexed']} new messages in {stats['elapsed_s']}s. "
+        f"Skipped {stats['files_skipped']}/{stats['files']} unchanged files, "
+        f"{stats['bytes_skipped']} of {stats['bytes_skipped'] + stats['bytes_read']} bytes. "
+        f"Embedding cache hit rate {stats['embedding_cache']['hit_rate']:.0%}."
     )
+    return stats
+
+
+async def _index_batch(messages: list) -> None:
+    # embedding + Chroma writes are blocking; keep them off the event loop
+    await asyncio.to_thread(upsert_messages, messages)
+
+# Live indexing: every logged message lands here and reaches Chroma within
+# LIVE_INDEX_MAX_DELAY seconds (or sooner once LIVE_INDEX_MAX_BATCH pile up).
+live_indexer = BatchWorker(
+    "live-index",
+    _index_batch,
+    max_batch=config.LIVE_INDEX_MAX_BATCH,
+    max_delay=config.LIVE_INDEX_MAX_DELAY,
+)
 
-    print(f"Indexed {len(new_messages)} new messages. Total: {len(existing_ids) + len(new_messages)}")
+def enqueue_log_message(date: str, timestamp: str, role: str, content: str) -> None:
+    """store.write_daily_log listener — queues the message, never blocks the reply."""
+    if content.strip():
+        live_indexer.submit(make_message(date, timestamp, role, content.strip()))
 
 
 if __name__ == "__main__":
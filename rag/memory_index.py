@@ -0,0 +1,127 @@
+# semantic index over MEMORY.md bullets.
+# each bullet is embedded once (when it's appended) and kept in a flat float32
+# file next to the bullet texts; a query is one matrix-vector product plus a
+# BM25 lookup for exact terms, fused by rank.
+
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from rag.bm25 import BM25Index, reciprocal_rank_fusion
+from rag.vectorstore import embed, encode
+
+INDEX_DIR = Path(__file__).parent.parent / ".cache" / "memory_index"
+
+
+class MemoryIndex:
+    """
+    bullets.jsonl — one JSON string per bullet, in MEMORY.md order
+    vectors.f32   — matching rows of unit-length float32 embeddings
+    Both are append-only; if they ever disagree with MEMORY.md (manual edit,
+    crash between the two writes) the index is rebuilt, which the embedding
+    cache makes cheap.
+    """
+
+    def __init__(self, directory: Path = INDEX_DIR):
+        self.directory = Path(directory)
+        self.texts = []
+        self.vectors = None  # (n, dim)
+        self.bm25 = BM25Index()
+        self.version = None  # (mtime_ns, size) of the MEMORY.md last synced against
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def _texts_path(self) -> Path:
+        return self.directory / "bullets.jsonl"
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self.directory / "vectors.f32"
+
+    def _load(self) -> None:
+        self._loaded = True
+        if not self._texts_path.exists() or not self._vectors_path.exists():
+            return
+        with open(self._texts_path, encoding="utf-8") as f:
+            texts = [json.loads(line) for line in f if line.strip()]
+        flat = np.fromfile(self._vectors_path, dtype="<f4")
+        if not texts or flat.size % len(texts):
+            return
+        self.texts = texts
+        self.vectors = flat.reshape(len(texts), -1)
+        for i, text in enumerate(texts):
+            self.bm25.add(i, text)
+
+    def _embed(self, bullets: list) -> np.ndarray:
+        vectors = np.asarray(embed(bullets), dtype="<f4")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def _append_locked(self, bullets: list) -> None:
+        vectors = self._embed(bullets)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self._vectors_path, "ab") as f:
+            f.write(vectors.tobytes())
+        with open(self._texts_path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(b) + "\n" for b in bullets)
+        start = len(self.texts)
+        self.texts.extend(bullets)
+        self.vectors = vectors if self.vectors is None else np.vstack([self.vectors, vectors])
+        for i, text in enumerate(bullets, start=start):
+            self.bm25.add(i, text)
+
+    def _rebuild_locked(self, bullets: list) -> None:
+        print(f"[MEMORY INDEX] Rebuilding over {len(bullets)} bullets")
+        for path in (self._texts_path, self._vectors_path):
+            path.unlink(missing_ok=True)
+        self.texts, self.vectors, self.bm25 = [], None, BM25Index()
+        if bullets:
+            self._append_locked(bullets)
+
+    def add(self, bullets: list) -> None:
+        """Called by write_to_memory with the bullets it just appended."""
+        bullets = [b for b in bullets if b]
+        if not bullets:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._append_locked(bullets)
+
+    def sync(self, bullets: list, version) -> None:
+        """
+        Makes the index match MEMORY.md's bullets. Free when `version` is
+        unchanged; appends when MEMORY.md only grew; rebuilds otherwise.
+        """
+        if version is not None and version == self.version:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            n = len(self.texts)
+            if self.texts == bullets:
+                pass
+            elif len(bullets) > n and bullets[:n] == self.texts:
+                self._append_locked(bullets[n:])
+            else:
+                self._rebuild_locked(bullets)
+            self.version = version
+
+    def search(self, query: str, top_k: int = 3) -> list:
+        """Top bullets: dense cosine ranking fused with BM25 so exact terms still surface."""
+        if not self.texts:
+            return []
+        q = np.asarray(encode(query, normalize=True), dtype="<f4")
+        sims = self.vectors @ q
+        k = min(len(sims), top_k * 2)
+        dense = np.argpartition(-sims, k - 1)[:k]
+        dense = dense[np.argsort(-sims[dense])].tolist()
+        sparse = [i for i, _ in self.bm25.search(query, top_k=top_k * 2)]
+        fused = reciprocal_rank_fusion(dense, sparse)
+        return [self.texts[i] for i in fused[:top_k]]
+
+
+memory_index = MemoryIndex()
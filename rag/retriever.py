@@ -1,43 +1,171 @@
-from sentence_transformers import SentenceTransformer
-import chromadb
-from pathlib import Path
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 
-BASE_DIR = Path(__file__).parent
-CHROMA_DIR = BASE_DIR.parent/ ".chroma"
+import config
+from rag import vectorstore
+from rag.vectorstore import embed_query
+from rag.bm25 import reciprocal_rank_scores, tokenize
+from rag.sparse import get_sparse_index
+from utils.tracing import span
 
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-chroma_client = chromadb.PersistentClient(path=str(CHROMA_DIR))
+# the dense path runs here so retrieval can stop waiting for it once the budget is spent
+_dense_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="rag-dense")
 
-collection = chroma_client.get_or_create_collection(name = "telegram_messages")
-
-def retrieve_context(query:str, top_k: int = 5) -> str:
+def retrieve_context(query:str, top_k: int = 5, since: str = None, until: str = None, role: str = None) -> str:
     """
     Retreive top_k most relevant messages for the given query.
     Returns formatted string with retrieved messages.
+    since / until ("YYYY-MM-DD", inclusive) and role narrow the search.
     """
+    with span("rag", top_k=top_k) as s:
+        context = _retrieve(query, top_k, since, until, role)
+        s.set(chars=len(context))
+    return context
 
+def _retrieve(query: str, top_k: int, since: str, until: str, role: str) -> str:
     try:
-        if collection.count() == 0:
-            return ""
-        
-        query_embedding = embedding_model.encode(query).tolist()
-        results = collection.query(
-            query_embeddings = [query_embedding],
-            n_results = top_k
+        hits = search(query, top_k, since=since, until=until, role=role)
+        return "\n".join(
+            f"[{hit['date']} {hit['timestamp']}] {hit['role']}: {hit['content']}" for hit in hits
         )
-
-        if not results['documents'] or not results['documents'][0]:
-            return ""
-        
-        formatted = []
-        documents = results['documents'][0]
-        metadatas = results['metadatas'][0]
-
-        for doc, meta in zip(documents, metadatas):
-            formatted.append(
-                f"[{meta['date']} {meta['timestamp']}] {meta['role']}: {doc}"
-            )
-        return "\n".join(formatted)
     except Exception as e:
         print(f"[RAG ERROR] retrieve_context failed: {e}")  # visible in logs
         return ""
+
+def search(query: str, top_k: int = 5, since: str = None, until: str = None, role: str = None) -> list:
+    """
+    Hybrid search: BM25 and dense candidates fused with reciprocal rank fusion,
+    then weighted toward recent messages.
+    Returns message dicts (date, timestamp, role, content, id), best first.
+
+    BM25 runs first. If its top hit covers the query and clearly beats the
+    rest, that answer is returned without embedding the query. Otherwise the
+    dense search gets what is left of RAG_LATENCY_BUDGET_MS; if it can't
+    finish in time the BM25 hits are used alone.
+    """
+    started = time.perf_counter()
+    if vectorstore.count() == 0:
+        return []
+
+    with span("rag_sparse") as s:
+        sparse = get_sparse_index().search(query, config.RAG_CANDIDATES, since=since, until=until, role=role)
+        s.set(hits=len(sparse))
+    if config.RAG_SPARSE_SHORT_CIRCUIT and _sparse_confident(query, sparse):
+        print("[RAG] BM25 confident, skipping the embedding call")
+        return _fuse([[msg for _, _, msg in sparse]], top_k)
+
+    deadline = started + config.RAG_LATENCY_BUDGET_MS / 1000
+    # a pool thread doesn't inherit the caller's context; copy it so the dense span lands in this trace
+    future = _dense_pool.submit(
+        contextvars.copy_context().run, _dense_search, query, top_k, since, until, role, deadline
+    )
+    try:
+        # with no BM25 hits there's nothing to fall back on, so wait it out
+        dense = future.result(timeout=max(0.0, deadline - time.perf_counter()) if sparse else None)
+    except TimeoutError:
+        print(f"[RAG] dense search over the {config.RAG_LATENCY_BUDGET_MS}ms budget, using BM25 hits only")
+        dense = []
+    except Exception as e:
+        print(f"[RAG ERROR] dense search failed: {e}")
+        dense = []
+
+    return _fuse([dense, [msg for _, _, msg in sparse]], top_k)
+
+def _sparse_confident(query: str, sparse: list) -> bool:
+    if not sparse or len(set(tokenize(query))) < config.RAG_SPARSE_MIN_TERMS:
+        return False
+    top_score, coverage, _ = sparse[0]
+    if coverage < config.RAG_SPARSE_MIN_COVERAGE:
+        return False
+    return len(sparse) == 1 or top_score >= config.RAG_SPARSE_MIN_MARGIN * sparse[1][0]
+
+def _dense_search(query: str, top_k: int, since: str, until: str, role: str, deadline: float) -> list:
+    """
+    Searches month shards newest first: RAG_RECENT_MONTHS to start with, then
+    RAG_WIDEN_MONTHS older ones at a time, until top_k hits are within
+    RAG_GOOD_DISTANCE, the shards in range run out, or the deadline passes.
+    """
+    with span("rag_dense") as s:
+        months = [
+            month for month in vectorstore.months()
+            if (not since or month >= since[:7]) and (not until or month <= until[:7])
+        ]
+        if not months:
+            return []
+        embedding = embed_query(query)
+        where = _where(since, until, role)
+
+        hits, searched, step = [], 0, config.RAG_RECENT_MONTHS
+        while searched < len(months):
+            for month in months[searched:searched + step]:
+                hits.extend(_query_shard(month, embedding, where))
+            searched = min(searched + step, len(months))
+            step = config.RAG_WIDEN_MONTHS
+            good = sum(1 for distance, _ in hits if distance <= config.RAG_GOOD_DISTANCE)
+            if good >= top_k or time.perf_counter() >= deadline:
+                break
+
+        hits.sort(key=lambda hit: hit[0])
+        s.set(shards=searched, shards_in_range=len(months), hits=len(hits))
+        return [msg for _, msg in hits[:config.RAG_CANDIDATES]]
+
+def _query_shard(month: str, embedding: list, where: dict) -> list:
+    """(distance, message) pairs from one month shard."""
+    n = min(config.RAG_CANDIDATES, vectorstore.count(month))
+    if n == 0:
+        return []
+    results = vectorstore.get_collection(month).query(
+        query_embeddings = [embedding],
+        n_results = n,
+        where = where
+    )
+    if not results['ids'] or not results['ids'][0]:
+        return []
+    return [
+        (distance, {"date": meta["date"], "timestamp": meta["timestamp"], "role": meta["role"], "content": doc, "id": doc_id})
+        for doc_id, doc, meta, distance in zip(
+            results['ids'][0], results['documents'][0], results['metadatas'][0], results['distances'][0]
+        )
+    ]
+
+def _where(since: str, until: str, role: str) -> dict:
+    """Chroma metadata filter, or None. Dates compare on the numeric "day" field (YYYYMMDD)."""
+    clauses = []
+    if since:
+        clauses.append({"day": {"$gte": int(since.replace("-", ""))}})
+    if until:
+        clauses.append({"day": {"$lte": int(until.replace("-", ""))}})
+    if role:
+        clauses.append({"role": role})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def _fuse(rankings: list, top_k: int) -> list:
+    """
+    Reciprocal rank fusion over message rankings. RAG_RECENCY_WEIGHT of each
+    fused score then halves with every RAG_RECENCY_HALF_LIFE_DAYS of the
+    message's age.
+    """
+    messages = {}
+    for ranking in rankings:
+        for msg in ranking:
+            messages.setdefault(msg["id"], msg)
+    scores = reciprocal_rank_scores(*([msg["id"] for msg in ranking] for ranking in rankings), k=config.RAG_RRF_K)
+
+    today = date.today()
+    weight = config.RAG_RECENCY_WEIGHT
+    for msg_id in scores:
+        decay = 0.5 ** (_age_days(messages[msg_id]["date"], today) / config.RAG_RECENCY_HALF_LIFE_DAYS)
+        scores[msg_id] *= 1 - weight + weight * decay
+
+    best = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [messages[msg_id] for msg_id in best]
+
+def _age_days(day: str, today: date) -> int:
+    try:
+        return max(0, (today - date.fromisoformat(day)).days)
+    except ValueError:
+        return 0
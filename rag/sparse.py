@@ -0,0 +1,136 @@
+# keyword index over the same messages as the Chroma shards, built on
+# rag.bm25. cheap enough to run before deciding whether the embedding call
+# is needed at all.
+#
+# persisted as an append-only jsonl of indexed messages inside .chroma, so
+# wiping the store resets it too. postings are rebuilt from it on load.
+
+import json
+import threading
+import time
+from pathlib import Path
+
+from rag import vectorstore
+from rag.bm25 import BM25Index
+
+SPARSE_FILENAME = "bm25.jsonl"
+
+
+class MessageIndex:
+    """
+    Messages are the make_message() dicts from rag.indexer, keyed by id in
+    the BM25 index. add() is idempotent on message id (ids are
+    content-addressed), so re-indexing a log never double-counts.
+    Thread-safe: the live indexer adds from a worker thread while retrieval
+    searches from another.
+    """
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path) if path else None
+        self.bm25 = BM25Index()
+        self._messages = {}  # message id -> message dict
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def load(self) -> int:
+        """Rebuilds postings from the persisted messages. Returns how many were loaded."""
+        if not self.path or not self.path.exists():
+            return 0
+        messages = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    messages.append(json.loads(line))
+                except ValueError:
+                    continue  # torn last line after a crash
+        return self.add(messages, persist=False)
+
+    def add(self, messages: list, persist: bool = True) -> int:
+        """Indexes messages not seen before. Returns how many were new."""
+        added = []
+        with self._lock:
+            for msg in messages:
+                if msg["id"] in self._messages:
+                    continue
+                self._messages[msg["id"]] = msg
+                self.bm25.add(msg["id"], msg["content"])
+                added.append(msg)
+            if persist and added and self.path:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(msg) + "\n" for msg in added))
+        return len(added)
+
+    def reset(self) -> None:
+        """Drops everything, on disk too. Called when the Chroma shards are rebuilt."""
+        with self._lock:
+            self.bm25 = BM25Index()
+            self._messages = {}
+            if self.path and self.path.exists():
+                self.path.unlink()
+
+    def search(self, query: str, limit: int = 10, since: str = None, until: str = None, role: str = None) -> list:
+        """
+        Top `limit` messages by BM25 as (score, coverage, message), best first.
+        coverage is rag.bm25.BM25Index.coverage: 1.0 means every distinctive
+        word of the query is in the message.
+        since / until ("YYYY-MM-DD", inclusive) and role restrict the messages.
+        """
+        bm25, messages = self.bm25, self._messages
+        accept = None
+        if since or until or role:
+            def accept(msg_id):
+                msg = messages[msg_id]
+                return ((not since or msg["date"] >= since)
+                        and (not until or msg["date"] <= until)
+                        and (not role or msg["role"] == role))
+        return [
+            (score, bm25.coverage(query, msg_id), messages[msg_id])
+            for msg_id, score in bm25.search(query, top_k=limit, accept=accept)
+        ]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_sparse_index() -> MessageIndex:
+    """
+    Returns the shared index, loading it on first use. If it doesn't hold
+    the same number of messages as the Chroma shards (created before BM25
+    existed, or a crash between the two writes) it is rebuilt from Chroma.
+    """
+    global _index
+    if _index is not None:
+        return _index
+
+    with _index_lock:
+        if _index is None:
+            start = time.perf_counter()
+            index = MessageIndex(vectorstore.CHROMA_DIR / SPARSE_FILENAME)
+            loaded = index.load()
+            expected = vectorstore.count()
+            if loaded != expected:
+                print(f"[BM25] {loaded} messages on disk, {expected} in Chroma — rebuilding from Chroma")
+                index.reset()
+                _rebuild_from_collection(index)
+            print(f"[BM25] {len(index)} messages in {time.perf_counter() - start:.2f}s")
+            _index = index
+    return _index
+
+
+def _rebuild_from_collection(index: MessageIndex, page: int = 5000) -> None:
+    for month in vectorstore.months():
+        collection = vectorstore.get_collection(month)
+        offset = 0
+        while True:
+            batch = collection.get(limit=page, offset=offset, include=["documents", "metadatas"])
+            if not batch["ids"]:
+                break
+            index.add([
+                {"date": meta["date"], "timestamp": meta["timestamp"], "role": meta["role"], "content": doc, "id": doc_id}
+                for doc_id, doc, meta in zip(batch["ids"], batch["documents"], batch["metadatas"])
+            ])
+            offset += len(batch["ids"])
@@ -0,0 +1,209 @@
+# one shared embedding model + Chroma client for the whole process.
+# indexer and retriever both go through here so MiniLM is loaded once and the store is opened once.
+
+import resource
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent
+CHROMA_DIR = BASE_DIR.parent / ".chroma"
+# outside .chroma on purpose: a wiped store should still reuse cached vectors
+EMBEDDING_CACHE_DIR = BASE_DIR.parent / ".cache" / "embeddings"
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+# one collection per month ("telegram_messages_2026_03"), so a query can stick
+# to recent history; the bare name is the old single collection
+COLLECTION_NAME = "telegram_messages"
+
+_lock = threading.Lock()
+_embedding_model = None
+_chroma_client = None
+_collections = {}  # "YYYY-MM" -> collection
+_counts = {}  # "YYYY-MM" -> message count, refreshed after each write instead of asked per query
+_embedding_cache = None
+
+# startup cost, filled in as each piece gets loaded
+load_stats = {
+    "model_load_s": None,
+    "model_rss_mb": None,
+    "store_open_s": None,
+    "store_rss_mb": None,
+}
+
+
+def _rss_mb() -> float:
+    """Peak resident memory of this process in MB (ru_maxrss is KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def get_embedding_model():
+    """
+    Returns the shared SentenceTransformer, loading it on first use.
+    Import of sentence_transformers is deferred too — it alone pulls in torch.
+    """
+    global _embedding_model
+    if _embedding_model is not None:
+        return _embedding_model
+
+    with _lock:
+        if _embedding_model is None:
+            start = time.perf_counter()
+            before = _rss_mb()
+            from sentence_transformers import SentenceTransformer
+            _embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+            load_stats["model_load_s"] = round(time.perf_counter() - start, 3)
+            load_stats["model_rss_mb"] = round(_rss_mb() - before, 1)
+            print(f"[VECTORSTORE] Loaded {EMBEDDING_MODEL_NAME} in {load_stats['model_load_s']}s (+{load_stats['model_rss_mb']} MB)")
+    return _embedding_model
+
+
+def shard_name(month: str) -> str:
+    return f"{COLLECTION_NAME}_{month.replace('-', '_')}"
+
+
+def _collection_names(client) -> list:
+    # chromadb returns names or Collection objects depending on the version
+    return [c if isinstance(c, str) else c.name for c in client.list_collections()]
+
+
+def _open_store():
+    """Opens the persistent client on first use, along with every month shard and its count."""
+    global _chroma_client
+    if _chroma_client is not None:
+        return _chroma_client
+
+    with _lock:
+        if _chroma_client is None:
+            start = time.perf_counter()
+            before = _rss_mb()
+            import chromadb
+            client = chromadb.PersistentClient(path=str(CHROMA_DIR))
+            prefix = f"{COLLECTION_NAME}_"
+            for name in _collection_names(client):
+                if name.startswith(prefix):
+                    month = name[len(prefix):].replace("_", "-")
+                    _collections[month] = client.get_collection(name)
+                    _counts[month] = _collections[month].count()
+            _chroma_client = client
+            load_stats["store_open_s"] = round(time.perf_counter() - start, 3)
+            load_stats["store_rss_mb"] = round(_rss_mb() - before, 1)
+            print(f"[VECTORSTORE] Opened Chroma at {CHROMA_DIR} ({len(_collections)} month shards) in {load_stats['store_open_s']}s (+{load_stats['store_rss_mb']} MB)")
+    return _chroma_client
+
+
+def get_collection(month: str, create: bool = False):
+    """The shard for "YYYY-MM", or None if it doesn't exist and create is False."""
+    _open_store()
+    collection = _collections.get(month)
+    if collection is None and create:
+        with _lock:
+            collection = _collections.get(month)
+            if collection is None:
+                collection = _chroma_client.get_or_create_collection(
+                    name=shard_name(month),
+                    metadata={"description": f"Telegram conversation messages from {month}"}
+                )
+                _counts[month] = collection.count()
+                _collections[month] = collection
+    return collection
+
+
+def months() -> list:
+    """Months that have a shard, newest first."""
+    _open_store()
+    # snapshot under the lock: the live indexer may be adding a new month's shard
+    with _lock:
+        names = list(_collections)
+    return sorted(names, reverse=True)
+
+
+def count(month: str = None) -> int:
+    """Messages in one shard, or in all of them. Served from the cache — no Chroma call."""
+    _open_store()
+    if month is not None:
+        return _counts.get(month, 0)
+    with _lock:
+        counts = list(_counts.values())
+    return sum(counts)
+
+
+def refresh_count(month: str) -> None:
+    """Re-reads a shard's count. Called after writing to it (upserts may or may not add rows)."""
+    collection = _collections.get(month)
+    if collection is not None:
+        n = collection.count()
+        with _lock:
+            # skip if the shard was dropped by reset_collections meanwhile
+            if _collections.get(month) is collection:
+                _counts[month] = n
+
+
+def has_legacy_collection() -> bool:
+    _open_store()
+    return COLLECTION_NAME in _collection_names(_chroma_client)
+
+
+def get_embedding_cache():
+    """Returns the on-disk vector cache for the current embedding model."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _lock:
+            if _embedding_cache is None:
+                from rag.embedding_cache import EmbeddingCache
+                _embedding_cache = EmbeddingCache(EMBEDDING_CACHE_DIR / f"{EMBEDDING_MODEL_NAME}.bin")
+    return _embedding_cache
+
+
+def embed(texts: list) -> list:
+    """
+    Encodes a batch of texts into plain float lists ready for Chroma.
+    Texts seen before (by content hash) come from the embedding cache;
+    only the rest go through the model.
+    """
+    if not texts:
+        return []
+    cache = get_embedding_cache()
+    vectors, missing = cache.get_many(texts)
+    if missing:
+        fresh = get_embedding_model().encode([texts[i] for i in missing])
+        cache.put_many([texts[i] for i in missing], fresh)
+        for i, vec in zip(missing, fresh):
+            vectors[i] = vec
+    return [vec.tolist() for vec in vectors]
+
+
+def reset_collections() -> None:
+    """Drops every month shard and the old single collection. Used when the ID scheme or layout changes."""
+    _open_store()
+    with _lock:
+        prefix = f"{COLLECTION_NAME}_"
+        for name in _collection_names(_chroma_client):
+            if name == COLLECTION_NAME or name.startswith(prefix):
+                _chroma_client.delete_collection(name)
+        _collections.clear()
+        _counts.clear()
+
+
+def embed_query(text: str) -> list:
+    return get_embedding_model().encode(text).tolist()
+
+
+def encode(texts, normalize: bool = False):
+    """Raw numpy vectors, for in-process similarity math (no cache, no Chroma)."""
+    return get_embedding_model().encode(texts, normalize_embeddings=normalize)
+
+
+def warm_up() -> dict:
+    """
+    Loads the model, opens the store and the BM25 index ahead of the first message.
+    Optional — call from post_init to move the cold start off the first reply.
+    """
+    _open_store()
+    get_embedding_model()
+    from rag.sparse import get_sparse_index
+    stats = dict(load_stats)
+    stats["bm25_messages"] = len(get_sparse_index())
+    stats["embedding_cache"] = get_embedding_cache().stats()
+    stats["peak_rss_mb"] = round(_rss_mb(), 1)
+    return stats
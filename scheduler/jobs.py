@@ -1,30 +1,50 @@
 import uuid
+import time
 from zoneinfo import ZoneInfo
 
 from datetime import datetime
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from agent.llm import get_llm_response
+from scheduler.time_parser import parse_local
+from scheduler.reminder_store import reminder_store, SENT, MISSED, FAILED
 import config
 import re
 import json
 
+IST = ZoneInfo("Asia/Kolkata")
+
 # Global scheduler instance
 scheduler = AsyncIOScheduler(timezone="Asia/Kolkata")
 
-async def send_reminder(bot, chat_id: str, message: str):
+# set once in post_init — jobs carry only ids, never the bot object
+_bot = None
+
+def bind_bot(bot) -> None:
+    global _bot
+    _bot = bot
+
+async def send_reminder(chat_id: str, message: str):
     """Sends a reminder message to the user."""
-    await bot.send_message(chat_id=chat_id, text=f"⏰ Reminder: {message}")
+    await _bot.send_message(chat_id=chat_id, text=f"⏰ Reminder: {message}")
 
-def parse_reminder_datetime(text: str) -> dict[str, str | None] | None:
+async def parse_reminder_datetime(text: str) -> dict[str, str | None] | None:
     """
-    Uses LLM to extract datetime from natural language.
+    Extracts the reminder datetime (IST) from natural language.
     Handles both absolute times ("at 7pm") and relative times ("in 2 minutes").
+    Common phrasings are parsed locally by time_parser; the LLM only sees
+    the ones it can't handle.
     Returns ISO format string like "2026-02-25 08:00:00" or None if not found.
     """
+    local = parse_local(text)
+    if local:
+        print(f"[REMINDER] Parsed locally: {local['datetime']}")
+        return local
+    print("[REMINDER] Local parser unsure, asking the LLM")
+
     prompt = [{
         "role": "system",
         "content": f"""Extract the reminder datetime from the message and return ONLY a JSON object.
-Current time is {datetime.now().strftime("%Y-%m-%d %H:%M")} IST (UTC+5:30).
+Current time is {datetime.now(IST).strftime("%Y-%m-%d %H:%M")} IST (UTC+5:30).
 Convert ALL times to absolute datetime — including relative ones like 'in 2 minutes', 'in 1 hour', 'tomorrow'.
 Return ONLY this JSON:
 {{"datetime": "YYYY-MM-DD HH:MM:SS", "message": "what to remind about"}}
@@ -35,7 +55,7 @@ If no datetime found: {{"datetime": null, "message": null}}"""
     }]
 
     try:
-        response = get_llm_response(prompt, use_classifier_model=True)
+        response = await get_llm_response(prompt, use_classifier_model=True)
         raw = response.get("content", "").strip()
         raw = re.sub(r"```json|```", "", raw).strip()
         parsed = json.loads(raw)
@@ -43,19 +63,105 @@ If no datetime found: {{"datetime": null, "message": null}}"""
     except Exception:
         return None
 
-def add_reminder(bot, chat_id: str, message: str, run_date: datetime):
-    """Dynamically adds a one-time reminder job to the scheduler."""
+def add_reminder(chat_id: str, message: str, run_date: datetime):
+    """
+    Saves a one-time reminder to the reminder store. It only goes into the
+    scheduler now if it's due within the horizon; otherwise refill_schedule
+    picks it up later.
+    """
     import hashlib
-    run_date = run_date.replace(tzinfo=ZoneInfo("Asia/Kolkata"))
+    run_date = run_date.replace(tzinfo=IST)
     job_id = hashlib.md5(f"{chat_id}_{message}_{run_date.isoformat()}".encode()).hexdigest()
 
+    reminder_store.add(job_id, chat_id, message, run_date.timestamp())
+    if run_date.timestamp() < time.time() + config.REMINDER_HORIZON:
+        _schedule(job_id, run_date)
+    
+    return f"Reminder set for {run_date.strftime('%B %d at %I:%M %p')} IST"
+
+def _schedule(reminder_id: str, run_date: datetime) -> None:
     scheduler.add_job(
-        send_reminder,
+        fire_reminder,
         trigger="date",
         run_date=run_date,
-        args=[bot, chat_id, message],
-        id=job_id,
-        replace_existing=True
+        args=[reminder_id],
+        id=reminder_id,
+        replace_existing=True,
+        misfire_grace_time=config.REMINDER_MISFIRE_GRACE,
     )
-    
-    return f"Reminder set for {run_date.strftime('%B %d at %I:%M %p')} IST"
\ No newline at end of file
+
+async def fire_reminder(reminder_id: str):
+    reminder = reminder_store.get(reminder_id)
+    if not reminder or not reminder_store.mark(reminder_id, SENT):
+        return  # already sent, reported or removed
+    try:
+        await send_reminder(reminder["chat_id"], reminder["message"])
+    except Exception as e:
+        print(f"[REMINDER] {reminder_id} failed to send: {e}")
+        reminder_store.mark(reminder_id, FAILED, expected=SENT)
+
+def refill_schedule():
+    """
+    Moves reminders due within the next REMINDER_HORIZON seconds from SQLite
+    into the scheduler. Also re-arms any still-pending one that is overdue
+    but inside the misfire grace; APScheduler runs those right away.
+    """
+    now = time.time()
+    added = 0
+    for reminder in reminder_store.pending_between(now - config.REMINDER_MISFIRE_GRACE, now + config.REMINDER_HORIZON):
+        if scheduler.get_job(reminder["id"]) is None:
+            _schedule(reminder["id"], datetime.fromtimestamp(reminder["run_at"], IST))
+            added += 1
+    if added:
+        print(f"[REMINDER] Scheduled {added} upcoming reminder(s)")
+
+async def _deliver_overdue():
+    """
+    Reminders that came due while the bot was down. Ones overdue by less
+    than REMINDER_MISFIRE_GRACE are still sent, marked as late; older ones
+    are reported once per chat instead of flooding it.
+    """
+    now = time.time()
+    missed_by_chat = {}
+    for reminder in reminder_store.pending_between(0, now):
+        due = datetime.fromtimestamp(reminder["run_at"], IST).strftime('%B %d at %I:%M %p')
+        if now - reminder["run_at"] <= config.REMINDER_MISFIRE_GRACE:
+            if not reminder_store.mark(reminder["id"], SENT):
+                continue
+            try:
+                await _bot.send_message(chat_id=reminder["chat_id"], text=f"⏰ Reminder (late, was due {due}): {reminder['message']}")
+            except Exception as e:
+                print(f"[REMINDER] {reminder['id']} failed to send: {e}")
+                reminder_store.mark(reminder["id"], FAILED, expected=SENT)
+        elif reminder_store.mark(reminder["id"], MISSED):
+            missed_by_chat.setdefault(reminder["chat_id"], []).append(f"- {reminder['message']} (due {due})")
+
+    for chat_id, lines in missed_by_chat.items():
+        shown = lines[:10] + ([f"...and {len(lines) - 10} more"] if len(lines) > 10 else [])
+        try:
+            await _bot.send_message(
+                chat_id=chat_id,
+                text=f"I was offline and missed {len(lines)} reminder(s):\n" + "\n".join(shown),
+            )
+        except Exception as e:
+            print(f"[REMINDER] Could not report missed reminders to {chat_id}: {e}")
+    if missed_by_chat:
+        print(f"[REMINDER] Reported {sum(map(len, missed_by_chat.values()))} missed reminder(s)")
+
+async def start_reminders(bot):
+    """
+    Called from post_init: binds the bot, handles reminders missed during
+    downtime, then loads only the next horizon's worth into the scheduler.
+    """
+    bind_bot(bot)
+    await _deliver_overdue()
+    reminder_store.prune(time.time() - config.REMINDER_RETENTION_DAYS * 86400)
+    scheduler.add_job(
+        refill_schedule,
+        trigger="interval",
+        seconds=config.REMINDER_REFILL_INTERVAL,
+        id="reminder-refill",
+        replace_existing=True,
+    )
+    refill_schedule()
+    print(f"[REMINDER] {reminder_store.pending_count()} pending reminder(s) in store")
\ No newline at end of file
@@ -0,0 +1,114 @@
+# durable reminder storage. every reminder is a row in SQLite; the in-memory
+# APScheduler only ever holds the ones due within the next few minutes, so a
+# restart re-reads a small window instead of every pending reminder.
+# rows hold plain data (chat id, text, run time) — nothing pickled.
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DB_PATH = Path(__file__).parent.parent / "memory" / "reminders.db"
+
+PENDING = "pending"
+SENT = "sent"
+MISSED = "missed"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminders (
+    id         TEXT PRIMARY KEY,
+    chat_id    TEXT NOT NULL,
+    message    TEXT NOT NULL,
+    run_at     REAL NOT NULL,   -- unix seconds (UTC)
+    status     TEXT NOT NULL DEFAULT 'pending',
+    created_at REAL NOT NULL,
+    done_at    REAL
+);
+CREATE INDEX IF NOT EXISTS idx_reminders_status_run_at ON reminders (status, run_at);
+"""
+
+
+class ReminderStore:
+    """
+    One connection shared across threads behind a lock; every statement is
+    a single indexed lookup or write, so holding the lock is cheap.
+    WAL mode keeps writes durable without blocking readers.
+    """
+
+    def __init__(self, path: Path = DB_PATH):
+        self.path = Path(path)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def add(self, reminder_id: str, chat_id: str, message: str, run_at: float) -> None:
+        """Inserts or re-arms a reminder (same id = same chat, text and time)."""
+        with self._lock:
+            self._connect().execute(
+                "INSERT INTO reminders (id, chat_id, message, run_at, status, created_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET status = excluded.status, done_at = NULL",
+                (reminder_id, chat_id, message, run_at, PENDING, time.time()),
+            )
+
+    def get(self, reminder_id: str) -> dict | None:
+        with self._lock:
+            row = self._connect().execute("SELECT * FROM reminders WHERE id = ?", (reminder_id,)).fetchone()
+        return dict(row) if row else None
+
+    def pending_between(self, start: float, end: float, limit: int = None) -> list:
+        """Pending reminders with start <= run_at < end, soonest first. Served by the (status, run_at) index."""
+        sql = "SELECT * FROM reminders WHERE status = ? AND run_at >= ? AND run_at < ? ORDER BY run_at"
+        params = [PENDING, start, end]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._connect().execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def mark(self, reminder_id: str, status: str, expected: str = PENDING) -> bool:
+        """
+        Moves a reminder from `expected` to `status`. False if it wasn't in
+        `expected` — marking SENT before sending is how a reminder is claimed,
+        so it can never go out twice.
+        """
+        with self._lock:
+            cursor = self._connect().execute(
+                "UPDATE reminders SET status = ?, done_at = ? WHERE id = ? AND status = ?",
+                (status, time.time(), reminder_id, expected),
+            )
+        return cursor.rowcount == 1
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._connect().execute(
+                "SELECT COUNT(*) FROM reminders WHERE status = ?", (PENDING,)
+            ).fetchone()[0]
+
+    def prune(self, older_than: float) -> int:
+        """Deletes finished reminders whose run time is before `older_than`."""
+        with self._lock:
+            cursor = self._connect().execute(
+                "DELETE FROM reminders WHERE status != ? AND run_at < ?", (PENDING, older_than)
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+reminder_store = ReminderStore()
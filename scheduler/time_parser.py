@@ -0,0 +1,286 @@
+# rule-based reminder time parser. handles the common shapes of reminder
+# phrasing ("in 10 minutes", "tomorrow at 7pm", "on friday evening",
+# "25 march at 10:30") in IST without a model call. anything it isn't sure
+# about returns None and parse_reminder_datetime falls back to the LLM.
+
+import re
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+IST = ZoneInfo("Asia/Kolkata")
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+DEFAULT_HOUR = 9  # a day with no time ("remind me tomorrow") means the morning
+PARTS_OF_DAY = {"morning": 9, "afternoon": 14, "evening": 18, "night": 21, "tonight": 21}
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3, "apr": 4, "april": 4,
+    "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7, "aug": 8, "august": 8,
+    "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10, "nov": 11, "november": 11,
+    "dec": 12, "december": 12,
+}
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "couple of": 2, "a couple of": 2, "three": 3, "four": 4,
+    "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "fifteen": 15, "twenty": 20, "thirty": 30, "forty": 40, "forty five": 45, "fifty": 50,
+}
+UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+_NUM = r"(?:\d+(?:\.\d+)?|a couple of|couple of|forty five|" + "|".join(
+    sorted((w for w in NUMBER_WORDS if "couple" not in w and w != "forty five"), key=len, reverse=True)
+) + r")"
+_UNIT = r"(?:seconds?|secs?|minutes?|mins?|hours?|hrs?|days?|weeks?|wks?|(?<=\d)[mh])"
+_PART = rf"{_NUM}\s*{_UNIT}(?:\s+and\s+a\s+half)?"
+_DURATION = rf"(?:half\s+an?\s+hour|a\s+half\s+hour|{_PART}(?:\s*(?:,|and)?\s*{_PART})*)"
+_MONTH = "|".join(sorted(MONTHS, key=len, reverse=True))
+_MERIDIEM = r"(?P<mer>a\.?m\.?|p\.?m\.?)"
+
+_RELATIVE = [
+    re.compile(rf"\b(?:in|after)\s+(?:about\s+)?(?P<d>{_DURATION})(?:\s+from\s+now)?\b"),
+    re.compile(rf"\b(?P<d>{_DURATION})\s+(?:from\s+now|later)\b"),
+]
+_DAYS = [
+    (re.compile(r"\b(?:the\s+)?day\s+after\s+(?:tomorrow|tmrw|tmr)\b"), lambda m, now: now.date() + timedelta(days=2)),
+    (re.compile(r"\b(?:tomorrow|tmrw|tmr)\b"), lambda m, now: now.date() + timedelta(days=1)),
+    (re.compile(r"\btoday\b"), lambda m, now: now.date()),
+]
+_WEEKDAY = re.compile(r"\b(?:(?P<prefix>next|this|coming|on)\s+)?(?P<wd>" + "|".join(WEEKDAYS) + r")\b")
+_ISO_DATE = re.compile(r"\b(?P<y>\d{4})-(?P<mo>\d{1,2})-(?P<d>\d{1,2})\b")
+_DAY_MONTH = re.compile(rf"\b(?:on\s+)?(?:the\s+)?(?P<d>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<mo>{_MONTH})\b\.?(?:\s+(?P<y>\d{{4}}))?")
+_MONTH_DAY = re.compile(rf"\b(?:on\s+)?(?P<mo>{_MONTH})\.?\s+(?P<d>\d{{1,2}})(?:st|nd|rd|th)?\b(?:,?\s+(?P<y>\d{{4}}))?")
+_SLASH_DATE = re.compile(r"\b(?:on\s+)?(?P<d>\d{1,2})/(?P<mo>\d{1,2})(?:/(?P<y>\d{2}|\d{4}))?\b")  # dd/mm, as written in India
+_ORDINAL_DAY = re.compile(r"\bon\s+(?:the\s+)?(?P<d>\d{1,2})(?:st|nd|rd|th)\b")
+_TIMES = [
+    re.compile(rf"\b(?:at|by)?\s*(?P<h>\d{{1,2}})(?:[:.](?P<min>\d{{2}}))?\s*{_MERIDIEM}(?!\w)"),
+    re.compile(r"\b(?:at|by)\s*(?P<h>\d{1,2})[:.](?P<min>\d{2})\b"),
+    re.compile(r"\b(?P<h>\d{1,2}):(?P<min>\d{2})\b"),
+    re.compile(r"\b(?:at|by)?\s*(?P<h>\d{1,2})\s*o'?\s?clock\b"),
+    re.compile(r"\b(?:at|by)\s*(?P<h>\d{1,2})\b(?![:./\d]|\s*(?:%|st|nd|rd|th|minutes?|mins?|hours?|hrs?|days?|weeks?|people|times)\b)"),
+]
+_NAMED_TIME = re.compile(r"\b(?:at\s+)?(?P<name>noon|midday|midnight)\b")
+_PART_OF_DAY = re.compile(r"\b(?:in\s+the\s+|this\s+|at\s+)?(?P<part>morning|afternoon|evening|night|tonight)\b")
+
+# recurring or vague phrasing — the LLM (or a human) has to interpret these
+_DEFER = re.compile(
+    r"\b(?:every|daily|weekly|monthly|each|weekend|next\s+(?:week|month|year)|end\s+of|"
+    r"later\s+today|soon|sometime|before|until|till|fortnight|eod|eow)\b"
+)
+# time-ish words still present after every match is removed mean something was misread
+_LEFTOVER_TIME = re.compile(
+    r"\b(?:at|by)\s+(?:\d|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve)\b|"
+    r"(?:\d|\b(?:one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve))\s*(?:a\.?m\.?|p\.?m\.?)(?!\w)|"
+    r"\bo'?clock\b|\d{1,2}:\d{2}|\bhalf\s+past\b|\bquarter\s+(?:past|to)\b|"
+    r"\b(?:\d+|an?|one|two|three|four|five|six|seven|eight|nine|ten|few|couple of)\s*(?:minutes?|mins?|hours?|hrs?)\b"
+)
+_LEAD_IN = re.compile(
+    r"^(?:(?:hey|ok|okay|please|pls|krish)[\s,]+)*(?:can you\s+|could you\s+)?"
+    r"(?:set\s+(?:a\s+|an\s+)?(?:reminder|alarm)\s+(?:for\s+me\s+)?(?:to\s+|for\s+|about\s+|that\s+)?|"
+    r"remind\s+(?:me|us)\b\s*(?:to\s+|about\s+|that\s+|of\s+)?|reminder\s*(?:to\s+|:\s*|-\s*)?)",
+    re.IGNORECASE,
+)
+_DANGLING = re.compile(r"^(?:to|at|on|in|by|for|and|,|-)\s+|\s+(?:to|at|on|in|by|for|and|,|-)$", re.IGNORECASE)
+
+
+def _number(token: str) -> float:
+    token = re.sub(r"\s+", " ", token.strip())
+    return float(token) if token[0].isdigit() else NUMBER_WORDS[token]
+
+
+def _duration_seconds(text: str) -> float:
+    if re.fullmatch(r"half\s+an?\s+hour|a\s+half\s+hour", text):
+        return 1800
+    total = 0.0
+    for part in re.finditer(rf"(?P<n>{_NUM})\s*(?P<u>{_UNIT})(?P<half>\s+and\s+a\s+half)?", text):
+        unit = UNIT_SECONDS[part.group("u")[0]]
+        total += _number(part.group("n")) * unit + (unit / 2 if part.group("half") else 0)
+    return total
+
+
+def _resolve_hour(hour: int, meridiem: str | None, part: str | None, explicit_day: bool) -> int | None:
+    if hour > 23:
+        return None
+    if meridiem:
+        if hour < 1 or hour > 12:
+            return None
+        return hour % 12 + (12 if meridiem.startswith("p") else 0)
+    if hour == 0 or hour >= 13:
+        return hour
+    if hour == 12 and part in ("night", "tonight"):
+        return 24  # "12 tonight" is the midnight that ends the day; the caller rolls the date
+    if hour == 12 and part == "afternoon":
+        return 12
+    if part in ("afternoon", "evening", "night", "tonight"):
+        return None if hour == 12 else hour + 12
+    if part == "morning":
+        return hour % 12
+    if explicit_day:
+        # "tomorrow at 3" is the afternoon, "tomorrow at 8" the morning
+        return hour + 12 if hour <= 6 else hour
+    return None  # today with no am/pm: resolved against the clock by the caller
+
+
+def _first(patterns, text):
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            return match
+    return None
+
+
+def _remove_spans(text: str, spans: list) -> str:
+    for start, end in sorted(spans, reverse=True):
+        text = text[:start] + " " + text[end:]
+    return text
+
+
+def _extract_message(text: str) -> str:
+    text = re.sub(r"\s+", " ", text).strip(" ,.;:!?-")
+    text = _LEAD_IN.sub("", text).strip(" ,.;:!?-")
+    while True:
+        cleaned = _DANGLING.sub("", text).strip(" ,.;:!?-")
+        if cleaned == text:
+            return text
+        text = cleaned
+
+
+def parse_local(text: str, now: datetime = None) -> dict | None:
+    """
+    Returns {"datetime": "YYYY-MM-DD HH:MM:SS" (IST), "message": str} — the
+    shape parse_reminder_datetime returns — or None when the phrase needs
+    the LLM. Never guesses: conflicting or leftover time words give None.
+    """
+    now = now or datetime.now(IST)
+    if now.tzinfo is not None:
+        now = now.astimezone(IST)
+    now = now.replace(tzinfo=None, microsecond=0)  # naive from here on, IST wall clock
+    lowered = text.lower()
+    if _DEFER.search(lowered):
+        return None
+
+    spans = []
+    relative = _first(_RELATIVE, lowered)
+    if relative:
+        seconds = _duration_seconds(relative.group("d"))
+        if not seconds:
+            return None
+        spans.append(relative.span())
+        when = now + timedelta(seconds=round(seconds))
+    else:
+        when = None
+
+    day = None
+    explicit_day = False
+    for pattern, resolve in _DAYS:
+        match = pattern.search(lowered)
+        if match:
+            day, explicit_day = resolve(match, now), match.group(0) != "today"
+            spans.append(match.span())
+            break
+
+    weekday = _WEEKDAY.search(lowered) if day is None else None
+    date_match = None
+    if day is None and weekday is None:
+        for pattern in (_ISO_DATE, _DAY_MONTH, _MONTH_DAY, _SLASH_DATE, _ORDINAL_DAY):
+            date_match = pattern.search(lowered)
+            if date_match:
+                break
+
+    part_match = _PART_OF_DAY.search(lowered)
+    part = part_match.group("part") if part_match else None
+
+    named = _NAMED_TIME.search(lowered)
+    time_match = None if named else _first(_TIMES, lowered)
+    if date_match and time_match and time_match.start() < date_match.end() and date_match.start() < time_match.end():
+        time_match = None  # "25/03" or "2026-03-25" is a date, not a time
+
+    if when is not None:
+        # "in 2 hours" plus another anchor ("tomorrow in 2 hours") is ambiguous
+        if day or weekday or date_match or time_match or named or part:
+            return None
+    else:
+        if weekday:
+            target = WEEKDAYS.index(weekday.group("wd"))
+            ahead = (target - now.weekday()) % 7
+            if ahead == 0 and weekday.group("prefix") == "next":
+                ahead = 7
+            day, explicit_day = now.date() + timedelta(days=ahead), ahead > 0
+            spans.append(weekday.span())
+        elif date_match:
+            groups = date_match.groupdict()
+            try:
+                month = MONTHS[groups["mo"]] if groups.get("mo") in MONTHS else int(groups.get("mo") or now.month)
+                year = int(groups["y"]) if groups.get("y") else now.year
+                if year < 100:
+                    year += 2000
+                day = datetime(year, month, int(groups["d"])).date()
+            except ValueError:
+                return None
+            if day < now.date() and not groups.get("y"):
+                # "on the 5th" after the 5th is next month; "3 march" after March is next year
+                if groups.get("mo") is None:
+                    month = now.month % 12 + 1
+                    year = now.year + (1 if month == 1 else 0)
+                else:
+                    year += 1
+                try:
+                    day = datetime(year, month, int(groups["d"])).date()
+                except ValueError:
+                    return None
+            explicit_day = day != now.date()
+            spans.append(date_match.span())
+
+        if named:
+            hour, minute = (0, 0) if named.group("name") == "midnight" else (12, 0)
+            if named.group("name") == "midnight" and day is None:
+                day = now.date() + timedelta(days=1)
+            spans.append(named.span())
+        elif time_match:
+            groups = time_match.groupdict()
+            minute = int(groups.get("min") or 0)
+            if minute > 59:
+                return None
+            hour = _resolve_hour(int(groups["h"]), groups.get("mer"), part, explicit_day)
+            if hour == 24:
+                hour, day = 0, (day or now.date()) + timedelta(days=1)
+            elif hour is None and int(groups["h"]) <= 12 and not groups.get("mer"):
+                # no am/pm: the next h:mm or (h+12):mm still ahead, tomorrow's too when no day was given
+                h = int(groups["h"]) % 12
+                days = [now.date(), now.date() + timedelta(days=1)] if day is None else [day]
+                upcoming = [
+                    c for c in (datetime.combine(d, datetime.min.time()).replace(hour=h + offset, minute=minute)
+                                for d in days for offset in (0, 12))
+                    if c > now
+                ]
+                if upcoming:
+                    day, hour = min(upcoming).date(), min(upcoming).hour
+                elif weekday:
+                    hour = h + 12 if h <= 6 else h  # moved to next week below, read like "tomorrow at 3"
+            if hour is None:
+                return None
+            spans.append(time_match.span())
+        elif part:
+            hour, minute = PARTS_OF_DAY[part], 0
+        elif day is not None:
+            hour, minute = DEFAULT_HOUR, 0
+        else:
+            return None
+
+        if part_match:
+            spans.append(part_match.span())
+
+        if day is None:
+            day = now.date()
+            when = datetime.combine(day, datetime.min.time()).replace(hour=hour, minute=minute)
+            if when <= now:
+                when += timedelta(days=1)  # "at 7am" said at 9am means tomorrow
+        else:
+            when = datetime.combine(day, datetime.min.time()).replace(hour=hour, minute=minute)
+            if weekday and when <= now:
+                when += timedelta(days=7)  # "on monday at 9" said monday at 10 means next week
+
+    if _LEFTOVER_TIME.search(_remove_spans(lowered, spans)):
+        return None
+    # spans index `lowered`; lower() only changes length for a few non-ASCII letters
+    message = _extract_message(_remove_spans(text if len(text) == len(lowered) else lowered, spans))
+    return {"datetime": when.strftime(DATETIME_FORMAT), "message": message or text.strip()}
@@ -0,0 +1,413 @@
+"""
+Latency and routing report over memory/logs/metrics.jsonl.
+
+    python -m scripts.analyze_metrics                         # whole file
+    python -m scripts.analyze_metrics --since 24h
+    python -m scripts.analyze_metrics --since 2026-03-01 --until 2026-03-08 --summary-out weekly.json
+
+Reads the log once, line by line, in constant memory: latencies go into
+fixed log-scale histograms (about 1% relative error) instead of lists, so
+millions of rows cost the same memory as a hundred. Rows outside the window
+are skipped on the "ts" prefix without being JSON-decoded, and big files are
+split into byte ranges scanned by --workers processes, whose histograms merge
+exactly.
+
+Reports p50/p95/p99 per trace stage (see utils/tracing.py) and per intent
+class, tool call counts and failure rates, context-size distribution and
+how intents were scored. --summary-out writes the same numbers as compact
+JSON (plus a per-day rollup) for dashboards.
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# resolved without importing memory.store, so the report runs without bot tokens
+DEFAULT_METRICS = Path(__file__).resolve().parent.parent / "memory" / "logs" / "metrics.jsonl"
+
+CTX_BANDS = [1000, 2000, 4000, 8000, 16000]  # ctx_chars band edges
+TS_PREFIX = b'{"ts": "'  # write_metrics_log dumps "ts" first
+MIN_SHARD_BYTES = 32 * 1024 * 1024  # smaller files aren't worth a worker process
+
+
+class Histogram:
+    """
+    Log-bucketed histogram: bucket i holds values in [GROWTH**i, GROWTH**(i+1)).
+    Percentiles come back as the bucket's midpoint, clamped to the seen min/max.
+    """
+
+    GROWTH = 1.02
+    _LOG = math.log(GROWTH)
+
+    __slots__ = ("buckets", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        index = int(math.log(value) / self._LOG) if value >= 1 else 0
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "Histogram") -> None:
+        for index, n in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = pct / 100 * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                mid = self.GROWTH ** (index + 0.5) if index else 0.5
+                return min(max(mid, self.min), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 1),
+            "p50": round(self.percentile(50), 1),
+            "p95": round(self.percentile(95), 1),
+            "p99": round(self.percentile(99), 1),
+            "max": round(self.max, 1),
+        }
+
+
+class Report:
+    def __init__(self):
+        self.rows = 0
+        self.skipped = 0  # outside the window
+        self.bad_lines = 0
+        self.first_ts = None
+        self.last_ts = None
+        self.total_ms = Histogram()
+        self.ttft_ms = Histogram()
+        self.stages = {}  # span name -> Histogram
+        self.intents = {}  # top intent -> {"total": Histogram, "ttft": Histogram}
+        self.intent_sources = {}
+        self.tool_counts = {}  # from tools_used, available on every row
+        self.tools = {}  # tool -> {"ms": Histogram, "calls", "failed", "cached"}, from traced rows
+        self.tokens = {}  # model -> {"calls", "prompt", "completion"}
+        self.ctx_chars = Histogram()
+        self.ctx_bands = [0] * (len(CTX_BANDS) + 1)
+        self.days = {}  # YYYY-MM-DD -> Histogram of total_ms
+
+    def add(self, row: dict) -> None:
+        self.rows += 1
+        ts = row.get("ts") or ""
+        if self.first_ts is None or ts < self.first_ts:
+            self.first_ts = ts
+        if self.last_ts is None or ts > self.last_ts:
+            self.last_ts = ts
+
+        scores = row.get("scores") or {}
+        intent = max(scores, key=scores.get) if scores else "unknown"
+        per_intent = self.intents.get(intent)
+        if per_intent is None:
+            per_intent = self.intents[intent] = {"total": Histogram(), "ttft": Histogram()}
+
+        total = row.get("total_ms")
+        if total is not None:
+            self.total_ms.add(total)
+            per_intent["total"].add(total)
+            day = self.days.get(ts[:10])
+            if day is None:
+                day = self.days[ts[:10]] = Histogram()
+            day.add(total)
+        ttft = row.get("ttft_ms")
+        if ttft is not None:
+            self.ttft_ms.add(ttft)
+            per_intent["ttft"].add(ttft)
+
+        source = row.get("intent_source", "unknown")
+        self.intent_sources[source] = self.intent_sources.get(source, 0) + 1
+        for tool in row.get("tools_used") or ():
+            self.tool_counts[tool] = self.tool_counts.get(tool, 0) + 1
+
+        ctx = row.get("ctx_chars")
+        if ctx is not None:
+            self.ctx_chars.add(ctx)
+            band = 0
+            while band < len(CTX_BANDS) and ctx >= CTX_BANDS[band]:
+                band += 1
+            self.ctx_bands[band] += 1
+
+        for span in row.get("trace") or ():
+            self._add_span(span)
+
+    def _add_span(self, span: dict) -> None:
+        name, ms = span.get("name"), span.get("ms")
+        if name is None or ms is None:
+            return
+        hist = self.stages.get(name)
+        if hist is None:
+            hist = self.stages[name] = Histogram()
+        hist.add(ms)
+
+        if name == "tool":
+            tool = self.tools.get(span.get("tool"))
+            if tool is None:
+                tool = self.tools[span.get("tool")] = {"ms": Histogram(), "calls": 0, "failed": 0, "cached": 0}
+            tool["ms"].add(ms)
+            tool["calls"] += 1
+            tool["failed"] += span.get("ok") is False or "error" in span
+            tool["cached"] += bool(span.get("cached"))
+        elif name in ("llm", "llm_stream"):
+            usage = self.tokens.get(span.get("model"))
+            if usage is None:
+                usage = self.tokens[span.get("model")] = {"calls": 0, "prompt": 0, "completion": 0}
+            usage["calls"] += 1
+            usage["prompt"] += span.get("prompt_tokens") or 0
+            usage["completion"] += span.get("completion_tokens") or 0
+
+    def merge(self, other: "Report") -> None:
+        """Folds in a report built from another shard of the file."""
+        self.rows += other.rows
+        self.skipped += other.skipped
+        self.bad_lines += other.bad_lines
+        if other.first_ts is not None and (self.first_ts is None or other.first_ts < self.first_ts):
+            self.first_ts = other.first_ts
+        if other.last_ts is not None and (self.last_ts is None or other.last_ts > self.last_ts):
+            self.last_ts = other.last_ts
+        self.total_ms.merge(other.total_ms)
+        self.ttft_ms.merge(other.ttft_ms)
+        _merge_histograms(self.stages, other.stages)
+        _merge_histograms(self.days, other.days)
+        for intent, h in other.intents.items():
+            mine = self.intents.setdefault(intent, {"total": Histogram(), "ttft": Histogram()})
+            mine["total"].merge(h["total"])
+            mine["ttft"].merge(h["ttft"])
+        _merge_counts(self.intent_sources, other.intent_sources)
+        _merge_counts(self.tool_counts, other.tool_counts)
+        for tool, t in other.tools.items():
+            mine = self.tools.setdefault(tool, {"ms": Histogram(), "calls": 0, "failed": 0, "cached": 0})
+            mine["ms"].merge(t["ms"])
+            for key in ("calls", "failed", "cached"):
+                mine[key] += t[key]
+        for model, usage in other.tokens.items():
+            mine = self.tokens.setdefault(model, {"calls": 0, "prompt": 0, "completion": 0})
+            for key in usage:
+                mine[key] += usage[key]
+        self.ctx_chars.merge(other.ctx_chars)
+        self.ctx_bands = [a + b for a, b in zip(self.ctx_bands, other.ctx_bands)]
+
+    def summary(self, since: str = None, until: str = None) -> dict:
+        band_names = [f"<{CTX_BANDS[0]}"]
+        band_names += [f"{lo}-{hi}" for lo, hi in zip(CTX_BANDS, CTX_BANDS[1:])]
+        band_names.append(f">={CTX_BANDS[-1]}")
+        return {
+            "window": {"since": since, "until": until, "first_ts": self.first_ts, "last_ts": self.last_ts},
+            "rows": self.rows,
+            "total_ms": self.total_ms.summary(),
+            "ttft_ms": self.ttft_ms.summary(),
+            "stages": {name: hist.summary() for name, hist in sorted(self.stages.items())},
+            "intents": {
+                intent: {"total_ms": h["total"].summary(), "ttft_ms": h["ttft"].summary()}
+                for intent, h in sorted(self.intents.items())
+            },
+            "intent_sources": dict(sorted(self.intent_sources.items())),
+            "tool_calls": dict(sorted(self.tool_counts.items(), key=lambda kv: -kv[1])),
+            "tools": {
+                tool: {
+                    "calls": t["calls"],
+                    "failed": t["failed"],
+                    "failure_rate": round(t["failed"] / t["calls"], 3),
+                    "cached": t["cached"],
+                    "ms": t["ms"].summary(),
+                }
+                for tool, t in sorted(self.tools.items(), key=lambda kv: -kv[1]["calls"])
+            },
+            "tokens": self.tokens,
+            "ctx_chars": {**self.ctx_chars.summary(), "bands": dict(zip(band_names, self.ctx_bands))},
+            "days": {
+                day: {"rows": h.count, "p50_ms": round(h.percentile(50)), "p95_ms": round(h.percentile(95))}
+                for day, h in sorted(self.days.items())
+            },
+        }
+
+
+def _merge_histograms(mine: dict, theirs: dict) -> None:
+    for key, hist in theirs.items():
+        mine.setdefault(key, Histogram()).merge(hist)
+
+
+def _merge_counts(mine: dict, theirs: dict) -> None:
+    for key, n in theirs.items():
+        mine[key] = mine.get(key, 0) + n
+
+
+def parse_when(value: str, now: datetime = None) -> str:
+    """'30m' / '24h' / '7d' back from now, or an ISO date/datetime. Returned as an ISO string."""
+    now = now or datetime.now()
+    match = re.fullmatch(r"(\d+)([mhd])", value.strip())
+    if match:
+        unit = {"m": "minutes", "h": "hours", "d": "days"}[match.group(2)]
+        return (now - timedelta(**{unit: int(match.group(1))})).isoformat()
+    return datetime.fromisoformat(value).isoformat()
+
+
+def scan(path, since: str = None, until: str = None, start: int = 0, end: int = None) -> Report:
+    """
+    Report over the lines that begin in byte range [start, end). A line
+    straddling start belongs to the previous range, so ranges can be scanned
+    independently and merged.
+    """
+    report = Report()
+    # ts is a naive local isoformat() string, so string order is time order
+    since_b = since.encode() if since else None
+    until_b = until.encode() if until else None
+    with open(path, "rb") as f:
+        if start:
+            f.seek(start - 1)
+            f.readline()
+        pos = f.tell()
+        for line in f:
+            if end is not None and pos >= end:
+                break
+            pos += len(line)
+            if since or until:
+                ts = line[8:line.find(b'"', 8)] if line.startswith(TS_PREFIX) else None
+                if ts is not None and ((since_b and ts < since_b) or (until_b and ts >= until_b)):
+                    report.skipped += 1
+                    continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                report.bad_lines += bool(line.strip())
+                continue
+            if not isinstance(row, dict):
+                report.bad_lines += 1
+                continue
+            ts = row.get("ts") or ""
+            if (since and ts < since) or (until and ts >= until):
+                report.skipped += 1
+                continue
+            report.add(row)
+    return report
+
+
+def scan_parallel(path, since: str = None, until: str = None, workers: int = 1) -> Report:
+    """Splits the file into byte ranges, scans them in worker processes and merges the reports."""
+    size = os.path.getsize(path)
+    workers = max(1, min(workers, size // MIN_SHARD_BYTES))
+    if workers == 1:
+        return scan(path, since, until)
+    bounds = [size * i // workers for i in range(workers + 1)]
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(scan, path, since, until, lo, hi) for lo, hi in zip(bounds, bounds[1:])]
+        report = Report()
+        for future in futures:
+            report.merge(future.result())
+    return report
+
+
+def _percentile_row(label: str, s: dict, width: int = 16) -> str:
+    if not s.get("count"):
+        return f"{label:<{width}} {0:>7}"
+    return f"{label:<{width}} {s['count']:>7} {s['p50']:>8} {s['p95']:>8} {s['p99']:>8} {s['max']:>9}"
+
+
+def print_report(summary: dict, report: Report, elapsed: float) -> None:
+    window = summary["window"]
+    print(f"{summary['rows']} rows from {window['first_ts'] or '-'} to {window['last_ts'] or '-'} "
+          f"({report.skipped} outside window, {report.bad_lines} unreadable) in {elapsed:.2f}s")
+    header = f"{'':<16} {'count':>7} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} {'max_ms':>9}"
+
+    print("\nend to end")
+    print(header)
+    print(_percentile_row("total", summary["total_ms"]))
+    print(_percentile_row("first token", summary["ttft_ms"]))
+
+    if summary["stages"]:
+        print("\nper stage (traced rows)")
+        print(header)
+        for name, s in summary["stages"].items():
+            print(_percentile_row(name, s))
+
+    print("\nper intent (total / first token)")
+    print(header)
+    for intent, s in summary["intents"].items():
+        print(_percentile_row(intent, s["total_ms"]))
+        if s["ttft_ms"].get("count"):
+            print(_percentile_row("  first token", s["ttft_ms"]))
+    print("intent scored by: " + ", ".join(f"{k}={v}" for k, v in summary["intent_sources"].items()))
+
+    if summary["tool_calls"]:
+        print("\ntool calls")
+        print(f"{'':<22} {'used':>6} {'traced':>7} {'failed':>7} {'fail%':>6} {'cached':>7} {'p50_ms':>8} {'p95_ms':>8}")
+        for tool, used in summary["tool_calls"].items():
+            t = summary["tools"].get(tool)
+            if t is None:
+                print(f"{tool:<22} {used:>6}")
+                continue
+            print(f"{tool:<22} {used:>6} {t['calls']:>7} {t['failed']:>7} {t['failure_rate']:>6.1%} "
+                  f"{t['cached']:>7} {t['ms'].get('p50', 0):>8} {t['ms'].get('p95', 0):>8}")
+
+    if summary["tokens"]:
+        print("\nmodel tokens")
+        for model, usage in summary["tokens"].items():
+            print(f"{model:<32} calls={usage['calls']} prompt={usage['prompt']} completion={usage['completion']}")
+
+    ctx = summary["ctx_chars"]
+    if ctx.get("count"):
+        print(f"\ncontext size (chars): p50={ctx['p50']:.0f} p95={ctx['p95']:.0f} p99={ctx['p99']:.0f} max={ctx['max']:.0f}")
+        print("  " + "  ".join(f"{band}: {n}" for band, n in ctx["bands"].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--metrics", default=str(DEFAULT_METRICS))
+    parser.add_argument("--since", help="start of window: 30m, 24h, 7d, or an ISO date/datetime")
+    parser.add_argument("--until", help="end of window (exclusive), same formats")
+    parser.add_argument("--summary-out", help="also write the rollup as JSON to this path")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes for large files; each scans its own byte range")
+    parser.add_argument("--quiet", action="store_true", help="skip the printed report")
+    args = parser.parse_args()
+
+    path = Path(args.metrics)
+    if not path.exists():
+        sys.exit(f"no metrics file at {path}")
+    since = parse_when(args.since) if args.since else None
+    until = parse_when(args.until) if args.until else None
+
+    start = time.perf_counter()
+    report = scan_parallel(path, since, until, args.workers)
+    elapsed = time.perf_counter() - start
+    summary = report.summary(since, until)
+
+    if not args.quiet:
+        print_report(summary, report, elapsed)
+    if args.summary_out:
+        with open(args.summary_out, "w", encoding="utf-8") as f:
+            json.dump(summary, f, separators=(",", ":"))
+        print(f"\nsummary written to {args.summary_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Train and evaluate the local intent classifier from past metrics.
+
+    python -m scripts.train_intent_classifier            # eval, then write memory/intent_model.npz
+    python -m scripts.train_intent_classifier --eval-only
+
+Labels are bootstrapped from the scores logged in memory/logs/metrics.jsonl.
+Rows that quick_triage already handles are skipped (the local model never
+sees those), as are rows the local model scored itself, so it isn't trained
+on its own output. The seed examples are always included.
+"""
+
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+
+import numpy as np
+
+import config
+from agent.classifier import quick_triage
+from agent.intent_model import LABELS, MODEL_PATH, SEED_EXAMPLES, IntentModel
+from memory.store import LOGS_DIR
+from rag.vectorstore import encode
+
+
+def load_labeled(metrics_path) -> list:
+    examples = {}
+    if not metrics_path.exists():
+        return []
+    with open(metrics_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            msg, scores = row.get("msg"), row.get("scores")
+            if not msg or not scores or row.get("intent_source") == "local":
+                continue
+            if quick_triage(msg) is not None:
+                continue
+            examples[msg.strip().lower()] = {k: float(scores.get(k, 0.0)) for k in LABELS}
+    return list(examples.items())
+
+
+def evaluate(model: IntentModel, vectors: np.ndarray, targets: list, min_confidence: float) -> dict:
+    hits, errors, confident, confident_hits = 0, [], 0, 0
+    for vec, target in zip(vectors, targets):
+        scores, confidence = model.predict(vec)
+        expected = max(LABELS, key=target.get)
+        predicted = max(LABELS, key=scores.get)
+        hits += predicted == expected
+        errors.append(np.mean([abs(scores[k] - target[k]) for k in LABELS]))
+        if confidence >= min_confidence:
+            confident += 1
+            confident_hits += predicted == expected
+    n = len(targets) or 1
+    return {
+        "n": len(targets),
+        "dominant_accuracy": round(hits / n, 3),
+        "mean_abs_error": round(float(np.mean(errors)) if errors else 0.0, 3),
+        # share of messages that would skip the LLM, and how often those are right
+        "coverage": round(confident / n, 3),
+        "confident_accuracy": round(confident_hits / confident, 3) if confident else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local intent classifier")
+    parser.add_argument("--metrics", default=str(LOGS_DIR / "metrics.jsonl"))
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--min-confidence", type=float, default=None, help="defaults to config.LOCAL_INTENT_MIN_CONFIDENCE")
+    parser.add_argument("--eval-only", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    min_confidence = args.min_confidence if args.min_confidence is not None else config.LOCAL_INTENT_MIN_CONFIDENCE
+
+    labeled = load_labeled(Path(args.metrics))
+    print(f"{len(labeled)} labeled messages from {args.metrics}")
+    random.Random(args.seed).shuffle(labeled)
+
+    texts = [t for t, _ in labeled]
+    targets = [s for _, s in labeled]
+    vectors = encode(texts, normalize=True) if texts else np.zeros((0, 1), dtype=np.float32)
+    seed_vectors = encode([t for t, _ in SEED_EXAMPLES], normalize=True)
+    seed_targets = [s for _, s in SEED_EXAMPLES]
+
+    split = int(len(labeled) * (1 - args.holdout))
+    if len(labeled) - split > 0:
+        train_vecs = np.vstack([seed_vectors, vectors[:split]]) if split else seed_vectors
+        model = IntentModel.fit(train_vecs, seed_targets + targets[:split])
+        report = evaluate(model, vectors[split:], targets[split:], min_confidence)
+        print(f"holdout: {json.dumps(report)}")
+
+        start = time.perf_counter()
+        for vec in vectors[split:]:
+            model.predict(vec)
+        per_msg = (time.perf_counter() - start) / max(1, len(labeled) - split)
+        print(f"centroid scoring: {per_msg * 1e6:.1f}us per message (excluding MiniLM encode)")
+    else:
+        print("not enough labeled rows for a holdout split, skipping eval")
+
+    if args.eval_only:
+        return
+
+    all_vecs = np.vstack([seed_vectors, vectors]) if texts else seed_vectors
+    model = IntentModel.fit(all_vecs, seed_targets + targets)
+    model.save()
+    print(f"wrote {len(model.centroids)} centroids to {MODEL_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# small async micro-batching worker used for work that must stay off the reply path
+# (live RAG indexing, memory extraction). items go in with submit(), a background
+# task hands them to `handler` in batches.
+
+import asyncio
+import threading
+import time
+
+_STOP = object()
+
+
+class BatchWorker:
+    """
+    Collects submitted items and calls `await handler(batch)`.
+
+    A batch is flushed when it reaches max_batch items or when max_delay
+    seconds have passed since its first item — whichever comes first — so
+    latency stays bounded even under light traffic.
+    submit() never blocks and is safe to call from any thread; when the queue
+    is full the item is dropped and counted rather than stalling the caller.
+    """
+
+    def __init__(self, name: str, handler, max_batch: int = 64, max_delay: float = 2.0, maxsize: int = 10_000):
+        self.name = name
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.maxsize = maxsize
+        self.stats = {"submitted": 0, "processed": 0, "batches": 0, "dropped": 0, "errors": 0}
+        self._queue = None
+        self._loop = None
+        self._loop_thread = None
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run(), name=self.name)
+
+    def submit(self, item) -> bool:
+        """Queues an item. Returns False if the worker isn't running."""
+        if not self.running:
+            return False
+        if threading.get_ident() == self._loop_thread:
+            self._put(item)
+        else:
+            self._loop.call_soon_threadsafe(self._put, item)
+        return True
+
+    def _put(self, item) -> None:
+        # maxsize is enforced here instead of on the Queue so the stop sentinel always fits
+        if item is not _STOP and self._queue.qsize() >= self.maxsize:
+            self.stats["dropped"] += 1
+            return
+        if item is not _STOP:
+            self.stats["submitted"] += 1
+        self._queue.put_nowait(item)
+
+    async def stop(self) -> None:
+        """Flushes everything already queued, then stops the worker."""
+        if not self.running:
+            return
+        self._put(_STOP)
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._process(batch)
+
+        # anything that raced in behind the stop sentinel still gets flushed
+        leftover = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                leftover.append(item)
+        for i in range(0, len(leftover), self.max_batch):
+            await self._process(leftover[i:i + self.max_batch])
+
+    async def _process(self, batch: list) -> None:
+        start = time.perf_counter()
+        try:
+            await self.handler(batch)
+            self.stats["processed"] += len(batch)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"[{self.name.upper()} ERROR] batch of {len(batch)} failed: {e}")
+        self.stats["batches"] += 1
+        print(f"[{self.name.upper()}] processed {len(batch)} item(s) in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,101 @@
+# shared async HTTP client for the tool backends (GitHub, Notion, SerpAPI).
+# one keep-alive pool for the whole process, a cap on concurrent requests per
+# host, timeouts on every call and retry with exponential backoff.
+
+import asyncio
+import random
+from urllib.parse import urlsplit
+
+import httpx
+
+import config
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+MAX_RETRY_AFTER = 30.0
+
+_client = None
+_host_semaphores = {}
+
+
+def get_client() -> httpx.AsyncClient:
+    """Returns the shared client, created on first use."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config.TOOL_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.TOOL_HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=60.0,
+            ),
+            timeout=httpx.Timeout(config.TOOL_HTTP_TIMEOUT, connect=config.TOOL_HTTP_CONNECT_TIMEOUT),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """Closes the pooled connections. Called from post_shutdown."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _host_semaphores.clear()
+
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    # httpx only limits the pool as a whole; this keeps one slow API from
+    # taking every connection
+    host = urlsplit(url).netloc
+    if host not in _host_semaphores:
+        _host_semaphores[host] = asyncio.Semaphore(config.TOOL_HTTP_MAX_PER_HOST)
+    return _host_semaphores[host]
+
+
+def _backoff(attempt: int, response: httpx.Response = None) -> float:
+    if response is not None and "retry-after" in response.headers:
+        try:
+            return min(float(response.headers["retry-after"]), MAX_RETRY_AFTER)
+        except ValueError:
+            pass
+    base = config.TOOL_HTTP_BACKOFF * (2 ** attempt)
+    return base + random.uniform(0, base / 2)
+
+
+async def request(method: str, url: str, retries: int = None, **kwargs) -> httpx.Response:
+    """
+    Sends one request through the shared pool and returns the response.
+
+    Connection failures and 429s are retried for every method, since the
+    server never acted on them. Timeouts and 5xx responses are retried only
+    for idempotent methods; a POST that timed out may already have created
+    the issue or page. Raises the last httpx error when retries run out.
+    """
+    method = method.upper()
+    if retries is None:
+        retries = config.TOOL_HTTP_RETRIES
+    idempotent = method in IDEMPOTENT_METHODS
+
+    for attempt in range(retries + 1):
+        last = attempt == retries
+        try:
+            async with _host_semaphore(url):
+                response = await get_client().request(method, url, **kwargs)
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            if last:
+                raise
+            print(f"[HTTP] {method} {url} failed to connect ({e!r}), retrying")
+            await asyncio.sleep(_backoff(attempt))
+            continue
+        except httpx.TransportError as e:
+            if last or not idempotent:
+                raise
+            print(f"[HTTP] {method} {url} failed ({e!r}), retrying")
+            await asyncio.sleep(_backoff(attempt))
+            continue
+
+        retryable = response.status_code == 429 or (idempotent and response.status_code in RETRY_STATUSES)
+        if not retryable or last:
+            return response
+        print(f"[HTTP] {method} {url} -> {response.status_code}, retrying")
+        await asyncio.sleep(_backoff(attempt, response))
+    raise RuntimeError("unreachable")
@@ -0,0 +1,98 @@
+# per-request latency spans. run_agent opens a trace; code anywhere below it
+# (tasks and to_thread calls included — they inherit the context) records
+# spans with `with span("name") as s: ...`, and the finished trace is written
+# into that request's metrics.jsonl row.
+# with TRACING_ENABLED off, or outside a request, span() hands back one shared
+# no-op object: a ContextVar lookup and nothing else.
+
+import contextvars
+import time
+
+import config
+
+_current = contextvars.ContextVar("trace", default=None)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("trace", "name", "attrs", "start", "end")
+
+    def __init__(self, trace, name: str, attrs: dict):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.start = None
+        self.end = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.trace.spans.append(self)  # list.append is atomic, so threads can share a trace
+        return False
+
+    def set(self, **attrs) -> None:
+        """Attach results known only at the end (token counts, cache hit, ...)."""
+        self.attrs.update(attrs)
+
+
+class Trace:
+    __slots__ = ("started", "spans")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+
+    def export(self) -> list:
+        """Spans as plain dicts, in start order, times in ms relative to the trace start."""
+        rows = []
+        for s in sorted(self.spans, key=lambda s: s.start):
+            rows.append({
+                "name": s.name,
+                "start_ms": round((s.start - self.started) * 1000, 1),
+                "ms": round((s.end - s.start) * 1000, 1),
+                **s.attrs,
+            })
+        return rows
+
+
+def span(name: str, **attrs):
+    trace = _current.get()
+    if trace is None:
+        return _NOOP
+    return Span(trace, name, attrs)
+
+
+def start_trace():
+    """Opens a trace for the current request. Returns a token for end_trace, or None when disabled."""
+    if not config.TRACING_ENABLED:
+        return None
+    return _current.set(Trace())
+
+
+def current_trace() -> Trace | None:
+    return _current.get()
+
+
+def end_trace(token) -> None:
+    if token is not None:
+        _current.reset(token)